@@ -0,0 +1,181 @@
+# NeuroSwarm Validator Client - Adaptive Admission Control
+# Concurrency limiters that decide how many jobs this node accepts at once.
+# Instead of a fixed MAX_CAPACITY and a sticky throttle flag, the limit is
+# raised while observed inference latency stays near its baseline and
+# lowered when latency climbs or the host is overloaded. The current limit
+# is what the poll advertises as `capacity` to the router.
+#
+# Algorithms (modelled on Netflix concurrency-limits):
+#   fixed    - always max_limit (previous behaviour)
+#   aimd     - additive increase, multiplicative decrease on slow samples
+#   gradient - limit scaled by long-term / short-term latency ratio (Gradient2)
+#
+# Several validator identities in one process each have their own limit but
+# share one SlotBudget of MAX_CAPACITY hardware slots, so together they never
+# run more jobs than the hardware takes.
+
+import math
+import os
+import threading
+
+DEFAULT_MIN_LIMIT = 1
+HOST_LOAD_CEILING = 1.5 # 1-minute load average per CPU above which we back off
+
+
+def host_load_ratio() -> float:
+    """1-minute load average per CPU, or 0.0 where getloadavg is unavailable."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class ConcurrencyLimit:
+    """
+    Fixed limit. Subclasses adjust `limit` from latency samples.
+
+    Args:
+        max_limit: Hard ceiling (worker slots on this hardware)
+        initial_limit: Starting limit (defaults to max_limit)
+        min_limit: Floor the limit never drops below
+    """
+    name = "fixed"
+
+    def __init__(self, max_limit: int, initial_limit: int = None, min_limit: int = DEFAULT_MIN_LIMIT):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self._limit = float(initial_limit if initial_limit is not None else max_limit)
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return int(self._limit)
+
+    def on_sample(self, latency: float, in_flight: int):
+        """
+        Records one completed job's latency (seconds, ideally per generated
+        token so long and short jobs are comparable) and the number of jobs
+        that were in flight when it finished.
+        """
+        with self._lock:
+            new_limit = self._update(latency, in_flight)
+            if host_load_ratio() > HOST_LOAD_CEILING:
+                new_limit = min(new_limit, self._limit * 0.9)
+            self._limit = max(self.min_limit, min(self.max_limit, new_limit))
+
+    def _update(self, latency: float, in_flight: int) -> float:
+        return self._limit
+
+
+class AIMDLimit(ConcurrencyLimit):
+    """
+    Adds one slot per limit's worth of fast samples while the limit is in
+    use; multiplies the limit by backoff_ratio when a sample is slower than
+    tolerance x the baseline (slowly decaying minimum) latency.
+    """
+    name = "aimd"
+
+    def __init__(self, max_limit: int, initial_limit: int = None, min_limit: int = DEFAULT_MIN_LIMIT,
+                 backoff_ratio: float = 0.9, tolerance: float = 2.0):
+        super().__init__(max_limit, initial_limit if initial_limit is not None else max(min_limit, max_limit // 2), min_limit)
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self._baseline = None
+
+    def _update(self, latency: float, in_flight: int) -> float:
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline *= 1.001 # Let the baseline drift up so one lucky sample doesn't pin it forever
+
+        if latency > self._baseline * self.tolerance:
+            return self._limit * self.backoff_ratio
+        if in_flight * 2 >= self._limit:
+            return self._limit + 1.0 / self._limit
+        return self._limit
+
+
+class GradientLimit(ConcurrencyLimit):
+    """
+    Gradient2-style limit: gradient = tolerance * long-term / short-term
+    latency (clamped to [0.5, 1]); new limit = limit * gradient + sqrt(limit),
+    smoothed. Latency rising above its long-term average shrinks the limit.
+    """
+    name = "gradient"
+
+    def __init__(self, max_limit: int, initial_limit: int = None, min_limit: int = DEFAULT_MIN_LIMIT,
+                 tolerance: float = 1.5, smoothing: float = 0.2, short_window: int = 10, long_window: int = 600):
+        super().__init__(max_limit, initial_limit if initial_limit is not None else max(min_limit, max_limit // 2), min_limit)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._short_alpha = 2.0 / (short_window + 1)
+        self._long_alpha = 2.0 / (long_window + 1)
+        self._short = None
+        self._long = None
+
+    def _update(self, latency: float, in_flight: int) -> float:
+        if self._short is None:
+            self._short = self._long = latency
+        self._short += self._short_alpha * (latency - self._short)
+        self._long += self._long_alpha * (latency - self._long)
+        # Recover faster after a sustained slowdown has passed
+        if self._long / max(self._short, 1e-9) > 2:
+            self._long *= 0.95
+
+        # Don't grow a limit the workload isn't using
+        if in_flight < self._limit / 2:
+            return self._limit
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long / max(self._short, 1e-9)))
+        new_limit = self._limit * gradient + math.sqrt(self._limit)
+        return self._limit * (1 - self.smoothing) + new_limit * self.smoothing
+
+
+class SlotBudget:
+    """
+    Processing slots shared by every limit in the process: each running job
+    holds one, and at most `capacity` are held at once.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    @property
+    def free(self) -> int:
+        with self._cond:
+            return self.capacity - self._in_use
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self._in_use >= self.capacity:
+                return False
+            self._in_use += 1
+            return True
+
+    def acquire(self, timeout: float) -> bool:
+        """Takes a slot, waiting up to timeout seconds for one to free up."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_use < self.capacity, timeout=timeout):
+                return False
+            self._in_use += 1
+            return True
+
+    def wait_free(self, timeout: float) -> bool:
+        """Blocks until a slot is free (without taking it) or the timeout expires."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._in_use < self.capacity, timeout=timeout)
+
+    def release(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+
+
+ALGORITHMS = {cls.name: cls for cls in (ConcurrencyLimit, AIMDLimit, GradientLimit)}
+
+
+def make_limit(algorithm: str, max_limit: int) -> ConcurrencyLimit:
+    return ALGORITHMS[algorithm](max_limit)
@@ -0,0 +1,131 @@
+# NeuroSwarm Validator Client - Dynamic Micro-Batching
+# Sits in front of the inference call: job workers submit prompts and block
+# on the result while a scheduler thread gathers queued prompts for the same
+# model (up to max_batch_size, waiting at most max_wait_ms for stragglers),
+# runs them as one batched inference call and hands each result back to its
+# job. With a SlowJobProfiler, the batch thread is sampled into the profiles
+# of the jobs in its batch.
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, List, Optional, Tuple
+
+import tracing
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10
+DEFAULT_BATCH_WORKERS = 2
+
+
+class _Request:
+    __slots__ = ("prompt", "max_tokens", "on_token", "future", "enqueued_at", "enqueued_wall", "traces", "profile")
+
+    def __init__(self, prompt: str, max_tokens: int, on_token: Optional[Callable[[str], None]] = None, profile=None):
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.on_token = on_token
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.enqueued_wall = time.time()
+        self.traces = tracing.current() # The submitting job's traces, continued on the batch thread
+        self.profile = profile # The submitting job's slow-job profile, sampled on the batch thread
+
+
+class MicroBatcher:
+    """
+    Args:
+        run_batch: Called as run_batch(model, prompts, max_tokens, on_token)
+            (on_token: optional streaming callback per prompt) and must return
+            one result per prompt, in order.
+        max_batch_size: Largest batch handed to run_batch
+        max_wait_ms: Longest a prompt waits for others to join its batch
+        workers: Batches that may execute concurrently (e.g. for different models)
+        profiler: Optional SlowJobProfiler to attribute batch-thread samples to the batched jobs
+    """
+
+    def __init__(self, run_batch: Callable[[str, List[str], List[int], List[Optional[Callable[[str], None]]]], List[str]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 workers: int = DEFAULT_BATCH_WORKERS, profiler=None):
+        self.run_batch = run_batch
+        self.profiler = profiler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        self.stats = {"batches": 0, "requests": 0}
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, model: str, prompt: str, max_tokens: int, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Queues a prompt for batched inference and blocks until its result is
+        ready. on_token receives generated text as it is produced.
+        """
+        request = _Request(prompt, max_tokens, on_token, self.profiler.current_job() if self.profiler else None)
+        with self._cond:
+            self._queues.setdefault(model, deque()).append(request)
+            self._cond.notify_all()
+        return request.future.result()
+
+    def close(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1)
+        self._executor.shutdown(wait=True)
+
+    def _next_batch(self) -> Tuple[str, List[_Request]]:
+        # Caller holds self._cond. Picks the model whose oldest request is due
+        # (batch full or waited max_wait); otherwise sleeps until the next deadline.
+        while not self._stopping:
+            now = time.monotonic()
+            next_deadline = None
+            for model, queue in self._queues.items():
+                if not queue:
+                    continue
+                deadline = queue[0].enqueued_at + self.max_wait
+                if len(queue) >= self.max_batch_size or now >= deadline:
+                    batch = [queue.popleft() for _ in range(min(self.max_batch_size, len(queue)))]
+                    # Rotate so one busy model cannot starve the others
+                    self._queues.move_to_end(model)
+                    return model, batch
+                next_deadline = deadline if next_deadline is None else min(next_deadline, deadline)
+            self._cond.wait(None if next_deadline is None else max(0, next_deadline - now))
+        return "", []
+
+    def _run(self):
+        while True:
+            with self._cond:
+                model, batch = self._next_batch()
+            if not batch:
+                return
+            self._executor.submit(self._execute, model, batch)
+
+    def _execute(self, model: str, batch: List[_Request]):
+        started = time.time()
+        traces = []
+        for request in batch:
+            for trace in request.traces:
+                trace.add("batch_wait", request.enqueued_wall, started, batch_size=len(batch))
+            traces.extend(request.traces)
+        try:
+            with tracing.activate(traces), (self.profiler.working_for([r.profile for r in batch]) if self.profiler else nullcontext()):
+                results = self.run_batch(model, [r.prompt for r in batch], [r.max_tokens for r in batch],
+                                         [r.on_token for r in batch])
+            if len(results) != len(batch):
+                # Never leave a job thread blocked on a future nobody will resolve
+                raise RuntimeError(f"Batch for {model} returned {len(results)} results for {len(batch)} prompts")
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
@@ -0,0 +1,58 @@
+# Benchmark: throughput of micro-batched inference versus one prompt per
+# inference call, with the same number of concurrent job workers.
+#
+# Usage:
+#   python bench_batching.py --model gpt2 --jobs 64 --concurrency 8 --batch-size 8
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher, DEFAULT_MAX_WAIT_MS
+from inference import BackendRegistry, DEFAULT_MODELS_DIR, DEFAULT_MAX_TOKENS
+
+PROMPTS = [
+    "Write a 5-sentence summary of the NeuroSwarm economic model.",
+    "Explain how validators earn NSD fees.",
+    "List three benefits of decentralized inference.",
+    "Describe the role of the Router API in one paragraph.",
+]
+
+
+def _run(label: str, infer, jobs: int, concurrency: int, max_tokens: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: infer(PROMPTS[i % len(PROMPTS)], max_tokens), range(jobs)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {jobs} jobs in {elapsed:6.2f}s -> {jobs / elapsed:7.2f} jobs/s")
+    return jobs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched vs unbatched inference")
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR)
+    parser.add_argument('--model', default='gpt2')
+    parser.add_argument('--jobs', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent job workers (validator slots)')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--batch-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS)
+    args = parser.parse_args()
+
+    backend = BackendRegistry(args.models_dir).get(args.model)
+    backend.generate(PROMPTS[0], 2)  # warm up the session
+
+    unbatched = _run("unbatched", backend.generate, args.jobs, args.concurrency, args.max_tokens)
+
+    batcher = MicroBatcher(lambda model, prompts, limits, on_token: backend.generate_batch(prompts, limits),
+                           max_batch_size=args.batch_size, max_wait_ms=args.batch_wait_ms)
+    batched = _run("batched", lambda prompt, limit: batcher.submit(args.model, prompt, limit),
+                   args.jobs, args.concurrency, args.max_tokens)
+    avg_batch = batcher.stats["requests"] / max(1, batcher.stats["batches"])
+    batcher.close()
+
+    print(f"\nAverage batch size: {avg_batch:.2f} | Throughput gain: {batched / unbatched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
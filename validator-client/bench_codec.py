@@ -0,0 +1,80 @@
+# Benchmark: wire size and encode+decode CPU time of router payloads for
+# every available body format (JSON, MessagePack, CBOR) and content coding
+# (identity, gzip, zstd). Uses a batched poll response and a batched
+# completion report shaped like the validator client's.
+#
+# Usage:
+#   python bench_codec.py --jobs 8 --completions 20 --result-words 200
+
+import argparse
+import random
+import time
+
+import codec
+
+WORDS = ("neuroswarm", "validator", "router", "consensus", "token", "reward", "ledger", "model",
+         "inference", "stake", "summary", "economic", "network", "fee", "split", "solana")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def sample_payloads(jobs: int, completions: int, prompt_words: int, result_words: int):
+    rng = random.Random(7)
+    poll = {"jobs": [{
+        "jobId": f"job-{i}",
+        "prompt": _text(rng, prompt_words),
+        "feeAmount": 0.5,
+        "assignedValidator": "Brock-Node-A",
+        "userWallet": "AABBCCDD...",
+        "model": "NS-LLM-70B",
+        "assignedAt": time.time(),
+    } for i in range(jobs)]}
+    report = {"completions": [{
+        "jobId": f"job-{i}",
+        "validatorId": "Brock-Node-A",
+        "inferenceResult": _text(rng, result_words),
+        "success": True,
+        "feeAmount": 0.5,
+        "userWallet": "AABBCCDD...",
+    } for i in range(completions)]}
+    return {"poll response": poll, "completion batch": report}
+
+
+def _measure(payload, fmt: str, encoding: str, iterations: int):
+    body, headers = codec.encode(payload, fmt, encoding, min_bytes=0)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body, headers = codec.encode(payload, fmt, encoding, min_bytes=0)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode(body, headers["Content-Type"], headers.get("Content-Encoding"))
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+    return len(body), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare router payload size and codec CPU cost")
+    parser.add_argument('--jobs', type=int, default=8, help='Jobs in the sample poll response')
+    parser.add_argument('--completions', type=int, default=20, help='Completions in the sample batch report')
+    parser.add_argument('--prompt-words', type=int, default=40)
+    parser.add_argument('--result-words', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Formats: {', '.join(codec.available_formats())} | Encodings: {', '.join(codec.available_encodings() + ['identity'])}")
+    for name, payload in sample_payloads(args.jobs, args.completions, args.prompt_words, args.result_words).items():
+        baseline = None
+        print(f"\n{name}")
+        print(f"{'format':<8} {'encoding':<9} {'bytes':>9} {'vs json':>8} {'encode us':>10} {'decode us':>10}")
+        for fmt in codec.available_formats()[::-1]:  # json first, as the baseline
+            for encoding in ["identity"] + codec.available_encodings()[::-1]:
+                size, encode_us, decode_us = _measure(payload, fmt, encoding, args.iterations)
+                baseline = baseline or size
+                print(f"{fmt:<8} {encoding:<9} {size:>9} {size / baseline:>7.0%} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Benchmark: per-request latency of the pooled RouterTransport versus
+# one-shot requests.post calls (new TCP connection per request), measured
+# against the local router stand-in.
+#
+# Usage:
+#   python bench_transport.py --requests 500
+
+import argparse
+import statistics
+import time
+import requests
+
+import router_stub
+from transport import RouterTransport
+
+
+def _summary(label: str, samples_ms):
+    samples_ms = sorted(samples_ms)
+    p99 = samples_ms[int(len(samples_ms) * 0.99) - 1]
+    print(f"{label:<22} mean {statistics.mean(samples_ms):7.3f} ms | p50 {statistics.median(samples_ms):7.3f} ms | p99 {p99:7.3f} ms")
+    return statistics.mean(samples_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validator <-> router transport latency")
+    parser.add_argument('--requests', type=int, default=500, help='Requests per transport')
+    parser.add_argument('--router-url', help='Benchmark an existing router instead of starting the local stand-in')
+    args = parser.parse_args()
+
+    if args.router_url:
+        base_url = args.router_url.rstrip('/')
+    else:
+        server = router_stub.serve(router_stub.LocalRouter(), port=0)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+    payload = {
+        "jobId": "bench-job",
+        "validatorId": "bench-validator",
+        "inferenceResult": "x" * 512,
+        "success": True,
+        "feeAmount": 0.5,
+        "userWallet": "AABBCCDD...",
+    }
+    url = f"{base_url}/request/complete"
+
+    print(f"Benchmarking {args.requests} completion reports against {base_url}\n")
+
+    cold = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        requests.post(url, json=payload, timeout=5).raise_for_status()
+        cold.append((time.perf_counter() - start) * 1000)
+
+    transport = RouterTransport(base_url, pool_size=1)
+    transport.post("complete", "/request/complete", payload)  # warm the pool
+    pooled = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        transport.post("complete", "/request/complete", payload).raise_for_status()
+        pooled.append((time.perf_counter() - start) * 1000)
+    transport.close()
+
+    cold_mean = _summary("requests.post (cold)", cold)
+    pooled_mean = _summary("RouterTransport (pool)", pooled)
+    print(f"\nSaved per request: {cold_mean - pooled_mean:.3f} ms ({(1 - pooled_mean / cold_mean) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# NeuroSwarm Validator Client - Wire Codecs
+# Body serialization (JSON, MessagePack, CBOR) and content coding (gzip,
+# zstd) for router traffic, plus the HTTP negotiation helpers both sides
+# use. JSON and gzip are always available; the rest are optional:
+#   pip install msgpack cbor2 zstandard
+#
+# Negotiation:
+#   - Responses: the client lists what it can decode in Accept /
+#     Accept-Encoding and the router picks.
+#   - Requests: the router advertises what it can decode in its responses
+#     (Accept-Post for media types, Accept-Encoding for codings, RFC 7694).
+#     The client upgrades once it has seen them and drops back to
+#     JSON/identity if the router ever answers 415.
+# Small bodies are never compressed; below COMPRESS_MIN_BYTES the header
+# overhead and CPU cost outweigh the savings.
+#
+# Embedding results travel as packed little-endian float32 (base64 in the
+# body, so they survive every format and the JSON outbox log) instead of
+# lists of JSON numbers: 4 bytes per value (5.3 after base64) rather than
+# the 10-20 characters of a printed float.
+
+import array
+import base64
+import gzip
+import json
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard  # Optional: zstd content coding
+    HAVE_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAVE_ZSTD = False
+
+try:
+    import msgpack  # Optional: MessagePack bodies
+    HAVE_MSGPACK = True
+except ImportError:
+    msgpack = None
+    HAVE_MSGPACK = False
+
+try:
+    import cbor2  # Optional: CBOR bodies
+    HAVE_CBOR = True
+except ImportError:
+    cbor2 = None
+    HAVE_CBOR = False
+
+MEDIA_TYPES = {
+    "msgpack": "application/msgpack",
+    "cbor": "application/cbor",
+    "json": "application/json",
+}
+_FORMAT_BY_MEDIA_TYPE = {media_type: name for name, media_type in MEDIA_TYPES.items()}
+_FORMAT_BY_MEDIA_TYPE["application/x-msgpack"] = "msgpack"
+
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+EMBEDDING_FORMAT = "float32-le"
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+# zstd (de)compressor objects are reusable but not thread-safe; keep one per thread
+_zstd_local = threading.local()
+
+
+def _zstd_compressor():
+    if not hasattr(_zstd_local, "compressor"):
+        _zstd_local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _zstd_local.compressor
+
+
+def _zstd_decompressor():
+    if not hasattr(_zstd_local, "decompressor"):
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local.decompressor
+
+
+class UnsupportedCodecError(ValueError):
+    """Raised for a media type or content coding this process cannot handle."""
+
+
+def available_formats() -> List[str]:
+    """Serialization formats usable here, most compact first."""
+    return [name for name, ok in (("msgpack", HAVE_MSGPACK), ("cbor", HAVE_CBOR), ("json", True)) if ok]
+
+
+def available_encodings() -> List[str]:
+    """Content codings usable here, preferred first (identity excluded)."""
+    return [name for name, ok in (("zstd", HAVE_ZSTD), ("gzip", True)) if ok]
+
+
+def serialize(payload: Any, fmt: str = "json") -> bytes:
+    if fmt == "json":
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if fmt == "msgpack" and HAVE_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    if fmt == "cbor" and HAVE_CBOR:
+        return cbor2.dumps(payload)
+    raise UnsupportedCodecError(f"Serialization format {fmt!r} is not available")
+
+
+def deserialize(data: bytes, media_type: Optional[str] = None) -> Any:
+    fmt = format_for_media_type(media_type) or "json"
+    if fmt == "json":
+        return json.loads(data) if data else {}
+    if fmt == "msgpack" and HAVE_MSGPACK:
+        return msgpack.unpackb(data, raw=False)
+    if fmt == "cbor" and HAVE_CBOR:
+        return cbor2.loads(data)
+    raise UnsupportedCodecError(f"Cannot decode {media_type!r}")
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding in ("", "identity"):
+        return data
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd" and HAVE_ZSTD:
+        return _zstd_compressor().compress(data)
+    raise UnsupportedCodecError(f"Content coding {encoding!r} is not available")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Undoes a content coding. HTTP clients may already have decoded the body
+    (requests/httpx do for gzip, and for zstd when zstandard is installed),
+    so the magic bytes are checked before decompressing.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "gzip" and data.startswith(_GZIP_MAGIC):
+        return gzip.decompress(data)
+    if encoding == "zstd" and data.startswith(_ZSTD_MAGIC):
+        if not HAVE_ZSTD:
+            raise UnsupportedCodecError("zstd body received but zstandard is not installed")
+        try:
+            return _zstd_decompressor().decompress(data)
+        except zstandard.ZstdError:
+            # Frames written without a content size (streaming compressors) need the streaming API
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding not in ("identity", "gzip", "zstd"):
+        raise UnsupportedCodecError(f"Content coding {encoding!r} is not supported")
+    return data
+
+
+def format_for_media_type(media_type: Optional[str]) -> Optional[str]:
+    if not media_type:
+        return None
+    return _FORMAT_BY_MEDIA_TYPE.get(media_type.split(";")[0].strip().lower())
+
+
+def negotiate(header: Optional[str], supported: Iterable[str]) -> Optional[str]:
+    """
+    Picks the first of `supported` (in our preference order) that the
+    comma-separated header value accepts with q > 0. Works for
+    Accept-Encoding tokens and, via format names, for media types.
+    """
+    if not header:
+        return None
+    accepted = set()
+    for part in header.split(","):
+        fields = part.strip().split(";")
+        token = fields[0].strip().lower()
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(_FORMAT_BY_MEDIA_TYPE.get(token, token))
+    for option in supported:
+        if option in accepted or "*" in accepted or "*/*" in accepted:
+            return option
+    return None
+
+
+def encode(payload: Any, fmt: str = "json", encoding: str = "identity",
+           min_bytes: int = COMPRESS_MIN_BYTES) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serializes and (for bodies of at least min_bytes) compresses a payload.
+    Returns the body and the Content-Type / Content-Encoding headers for it.
+    """
+    body = serialize(payload, fmt)
+    headers = {"Content-Type": MEDIA_TYPES[fmt]}
+    if encoding not in ("", "identity") and len(body) >= min_bytes:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+def decode(body: bytes, content_type: Optional[str], content_encoding: Optional[str]) -> Any:
+    return deserialize(decompress(body, content_encoding), content_type)
+
+
+def encode_embeddings(data: bytes, count: int, dims: int) -> Dict[str, Any]:
+    """Wire form of `count` vectors of `dims` little-endian float32 values packed row after row in data."""
+    if len(data) != count * dims * 4:
+        raise ValueError(f"Expected {count} x {dims} float32 values, got {len(data)} bytes")
+    return {"format": EMBEDDING_FORMAT, "count": count, "dims": dims, "data": base64.b64encode(data).decode("ascii")}
+
+
+def decode_embeddings(payload: Dict[str, Any]) -> List[List[float]]:
+    """The vectors of an encode_embeddings() payload, as lists of floats."""
+    if payload.get("format") != EMBEDDING_FORMAT:
+        raise UnsupportedCodecError(f"Embedding format {payload.get('format')!r} is not supported")
+    values = array.array("f", base64.b64decode(payload["data"]))
+    if sys.byteorder == "big":
+        values.byteswap()
+    dims = payload["dims"]
+    return [values[row * dims:(row + 1) * dims].tolist() for row in range(payload["count"])]
+
+
+def accept_header(formats: Iterable[str]) -> str:
+    """Accept value listing `formats` with descending preference."""
+    return ", ".join(MEDIA_TYPES[fmt] if index == 0 else f"{MEDIA_TYPES[fmt]};q={1.0 - 0.1 * index:.1f}"
+                     for index, fmt in enumerate(formats))
+
+
+def accept_encoding_header(encodings: Iterable[str]) -> str:
+    return ", ".join(list(encodings) + ["identity"])
@@ -0,0 +1,803 @@
+# NeuroSwarm Validator Client - Inference Backends
+# Pluggable inference engines selected per job from the job's `model` field.
+# The ONNX Runtime backend loads the artifacts written by
+# NS-LLM/model-pipeline/export_large_models.py:
+#   <models_dir>/<model_key>/model_quantized.onnx (or model.onnx)
+#   <models_dir>/<model_key>/tokenizer.json (+ tokenizer_config.json)
+#   <models_dir>/<model_key>/metadata.json
+# export_shared_weights() rewrites a model in page-aligned external-data
+# form (model_shared.onnx + model_shared.onnx.data) so that several worker
+# processes memory-map one copy of the weights (see worker_pool.py).
+# Sentence-embedding encoders (e.g. all-MiniLM-L6-v2, packaged by
+# NS-LLM/model-pipeline/download_and_export.py) use the same layout and are
+# served by OnnxEmbeddingBackend for `type: "embedding"` jobs.
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from prefix_cache import PrefixCache, DEFAULT_MAX_BYTES as DEFAULT_PREFIX_CACHE_BYTES
+import tracing
+
+try:
+    import numpy as np
+    import onnxruntime as ort  # Optional: only needed for --engine onnx (pip install onnxruntime)
+    HAVE_ORT = True
+except ImportError:
+    np = None
+    ort = None
+    HAVE_ORT = False
+
+try:
+    from tokenizers import Tokenizer  # Optional: fast tokenizer; falls back to transformers
+    HAVE_TOKENIZERS = True
+except ImportError:
+    Tokenizer = None
+    HAVE_TOKENIZERS = False
+
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "NS-LLM", "models")
+DEFAULT_MAX_TOKENS = 64
+DEFAULT_EMBED_BATCH_SIZE = 32 # Texts per ONNX run when embedding
+EMBEDDING_JOB_TYPE = "embedding"
+# Export tasks / model architectures served by OnnxEmbeddingBackend
+EMBEDDING_TASKS = ("feature-extraction", "sentence-similarity", "embedding")
+GENERATIVE_ARCHITECTURE_MARKERS = ("LMHead", "CausalLM", "ConditionalGeneration", "Seq2Seq")
+PREPARED_PROMPTS = 256 # Tokenized prompts a backend keeps between prepare() and generation
+
+SHARED_MODEL_FILE = "model_shared.onnx"
+# External-data offsets are aligned to this so ONNX Runtime can mmap them
+# (64 KiB satisfies both the Linux page size and the Windows allocation granularity)
+SHARED_WEIGHTS_ALIGNMENT = 64 * 1024
+
+# Files tried in order when loading a generative model directory
+MODEL_FILE_CANDIDATES = [
+    SHARED_MODEL_FILE,
+    "model_quantized.onnx",
+    "model.onnx",
+    "decoder_model_merged_quantized.onnx",
+    "decoder_model_merged.onnx",
+]
+
+DEFAULT_SESSION_OPTIONS = {
+    "intra_op_num_threads": 0,  # 0 lets ONNX Runtime pick (one per physical core)
+    "inter_op_num_threads": 0,
+    "graph_optimization_level": "all",  # disable | basic | extended | all
+    "execution_mode": "sequential",  # sequential | parallel
+    # Prepacking copies weights into private buffers; disable it so memory-mapped
+    # weights stay shared between processes (costs some MatMul speed)
+    "disable_prepacking": False,
+}
+
+_ONNX_DTYPES = {
+    "tensor(float)": "float32",
+    "tensor(float16)": "float16",
+    "tensor(int64)": "int64",
+    "tensor(int32)": "int32",
+}
+
+
+# Receives each newly generated piece of text while generation is running
+TokenCallback = Callable[[str], None]
+
+
+class ModelNotFoundError(Exception):
+    """Raised when no local artifacts exist for a job's model."""
+
+
+def is_embedding_job(job: Dict[str, Any]) -> bool:
+    return job.get("type") == EMBEDDING_JOB_TYPE
+
+
+def embedding_texts(job: Dict[str, Any]) -> List[str]:
+    """The texts of an embedding job: its `texts` list, or a single `text` (the NS-LLM /api/embed shape)."""
+    texts = job.get("texts")
+    if texts is None:
+        texts = [job["text"]] if job.get("text") is not None else []
+    return [str(text) for text in texts]
+
+
+class InferenceBackend:
+    """
+    Interface implemented by every inference engine.
+    """
+    model_name: str = ""
+
+    def generate(self, prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS, on_token: Optional[TokenCallback] = None) -> str:
+        raise NotImplementedError
+
+    def generate_batch(self, prompts: List[str], max_tokens: List[int],
+                       on_token: Optional[List[Optional[TokenCallback]]] = None) -> List[str]:
+        """
+        Generates for several prompts at once. Backends that cannot batch
+        natively fall back to one call per prompt. on_token, if given, holds
+        an optional streaming callback per prompt.
+        """
+        callbacks = on_token or [None] * len(prompts)
+        return [self.generate(prompt, limit, callback) for prompt, limit, callback in zip(prompts, max_tokens, callbacks)]
+
+    def prepare(self, prompts: List[str]):
+        """
+        Preprocesses prompts ahead of generation (e.g. while their jobs are
+        still queued), so the later generate call can skip that work.
+        """
+
+    def embed(self, texts: List[str], batch_size: int = DEFAULT_EMBED_BATCH_SIZE):
+        """One unit-length float32 vector per text, as a [len(texts), dims] array."""
+        raise ValueError(f"{self.model_name} is not an embedding model")
+
+    def count_tokens(self, text: str) -> int:
+        """Token count of generated text (whitespace words unless overridden)."""
+        return len(text.split())
+
+    def close(self):
+        pass
+
+
+def build_session_options(options: Optional[Dict[str, Any]] = None):
+    """
+    Translates a plain options dict (see DEFAULT_SESSION_OPTIONS) into ort.SessionOptions.
+    """
+    options = dict(DEFAULT_SESSION_OPTIONS, **(options or {}))
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    modes = {
+        "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+        "parallel": ort.ExecutionMode.ORT_PARALLEL,
+    }
+    sess_options = ort.SessionOptions()
+    sess_options.intra_op_num_threads = int(options["intra_op_num_threads"])
+    sess_options.inter_op_num_threads = int(options["inter_op_num_threads"])
+    sess_options.graph_optimization_level = levels[options["graph_optimization_level"]]
+    sess_options.execution_mode = modes[options["execution_mode"]]
+    if options["disable_prepacking"]:
+        sess_options.add_session_config_entry("session.disable_prepacking", "1")
+    return sess_options
+
+
+class _Tokenizer:
+    """
+    Thin adapter over the `tokenizers` library (preferred, fast) or
+    transformers.AutoTokenizer, exposing encode/decode on token id lists.
+    """
+
+    def __init__(self, model_dir: str):
+        tokenizer_json = os.path.join(model_dir, "tokenizer.json")
+        self._fast = None
+        self._hf = None
+        if HAVE_TOKENIZERS and os.path.exists(tokenizer_json):
+            self._fast = Tokenizer.from_file(tokenizer_json)
+            self._fast.no_padding() # Callers pad (and build the attention mask) themselves
+        else:
+            from transformers import AutoTokenizer
+            self._hf = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, text: str) -> List[int]:
+        if self._fast is not None:
+            return self._fast.encode(text).ids
+        return self._hf.encode(text)
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        """Token ids (with the model's special tokens) of many texts in one call."""
+        if self._fast is not None:
+            return [encoding.ids for encoding in self._fast.encode_batch(texts)]
+        return self._hf(texts)["input_ids"]
+
+    def decode(self, ids: List[int]) -> str:
+        if self._fast is not None:
+            return self._fast.decode(ids)
+        return self._hf.decode(ids, skip_special_tokens=True)
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class OnnxGenerativeBackend(InferenceBackend):
+    """
+    Greedy text generation with ONNX Runtime on CPU. Works with both plain
+    decoder exports and `text-generation-with-past` exports (past_key_values
+    inputs / present outputs), reusing the KV cache between decode steps.
+    With-past exports also keep a shared-prefix cache of prompt KV tensors
+    (up to prefix_cache_bytes), so prompts that start like a recent one only
+    prefill the rest.
+    """
+
+    def __init__(self, model_dir: str, session_options: Optional[Dict[str, Any]] = None,
+                 prefix_cache_bytes: int = DEFAULT_PREFIX_CACHE_BYTES):
+        if not HAVE_ORT:
+            raise RuntimeError("onnxruntime and numpy are required for the ONNX backend (pip install onnxruntime numpy)")
+
+        self.model_dir = model_dir
+        self.metadata = _read_json(os.path.join(model_dir, "metadata.json"))
+        self.config = _read_json(os.path.join(model_dir, "config.json"))
+        generation_config = _read_json(os.path.join(model_dir, "generation_config.json"))
+        self.model_name = self.metadata.get("model_key", os.path.basename(os.path.normpath(model_dir)))
+        self.context_length = int(self.metadata.get("context_length") or self.config.get("n_positions") or 1024)
+        self.eos_token_id = generation_config.get("eos_token_id", self.config.get("eos_token_id"))
+        self.pad_token_id = self.config.get("pad_token_id") or self.eos_token_id or 0
+
+        model_path = find_model_file(model_dir)
+        if model_path is None:
+            raise ModelNotFoundError(f"No ONNX model in {model_dir} (looked for {', '.join(MODEL_FILE_CANDIDATES)})")
+        self.model_path = model_path
+
+        self.tokenizer = _Tokenizer(model_dir)
+        self._prepared: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._prepared_lock = threading.Lock()
+        self.session = ort.InferenceSession(model_path, sess_options=build_session_options(session_options),
+                                            providers=["CPUExecutionProvider"])
+
+        self._inputs = {i.name: i for i in self.session.get_inputs()}
+        self._output_names = [o.name for o in self.session.get_outputs()]
+        # Map each `present.*` output to the `past_key_values.*` input it feeds next step
+        self._present_to_past = [
+            (index, name.replace("present", "past_key_values", 1))
+            for index, name in enumerate(self._output_names) if name.startswith("present")
+        ]
+        self.has_past = bool(self._present_to_past)
+        self.prefix_cache = PrefixCache(prefix_cache_bytes) if self.has_past and prefix_cache_bytes > 0 else None
+
+    def _empty_past(self, batch_size: int) -> Dict[str, Any]:
+        num_heads = (self.config.get("num_key_value_heads") or self.config.get("n_head")
+                     or self.config.get("num_attention_heads"))
+        hidden = self.config.get("n_embd") or self.config.get("hidden_size")
+        head_dim = hidden // (self.config.get("n_head") or self.config.get("num_attention_heads")) if hidden else None
+
+        past = {}
+        for _, name in self._present_to_past:
+            meta = self._inputs[name]
+            shape = []
+            for axis, dim in enumerate(meta.shape):
+                if isinstance(dim, int):
+                    shape.append(dim)
+                elif axis == 0:
+                    shape.append(batch_size)
+                elif axis == 1:
+                    shape.append(num_heads)
+                elif axis == 2:
+                    shape.append(0)  # past sequence length
+                else:
+                    shape.append(head_dim)
+            past[name] = np.zeros(shape, dtype=_ONNX_DTYPES.get(meta.type, "float32"))
+        return past
+
+    def _feeds(self, input_ids, attention_mask, past: Dict[str, Any], first_step: bool):
+        feeds = {"input_ids": input_ids}
+        if "attention_mask" in self._inputs:
+            feeds["attention_mask"] = attention_mask
+        if "position_ids" in self._inputs:
+            # Left padding shifts each row, so positions come from the mask, not the column index
+            positions = np.clip(np.cumsum(attention_mask, axis=1) - 1, 0, None)
+            feeds["position_ids"] = positions[:, -input_ids.shape[1]:]
+        if "use_cache_branch" in self._inputs:
+            feeds["use_cache_branch"] = np.array([not first_step])
+        feeds.update(past)
+        return feeds
+
+    def generate(self, prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS, on_token: Optional[TokenCallback] = None) -> str:
+        return self.generate_batch([prompt], [max_tokens], [on_token])[0]
+
+    def generate_batch(self, prompts: List[str], max_tokens: List[int],
+                       on_token: Optional[List[Optional[TokenCallback]]] = None) -> List[str]:
+        """
+        Generates for several prompts in one pass. Prompts are left-padded to a
+        common length and masked; each row stops at EOS or its own max_tokens.
+        Rows with an on_token callback get each new piece of text as it is decoded.
+        """
+        limit = max(max_tokens)
+        with tracing.span("tokenize", model=self.model_name):
+            # Leave room in the context window for the generated tokens
+            encoded = [self._encode(prompt)[-max(1, self.context_length - limit):] for prompt in prompts]
+        batch_size = len(encoded)
+        cached = [(0, None)] * batch_size
+        if self.prefix_cache is not None:
+            with tracing.span("prefix_lookup", model=self.model_name):
+                cached = [self.prefix_cache.lookup(ids) for ids in encoded]
+        # Only the part after each row's cached prefix is fed; cached prefixes are left-padded into the past
+        reused = [length for length, _ in cached]
+        past_width = max(reused)
+        suffixes = [ids[length:] for ids, length in zip(encoded, reused)]
+        width = max(len(ids) for ids in suffixes)
+
+        input_ids = np.full((batch_size, width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((batch_size, past_width + width), dtype=np.int64)
+        for row, ids in enumerate(suffixes):
+            input_ids[row, width - len(ids):] = ids
+            attention_mask[row, past_width - reused[row]:past_width] = 1
+            attention_mask[row, past_width + width - len(ids):] = 1
+
+        with tracing.span("infer", model=self.model_name, batch_size=batch_size, reused_tokens=sum(reused)):
+            full_ids = input_ids
+            past = self._empty_past(batch_size) if self.has_past else {}
+            if past_width:
+                past = self._cached_past(cached, past_width)
+            generated: List[List[int]] = [[] for _ in range(batch_size)]
+            finished = np.zeros(batch_size, dtype=bool)
+            callbacks = on_token or [None] * batch_size
+            streamed = [""] * batch_size
+
+            for step in range(limit):
+                outputs = self.session.run(None, self._feeds(input_ids, attention_mask, past, step == 0 and not past_width))
+                next_ids = np.argmax(outputs[0][:, -1, :], axis=-1)
+                if step == 0 and self.prefix_cache is not None:
+                    self._remember_prefixes(outputs, encoded, reused, past_width, width)
+
+                for row in range(batch_size):
+                    if finished[row]:
+                        continue
+                    token = int(next_ids[row])
+                    if token == self.eos_token_id:
+                        finished[row] = True
+                        continue
+                    generated[row].append(token)
+                    if callbacks[row]:
+                        streamed[row] = self._stream_piece(generated[row], streamed[row], callbacks[row])
+                    if len(generated[row]) >= max_tokens[row]:
+                        finished[row] = True
+                if finished.all():
+                    break
+
+                # Finished rows keep decoding padding under a zero mask until the batch is done
+                step_ids = np.where(finished, self.pad_token_id, next_ids).astype(np.int64)[:, None]
+                attention_mask = np.concatenate([attention_mask, (~finished).astype(np.int64)[:, None]], axis=1)
+                if self.has_past:
+                    past = {name: outputs[index] for index, name in self._present_to_past}
+                    input_ids = step_ids
+                else:
+                    full_ids = np.concatenate([full_ids, step_ids], axis=1)
+                    input_ids = full_ids
+
+        with tracing.span("detokenize", model=self.model_name):
+            results = [self.tokenizer.decode(ids) for ids in generated]
+        for row, callback in enumerate(callbacks):
+            # Flush anything held back mid-character
+            if callback and results[row].startswith(streamed[row]) and len(results[row]) > len(streamed[row]):
+                callback(results[row][len(streamed[row]):])
+        return results
+
+    def _cached_past(self, cached: List[Tuple[int, Optional[Dict[str, Any]]]], past_width: int) -> Dict[str, Any]:
+        # Past inputs holding each row's cached prefix, right-aligned and zero-padded to past_width
+        template = next(kv for _, kv in cached if kv)
+        past = {}
+        for name, array in template.items():
+            shape = (len(cached), array.shape[1], past_width) + array.shape[3:]
+            past[name] = np.zeros(shape, dtype=array.dtype)
+            for row, (length, kv) in enumerate(cached):
+                if length:
+                    past[name][row, :, past_width - length:] = kv[name][0]
+        return past
+
+    def _remember_prefixes(self, outputs, encoded: List[List[int]], reused: List[int], past_width: int, width: int):
+        # Caches each prompt's KV from the prefill outputs: its cached part plus the part just fed
+        for row, ids in enumerate(encoded):
+            fed = len(ids) - reused[row]
+            kv = {}
+            for index, name in self._present_to_past:
+                present = outputs[index]
+                kv[name] = np.concatenate([present[row:row + 1, :, past_width - reused[row]:past_width],
+                                           present[row:row + 1, :, past_width + width - fed:past_width + width]], axis=2)
+            self.prefix_cache.insert(ids, kv)
+
+    def prepare(self, prompts: List[str]):
+        for prompt in prompts:
+            with self._prepared_lock:
+                if prompt in self._prepared:
+                    continue
+            ids = self.tokenizer.encode(prompt)
+            with self._prepared_lock:
+                self._prepared[prompt] = ids
+                while len(self._prepared) > PREPARED_PROMPTS:
+                    self._prepared.popitem(last=False)
+
+    def _encode(self, prompt: str) -> List[int]:
+        with self._prepared_lock:
+            ids = self._prepared.pop(prompt, None)
+        return ids if ids is not None else self.tokenizer.encode(prompt)
+
+    def _stream_piece(self, ids: List[int], streamed: str, callback: TokenCallback) -> str:
+        # Decode the whole row so merges and leading spaces come out right, and
+        # emit only the new suffix. Hold back while the text ends in an
+        # incomplete multi-byte character.
+        text = self.tokenizer.decode(ids)
+        if text.endswith("\ufffd") or not text.startswith(streamed) or len(text) == len(streamed):
+            return streamed
+        callback(text[len(streamed):])
+        return text
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text))
+
+
+class OnnxEmbeddingBackend(InferenceBackend):
+    """
+    Sentence embeddings from an ONNX encoder export (BERT-style:
+    input_ids, attention_mask, optional token_type_ids -> token states).
+    Texts are tokenized in one call, sorted by length so each run pads as
+    little as possible, run batch_size at a time, mean-pooled over their
+    real tokens and L2-normalized with NumPy.
+    """
+
+    def __init__(self, model_dir: str, session_options: Optional[Dict[str, Any]] = None):
+        if not HAVE_ORT:
+            raise RuntimeError("onnxruntime and numpy are required for the ONNX backend (pip install onnxruntime numpy)")
+
+        self.model_dir = model_dir
+        self.metadata = _read_json(os.path.join(model_dir, "metadata.json"))
+        self.config = _read_json(os.path.join(model_dir, "config.json"))
+        self.model_name = self.metadata.get("model_key", os.path.basename(os.path.normpath(model_dir)))
+        self.max_length = int(self.metadata.get("max_length") or self.config.get("max_position_embeddings") or 512)
+        self.pad_token_id = self.config.get("pad_token_id") or 0
+
+        model_path = find_model_file(model_dir)
+        if model_path is None:
+            raise ModelNotFoundError(f"No ONNX model in {model_dir} (looked for {', '.join(MODEL_FILE_CANDIDATES)})")
+        self.model_path = model_path
+
+        self.tokenizer = _Tokenizer(model_dir)
+        self.session = ort.InferenceSession(model_path, sess_options=build_session_options(session_options),
+                                            providers=["CPUExecutionProvider"])
+        self._inputs = {i.name: i for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        # Pool the per-token states ourselves, even when the export also has a pooled output
+        self._output_name = next((name for name in ("last_hidden_state", "token_embeddings") if name in outputs), outputs[0])
+
+    def generate(self, prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS, on_token: Optional[TokenCallback] = None) -> str:
+        raise ValueError(f"{self.model_name} is an embedding model; it cannot generate text")
+
+    def embed(self, texts: List[str], batch_size: int = DEFAULT_EMBED_BATCH_SIZE):
+        with tracing.span("tokenize", model=self.model_name):
+            # Keep the final (separator) token when truncating
+            encoded = [ids if len(ids) <= self.max_length else ids[:self.max_length - 1] + ids[-1:]
+                       for ids in self.tokenizer.encode_batch(texts)]
+        order = sorted(range(len(encoded)), key=lambda index: len(encoded[index]))
+        vectors = None
+        with tracing.span("infer", model=self.model_name, batch_size=len(texts)):
+            for start in range(0, len(order), max(1, batch_size)):
+                rows = order[start:start + max(1, batch_size)]
+                pooled = self._embed_rows([encoded[index] for index in rows])
+                if vectors is None:
+                    vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+                vectors[rows] = pooled
+        if vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def _embed_rows(self, encoded: List[List[int]]):
+        # Right-padded batch -> mean of each row's token states under its attention mask
+        width = max(1, max(len(ids) for ids in encoded))
+        input_ids = np.full((len(encoded), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encoded), width), dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        states = self.session.run([self._output_name], feeds)[0]
+        if states.ndim == 2: # Already pooled by the export
+            return states.astype(np.float32, copy=False)
+        weights = attention_mask.astype(states.dtype)
+        # [batch, 1, width] @ [batch, width, hidden]: the masked sum as one batched matmul
+        summed = np.matmul(weights[:, None, :], states)[:, 0, :]
+        return (summed / np.maximum(weights.sum(axis=1, keepdims=True), 1.0)).astype(np.float32, copy=False)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text))
+
+
+def find_model_file(model_dir: str) -> Optional[str]:
+    """Returns the ONNX file a backend would load from model_dir, if any."""
+    return next((os.path.join(model_dir, name) for name in MODEL_FILE_CANDIDATES
+                 if os.path.exists(os.path.join(model_dir, name))), None)
+
+
+def export_shared_weights(model_dir: str, alignment: int = SHARED_WEIGHTS_ALIGNMENT, size_threshold: int = 1024) -> str:
+    """
+    Rewrites the model in model_dir as model_shared.onnx with every
+    initializer of at least size_threshold bytes stored in one external-data
+    file at alignment-aligned offsets. ONNX Runtime memory-maps aligned
+    external data, so processes loading it share one copy of the weights in
+    the page cache. Requires the `onnx` package. Returns the new model path.
+    """
+    import onnx
+    from onnx.external_data_helper import set_external_data
+
+    model_path = find_model_file(model_dir)
+    if model_path is None:
+        raise ModelNotFoundError(f"No ONNX model in {model_dir}")
+    shared_path = os.path.join(model_dir, SHARED_MODEL_FILE)
+    data_name = SHARED_MODEL_FILE + ".data"
+    if model_path == shared_path:
+        return shared_path
+
+    model = onnx.load(model_path)  # Inlines any existing external data
+    offset = 0
+    for tensor in model.graph.initializer:
+        if not tensor.HasField("raw_data") or len(tensor.raw_data) < size_threshold:
+            continue # Small tensors (e.g. shape constants) stay inline for shape inference
+        offset = (offset + alignment - 1) // alignment * alignment
+        set_external_data(tensor, data_name, offset=offset, length=len(tensor.raw_data))
+        tensor.data_location = onnx.TensorProto.EXTERNAL
+        offset += len(tensor.raw_data)
+
+    data_path = os.path.join(model_dir, data_name)
+    if os.path.exists(data_path):
+        os.remove(data_path)  # save_model appends
+    onnx.save_model(model, shared_path)
+    return shared_path
+
+
+def is_embedding_model(model_dir: str) -> bool:
+    """
+    True for sentence-embedding exports: an embedding task in metadata.json,
+    or a bare encoder architecture (e.g. BertModel) rather than one with a
+    language-modelling head in config.json.
+    """
+    metadata = _read_json(os.path.join(model_dir, "metadata.json"))
+    task = metadata.get("task") or metadata.get("pipeline_tag")
+    if task:
+        return task in EMBEDDING_TASKS
+    architectures = _read_json(os.path.join(model_dir, "config.json")).get("architectures") or []
+    return bool(architectures) and all(name.endswith("Model") and not any(marker in name for marker in GENERATIVE_ARCHITECTURE_MARKERS)
+                                       for name in architectures)
+
+
+def uses_shared_weights(model_dir: str) -> bool:
+    path = find_model_file(model_dir)
+    return path is not None and os.path.basename(path) == SHARED_MODEL_FILE
+
+
+def estimate_footprint(model_dir: str) -> int:
+    """
+    Approximate resident size of a loaded model: the ONNX graph plus any
+    external-data weight files stored next to it (e.g. model.onnx_data).
+    """
+    model_path = find_model_file(model_dir)
+    if model_path is None:
+        return 0
+    model_file = os.path.basename(model_path)
+    return sum(os.path.getsize(os.path.join(model_dir, name)) for name in os.listdir(model_dir)
+               if name.startswith(model_file) and os.path.isfile(os.path.join(model_dir, name)))
+
+
+def find_model_dir(models_dir: str, model: str) -> Optional[str]:
+    """
+    Resolves a job's `model` field to an exported model directory, matching
+    the directory name (registry key) or the hf_id / model_key in metadata.json.
+    """
+    direct = os.path.join(models_dir, model)
+    if os.path.isdir(direct):
+        return direct
+    if not os.path.isdir(models_dir):
+        return None
+    for entry in sorted(os.listdir(models_dir)):
+        candidate = os.path.join(models_dir, entry)
+        if not os.path.isdir(candidate):
+            continue
+        metadata = _read_json(os.path.join(candidate, "metadata.json"))
+        if model in (metadata.get("model_key"), metadata.get("hf_id")):
+            return candidate
+    return None
+
+
+class TokenCounter:
+    """
+    Counts tokens with each model's own tokenizer, loaded on first use
+    without an inference session, so token counts are available where no
+    backend is resident (the parent of worker processes, the scheduler).
+    Models that are not exported locally, or whose tokenizer cannot be
+    loaded, are counted in whitespace words.
+    """
+
+    def __init__(self, models_dir: str = DEFAULT_MODELS_DIR, default_model: Optional[str] = None,
+                 max_cached_counts: int = 1024):
+        self.models_dir = models_dir
+        self.default_model = default_model
+        self.max_cached_counts = max_cached_counts
+        self._lock = threading.Lock()
+        self._tokenizers: Dict[str, Optional[_Tokenizer]] = {}
+        self._counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict() # The same prompt is estimated repeatedly while queued
+
+    def __call__(self, model: str, text: str) -> int:
+        key = (model, text)
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        tokenizer = self._tokenizer(model)
+        count = len(tokenizer.encode(text)) if tokenizer else len(text.split())
+        with self._lock:
+            self._counts[key] = count
+            while len(self._counts) > self.max_cached_counts:
+                self._counts.popitem(last=False)
+        return count
+
+    def _tokenizer(self, model: str) -> Optional[_Tokenizer]:
+        with self._lock:
+            if model in self._tokenizers:
+                return self._tokenizers[model]
+        model_dir = find_model_dir(self.models_dir, model)
+        if model_dir is None and self.default_model:
+            model_dir = find_model_dir(self.models_dir, self.default_model)
+        tokenizer = None
+        if model_dir is not None:
+            try:
+                tokenizer = _Tokenizer(model_dir)
+            except Exception as e: # No tokenizer library or files: fall back to words
+                print(f"   [MODEL] Counting {model} tokens as words ({e}).")
+        with self._lock:
+            self._tokenizers[model] = tokenizer
+        return tokenizer
+
+
+class BackendRegistry:
+    """
+    Pool of loaded inference sessions, one per exported model, selected from
+    the job's `model` field. Jobs for models that are not exported locally
+    use default_model when it is set, otherwise they fail with
+    ModelNotFoundError.
+
+    Resident models are kept under memory_budget_bytes (estimated from the
+    weight files): the least recently used idle model is evicted to make
+    room. Models load on a background pool, so a job waiting for a cold model
+    never holds up jobs for models that are already resident.
+
+    Each with-past model also gets a shared-prefix KV cache of up to
+    prefix_cache_bytes (0 disables it), on top of the memory budget.
+    Embedding models (see is_embedding_model) load as OnnxEmbeddingBackend.
+    """
+
+    def __init__(self, models_dir: str = DEFAULT_MODELS_DIR, session_options: Optional[Dict[str, Any]] = None,
+                 default_model: Optional[str] = None, memory_budget_bytes: Optional[int] = None,
+                 load_workers: int = 2, prefix_cache_bytes: int = DEFAULT_PREFIX_CACHE_BYTES):
+        self.models_dir = models_dir
+        self.session_options = session_options
+        self.default_model = default_model
+        self.memory_budget_bytes = memory_budget_bytes
+        self.prefix_cache_bytes = prefix_cache_bytes
+        self._lock = threading.Lock()
+        self._model_dirs: Dict[str, str] = {} # job `model` value -> resolved model directory
+        self._resident: "OrderedDict[str, InferenceBackend]" = OrderedDict() # LRU order, oldest first
+        self._footprints: Dict[str, int] = {}
+        self._in_use: Dict[str, int] = {}
+        self._loading: Dict[str, Future] = {}
+        self._loader = ThreadPoolExecutor(max_workers=load_workers, thread_name_prefix="model-load")
+
+    # --- Public API ---
+
+    @contextmanager
+    def lease(self, model: str):
+        """
+        Yields the backend for `model`, loading it first if needed. A leased
+        backend is never evicted until the lease ends.
+        """
+        key = self._resolve(model)
+        while True:
+            backend = self._ensure_loaded(key).result()
+            with self._lock:
+                # It may have been evicted between loading and now; load it again if so
+                if self._resident.get(key) is backend:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    self._resident.move_to_end(key)
+                    break
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                self._evict_to_fit(0)
+
+    def get(self, model: str) -> InferenceBackend:
+        """Returns the backend for `model` without holding a lease."""
+        return self._ensure_loaded(self._resolve(model)).result()
+
+    def preload(self, models: List[str]):
+        """Starts loading models in the background (e.g. at startup)."""
+        for model in models:
+            self._ensure_loaded(self._resolve(model))
+
+    def prepare(self, model: str, prompts: List[str]):
+        """
+        Loads the model if needed and preprocesses the prompts on it. Blocks
+        until the model is loaded; meant for a background prefetch thread.
+        """
+        self.get(model).prepare(prompts)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._footprints[key] for key in self._resident)
+
+    def prefix_cache_hit_rate(self) -> float:
+        with self._lock:
+            caches = [b.prefix_cache for b in self._resident.values() if getattr(b, "prefix_cache", None)]
+        lookups = sum(c.stats["lookups"] for c in caches)
+        return sum(c.stats["hits"] for c in caches) / lookups if lookups else 0.0
+
+    def resident_models(self) -> List[str]:
+        with self._lock:
+            return [backend.model_name for backend in self._resident.values()]
+
+    def close(self):
+        self._loader.shutdown(wait=True)
+        with self._lock:
+            for backend in self._resident.values():
+                backend.close()
+            self._resident.clear()
+            self._model_dirs.clear()
+
+    # --- Internals ---
+
+    def _resolve(self, model: str) -> str:
+        with self._lock:
+            if model in self._model_dirs:
+                return self._model_dirs[model]
+        model_dir = find_model_dir(self.models_dir, model)
+        if model_dir is None and self.default_model:
+            model_dir = find_model_dir(self.models_dir, self.default_model)
+        if model_dir is None:
+            raise ModelNotFoundError(f"Model '{model}' is not exported under {self.models_dir}")
+        key = os.path.realpath(model_dir)
+        with self._lock:
+            self._model_dirs[model] = key
+        return key
+
+    def _ensure_loaded(self, key: str) -> Future:
+        with self._lock:
+            if key in self._resident:
+                future = Future()
+                future.set_result(self._resident[key])
+                return future
+            if key in self._loading:
+                return self._loading[key]
+            footprint = estimate_footprint(key)
+            self._evict_to_fit(footprint)
+            future = self._loader.submit(self._load, key, footprint)
+            self._loading[key] = future
+            return future
+
+    def _load(self, key: str, footprint: int) -> InferenceBackend:
+        print(f"   [MODEL] Loading {os.path.basename(key)} ({footprint / (1024 * 1024):.0f} MB) from {key}...")
+        try:
+            if is_embedding_model(key):
+                backend = OnnxEmbeddingBackend(key, self.session_options)
+            else:
+                backend = OnnxGenerativeBackend(key, self.session_options, self.prefix_cache_bytes)
+        except Exception:
+            with self._lock:
+                self._loading.pop(key, None)
+            raise
+        with self._lock:
+            self._loading.pop(key, None)
+            self._resident[key] = backend
+            self._footprints[key] = footprint
+        return backend
+
+    def _evict_to_fit(self, incoming: int):
+        # Caller holds self._lock. Evicts idle models, oldest first, until
+        # resident + incoming fits the budget (or nothing idle is left).
+        if not self.memory_budget_bytes:
+            return
+        used = sum(self._footprints[key] for key in self._resident)
+        for key in list(self._resident):
+            if used + incoming <= self.memory_budget_bytes:
+                return
+            if self._in_use.get(key, 0):
+                continue
+            backend = self._resident.pop(key)
+            used -= self._footprints[key]
+            print(f"   [MODEL] Evicting {backend.model_name} to stay within the {self.memory_budget_bytes / (1024 * 1024):.0f} MB model budget.")
+            backend.close()
+        if used + incoming > self.memory_budget_bytes:
+            print(f"   [WARNING] Resident models exceed the memory budget ({(used + incoming) / (1024 * 1024):.0f} MB); all are in use.")
@@ -0,0 +1,110 @@
+# NeuroSwarm Validator Client - Job Traces
+# Records the stream of jobs a validator claims (arrival time, prompt,
+# model, generation params, fee) so it can later be replayed against the
+# local router stand-in (router_stub.py / load_driver.py --replay) at the
+# recorded pace, N times faster, or as fast as the clients take it. Running
+# the same production trace through two client versions compares their
+# throughput on real traffic.
+#
+# Trace format: JSON lines, gzip-compressed when the path ends in .gz.
+# The first line is a header; each further line is one job:
+#   {"format": "neuroswarm-job-trace", "version": 1, "recordedAt": <epoch seconds>}
+#   {"t": <seconds since recordedAt>, "prompt": "...", "model": "...", "maxTokens": 64, ...}
+# Only the fields that shape the workload are kept; job ids, wallets and
+# validator assignments are not recorded.
+#
+# Plain traces are flushed after every job. Flushing a gzip stream ends a
+# deflate block, so .gz traces are flushed at most every GZIP_FLUSH_SECONDS
+# (a killed recorder loses at most that much) and stay compact.
+
+import gzip
+import json
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from scheduling import parse_timestamp
+
+TRACE_FORMAT = "neuroswarm-job-trace"
+TRACE_VERSION = 1
+GZIP_FLUSH_SECONDS = 5.0
+RECORDED_FIELDS = ("type", "prompt", "texts", "text", "model", "maxTokens", "max_tokens", "temperature", "top_p", "seed", "feeAmount")
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class JobTraceRecorder:
+    """
+    Appends claimed jobs to a trace file. Thread-safe; a job's arrival time
+    is its router assignment time (assignedAt, parsed like the scheduler
+    does: epoch seconds or milliseconds, or ISO 8601) when the job carries
+    one, otherwise the time it is recorded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started_at = time.time()
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._compressed = path.endswith(".gz")
+        self._flushed_at = time.monotonic()
+        self._file = _open(path, "w")
+        self._write({"format": TRACE_FORMAT, "version": TRACE_VERSION, "recordedAt": self.started_at})
+
+    def record(self, job: Dict[str, Any]):
+        arrived = parse_timestamp(job.get("assignedAt"))
+        if arrived is None:
+            arrived = time.time()
+        entry = {"t": round(max(0.0, arrived - self.started_at), 3)}
+        entry.update((name, job[name]) for name in RECORDED_FIELDS if job.get(name) is not None)
+        with self._lock:
+            if self._file:
+                self._write(entry)
+                self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        now = time.monotonic()
+        if not self._compressed or now - self._flushed_at >= GZIP_FLUSH_SECONDS:
+            self._file.flush()
+            self._flushed_at = now
+
+
+def read_job_trace(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Returns (header, jobs) with jobs sorted by arrival offset `t`. A
+    truncated last line, or the truncated end of a .gz trace (recorder
+    killed mid-write or before close), is ignored.
+    """
+    header: Optional[Dict[str, Any]] = None
+    jobs = []
+    with _open(path, "r") as f:
+        try:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if header is None:
+                    if entry.get("format") != TRACE_FORMAT:
+                        raise ValueError(f"{path} is not a job trace")
+                    header = entry
+                else:
+                    jobs.append(entry)
+        except (EOFError, zlib.error):
+            pass # Keep the jobs read before the compressed stream ends
+    if header is None:
+        raise ValueError(f"{path} is empty")
+    jobs.sort(key=lambda job: job.get("t", 0.0))
+    return header, jobs
@@ -0,0 +1,168 @@
+# Load driver: runs N validator clients against the local router stand-in
+# (router_stub.py) under a configurable job arrival process and fault
+# injection, then reports throughput, end-to-end latency percentiles and
+# completion loss, so client changes can be compared on the same workload.
+#
+# End-to-end latency is measured by the router, from job assignment to the
+# first completion report received for it. Jobs with no completion by the
+# end of the drain window count as lost (including any still unclaimed).
+#
+# Usage:
+#   python load_driver.py --clients 3 --duration 60 --arrival poisson --rate 4
+#   python load_driver.py --clients 4 --fleet --rate 2    # one process hosting 4 validator identities
+#   python load_driver.py --clients 2 --arrival bursty --burst-size 20 --error-rate 0.05 --ack-loss-rate 0.02
+#   python load_driver.py --clients 1 -- --engine onnx --default-model gpt2   # extra validator_client.py args
+#   python load_driver.py --clients 2 --replay prod.trace.gz --speed max   # recorded traffic (validator_client.py --record-jobs)
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from router_stub import LocalRouter, add_simulation_args, build_simulation, serve
+
+CLIENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "validator_client.py")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def start_clients(count: int, router_url: str, work_dir: str, delivery: str, extra_args: List[str],
+                  fleet: bool = False) -> List[subprocess.Popen]:
+    validator_ids = [f"load-validator-{index + 1}" for index in range(count)]
+    # A fleet is one client process hosting every identity
+    groups = [validator_ids] if fleet else [[validator_id] for validator_id in validator_ids]
+    clients = []
+    for group in groups:
+        name = "load-fleet" if fleet else group[0]
+        log = open(os.path.join(work_dir, f"{name}.log"), "w")
+        command = [sys.executable, "-u", CLIENT_SCRIPT,
+                   "--validator-id", ",".join(group),
+                   "--router-url", router_url,
+                   "--delivery", delivery,
+                   "--outbox", os.path.join(work_dir, f"{name}.wal"),
+                   "--metrics-port", "0"] + extra_args
+        clients.append(subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT))
+    return clients
+
+
+def stop_clients(clients: List[subprocess.Popen], timeout: float = 15.0):
+    for client in clients:
+        if client.poll() is None:
+            client.send_signal(signal.SIGINT)  # Lets the client drain its outbox
+    deadline = time.monotonic() + timeout
+    for client in clients:
+        try:
+            client.wait(timeout=max(0.1, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            client.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run validator clients against the local router stand-in and report throughput, latency and loss",
+                                     epilog="Arguments after -- are passed to every validator_client.py")
+    parser.add_argument('--clients', type=int, default=2, help='Validator client processes (or, with --fleet, identities) to run')
+    parser.add_argument('--fleet', action='store_true', help='Run every validator identity in one client process sharing its models')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of job generation')
+    parser.add_argument('--drain', type=float, default=30.0, help='Max seconds to wait for outstanding completions afterwards')
+    parser.add_argument('--delivery', choices=['interval', 'longpoll'], default='longpoll', help='Client poll delivery mode')
+    parser.add_argument('--port', type=int, default=0, help='Router stand-in port (0 picks a free one)')
+    parser.add_argument('--work-dir', help='Where client logs and outboxes go (default: a temporary directory)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    add_simulation_args(parser)
+    argv = sys.argv[1:]
+    extra_args = []
+    if '--' in argv:
+        extra_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="neuroswarm-load-")
+    os.makedirs(work_dir, exist_ok=True)
+    router = LocalRouter()
+    generator, faults = build_simulation(router, args)
+    server = serve(router, "127.0.0.1", args.port, faults)
+    router_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    print(f"Router stand-in: {router_url} | Clients: {args.clients} | Logs: {work_dir}", file=sys.stderr)
+
+    clients = start_clients(args.clients, router_url, work_dir, args.delivery, extra_args, fleet=args.fleet)
+    try:
+        # Jobs are only assigned to validators that have polled at least once
+        deadline = time.monotonic() + 30
+        while len(router.known_validators()) < args.clients:
+            if time.monotonic() > deadline or any(c.poll() is not None for c in clients):
+                raise SystemExit(f"Validator clients failed to start; see logs in {work_dir}")
+            time.sleep(0.1)
+
+        if args.replay:
+            pace = "max speed" if args.speed <= 0 else f"{args.speed:g}x ({generator.duration:.0f}s)"
+            print(f"Replaying {len(generator.jobs)} jobs from {args.replay} at {pace}...", file=sys.stderr)
+        else:
+            print(f"Generating {args.arrival} load at {args.rate:g} jobs/s for {args.duration:g}s...", file=sys.stderr)
+        started = time.time()
+        generator.start()
+        generator.wait(None if args.replay else args.duration) # A replay runs until the trace is exhausted
+        generator.stop()
+
+        deadline = time.monotonic() + args.drain
+        while time.monotonic() < deadline:
+            stats = router.stats()
+            if stats["completed"] >= stats["assigned"]:
+                break
+            time.sleep(0.2)
+    finally:
+        stop_clients(clients)
+        server.shutdown()
+
+    stats = router.stats()
+    latencies = stats["latencies"]
+    elapsed = max(1e-9, (stats["last_completion_at"] or time.time()) - started)
+    lost = stats["assigned"] - stats["completed"]
+    offered_rate = args.rate
+    if args.replay: # The trace's own average rate at the replay speed (None at max speed)
+        offered_rate = round(len(generator.jobs) / generator.duration, 3) if generator.duration else None
+    report = {
+        "clients": args.clients,
+        "arrival": f"replay:{args.replay}" if args.replay else args.arrival,
+        "offered_rate": offered_rate,
+        "duration_s": round(elapsed, 3),
+        "assigned": stats["assigned"],
+        "completed": stats["completed"],
+        "duplicates": stats["duplicates"],
+        "released": stats["released"],
+        "late": stats["late"],
+        "lost": lost,
+        "unclaimed": stats["unclaimed"],
+        "loss_rate": round(lost / stats["assigned"], 4) if stats["assigned"] else 0.0,
+        "jobs_per_sec": round(stats["completed"] / elapsed, 3),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "injected_faults": faults.injected if faults else {},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"\nJobs: {report['assigned']} assigned, {report['completed']} completed, {report['duplicates']} duplicate reports, "
+          f"{report['released']} handed back")
+    print(f"Throughput: {report['jobs_per_sec']:.2f} jobs/s over {report['duration_s']:.1f}s")
+    print(f"End-to-end latency: p50 {report['latency_p50_ms']:.0f} ms | p95 {report['latency_p95_ms']:.0f} ms | p99 {report['latency_p99_ms']:.0f} ms")
+    print(f"Completion loss: {report['lost']} ({report['loss_rate']:.2%}, {report['unclaimed']} never claimed) | "
+          f"Completed after timeout: {report['late']}")
+    if report["injected_faults"]:
+        print(f"Injected faults: {report['injected_faults']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# NeuroSwarm Validator Client - Completion Outbox
+# Durable, append-only write-ahead log for completion reports. A completion
+# is fsync'd to disk before the job is considered done; a background flusher
+# delivers pending entries to the Router in batches, retrying with
+# exponential backoff and jitter. Unacknowledged entries are replayed after
+# a restart so the validator's 70% fee share is never silently lost.
+#
+# WAL format (one JSON object per line):
+#   {"op": "put", "jobId": "...", "payload": {...}}
+#   {"op": "ack", "jobId": "...", "status": "delivered" | "rejected"}
+
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+
+DEFAULT_BATCH_SIZE = 20
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 60.0
+COMPACT_AFTER_ACKS = 1000 # Rewrite the WAL once this many acks have accumulated
+
+
+class CompletionOutbox:
+    """
+    Args:
+        path: WAL file location (created if missing)
+        send_batch: Delivers a list of payloads and returns a dict mapping each
+            handled jobId to "delivered" or "rejected". Entries missing from the
+            result are retried. Raising any exception retries the whole batch.
+        batch_size: Maximum payloads per send_batch call
+        fsync: fsync each append (disable only for benchmarks)
+    """
+
+    def __init__(self, path: str, send_batch: Callable[[List[Dict[str, Any]]], Dict[str, str]],
+                 batch_size: int = DEFAULT_BATCH_SIZE, fsync: bool = True):
+        self.path = path
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._acks_since_compact = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+
+    # --- Public API ---
+
+    def start(self) -> int:
+        """
+        Replays unacknowledged entries from the WAL and starts the flusher.
+        Returns the number of replayed entries.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._replay()
+        # Start from a compact log containing only what is still pending
+        self._compact()
+        replayed = len(self._pending) # Before the flusher starts draining it
+        self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+        self._thread.start()
+        return replayed
+
+    def enqueue(self, payload: Dict[str, Any]):
+        """
+        Durably records a completion and schedules it for delivery. Returns as
+        soon as the entry is on disk; never waits for the router.
+        """
+        job_id = payload["jobId"]
+        with self._cond:
+            self._append({"op": "put", "jobId": job_id, "payload": payload})
+            self._pending[job_id] = payload
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        """Number of completions not yet acknowledged by the router."""
+        with self._cond:
+            return len(self._pending)
+
+    def close(self, timeout: float = 10.0) -> int:
+        """
+        Gives the flusher up to `timeout` seconds to deliver what is pending,
+        then stops it. Anything left stays in the WAL for the next start.
+        Returns the number of entries still pending.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending, timeout=max(0, deadline - time.monotonic()))
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=max(0.1, deadline - time.monotonic()))
+        with self._cond:
+            if self._file:
+                self._file.close()
+                self._file = None
+            return len(self._pending)
+
+    # --- Flusher ---
+
+    def _run(self):
+        attempt = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if self._stopping:
+                    return
+                batch = list(self._pending.values())[:self.batch_size]
+
+            try:
+                results = self.send_batch(batch)
+            except Exception as e:
+                results = {}
+                print(f"   [OUTBOX] Delivery of {len(batch)} completion(s) failed: {e}")
+
+            with self._cond:
+                for job_id, status in results.items():
+                    if job_id in self._pending:
+                        del self._pending[job_id]
+                        self._append({"op": "ack", "jobId": job_id, "status": status})
+                        self._acks_since_compact += 1
+                if self._acks_since_compact >= COMPACT_AFTER_ACKS:
+                    self._compact()
+                self._cond.notify_all()
+
+            if len(results) == len(batch):
+                attempt = 0
+                continue
+
+            # Full jitter: sleep a random amount up to the exponential cap
+            attempt += 1
+            delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+            print(f"   [OUTBOX] {self.depth()} completion(s) pending. Retrying in {delay:.2f}s (attempt {attempt}).")
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping, timeout=delay)
+
+    # --- WAL ---
+
+    def _append(self, record: Dict[str, Any]):
+        # Caller holds self._cond
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # Torn write from a crash mid-append
+                if record.get("op") == "put":
+                    self._pending[record["jobId"]] = record["payload"]
+                elif record.get("op") == "ack":
+                    self._pending.pop(record["jobId"], None)
+        if self._pending:
+            print(f"   [OUTBOX] Replaying {len(self._pending)} unsent completion(s) from {self.path}")
+
+    def _compact(self):
+        # Caller holds self._cond (or the flusher is not running yet)
+        if self._file:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for job_id, payload in self._pending.items():
+                f.write(json.dumps({"op": "put", "jobId": job_id, "payload": payload}, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._acks_since_compact = 0
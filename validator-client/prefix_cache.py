@@ -0,0 +1,139 @@
+# NeuroSwarm Validator Client - Shared-Prefix KV Cache
+# Keeps the attention key/value tensors (past_key_values) that prefill
+# produced for recent prompts, indexed by a trie over their token ids, so a
+# new prompt that starts with the same tokens (a system prompt, a job
+# template) only has to prefill the part after the shared prefix.
+#
+# Decoder attention is causal: the keys/values of the first k tokens of a
+# cached sequence depend only on those k tokens, so any cached sequence
+# that shares a k-token prefix with the new prompt provides its KV, sliced
+# to k positions. Every trie node records which cached sequences pass
+# through it, so the longest shared prefix is one walk down the trie.
+#
+# Memory is bounded by max_bytes of KV tensors; the least recently used
+# sequences are evicted (and their trie paths pruned) to stay under it.
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+MIN_PREFIX_TOKENS = 4 # Shorter matches save too little to be worth the extra past inputs
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: Dict[int, "_Node"] = {}
+        self.entries = set() # Ids of cached sequences whose tokens pass through this node
+
+
+class _Entry:
+    __slots__ = ("tokens", "kv", "nbytes")
+
+    def __init__(self, tokens: Tuple[int, ...], kv: Dict[str, "object"]):
+        self.tokens = tokens
+        self.kv = kv # past input name -> array [1, heads, len(tokens), head_dim]
+        self.nbytes = sum(array.nbytes for array in kv.values())
+
+
+class PrefixCache:
+    """
+    Args:
+        max_bytes: Budget for cached KV tensors (per backend)
+        min_prefix_tokens: Shortest shared prefix worth reusing
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, min_prefix_tokens: int = MIN_PREFIX_TOKENS):
+        self.max_bytes = max_bytes
+        self.min_prefix_tokens = min_prefix_tokens
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict() # LRU order, oldest first
+        self._ids = itertools.count()
+        self.bytes = 0
+        self.stats = {"lookups": 0, "hits": 0, "reused_tokens": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def lookup(self, tokens: Sequence[int]) -> Tuple[int, Optional[Dict[str, "object"]]]:
+        """
+        Longest cached prefix of `tokens`, leaving at least the last token to
+        be fed (its logits pick the first generated token). Returns
+        (prefix length, {past name: [1, heads, length, head_dim] array}) or
+        (0, None) when nothing useful is cached.
+        """
+        with self._lock:
+            self.stats["lookups"] += 1
+            node, depth = self._root, 0
+            for token in tokens[:len(tokens) - 1]:
+                child = node.children.get(token)
+                if child is None:
+                    break
+                node, depth = child, depth + 1
+            if depth < self.min_prefix_tokens:
+                return 0, None
+            entry_id = max(node.entries) # Ids grow with insertion: take the newest
+            self._entries.move_to_end(entry_id)
+            entry = self._entries[entry_id]
+            self.stats["hits"] += 1
+            self.stats["reused_tokens"] += depth
+        # Slicing shares memory with the cached arrays; callers only read them
+        return depth, {name: array[:, :, :depth] for name, array in entry.kv.items()}
+
+    def insert(self, tokens: Sequence[int], kv: Dict[str, "object"]):
+        """Caches the KV tensors ([1, heads, len(tokens), head_dim]) of a prefilled prompt."""
+        tokens = tuple(tokens)
+        if len(tokens) < self.min_prefix_tokens:
+            return
+        entry = _Entry(tokens, kv)
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            node = self._root
+            for token in tokens:
+                node = node.children.get(token)
+                if node is None:
+                    break
+            else:
+                if node.entries:
+                    return # Already covered: a cached sequence starts with all of these tokens
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self.bytes += entry.nbytes
+            node = self._root
+            for token in tokens:
+                node = node.children.setdefault(token, _Node())
+                node.entries.add(entry_id)
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                self._evict(next(iter(self._entries)))
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._root = _Node()
+            self._entries.clear()
+            self.bytes = 0
+
+    def _evict(self, entry_id: int):
+        # Caller holds self._lock. Drops the entry and prunes trie nodes no other entry uses.
+        entry = self._entries.pop(entry_id)
+        self.bytes -= entry.nbytes
+        self.stats["evictions"] += 1
+        path: List[Tuple[_Node, int]] = []
+        node = self._root
+        for token in entry.tokens:
+            path.append((node, token))
+            node = node.children[token]
+            node.entries.discard(entry_id)
+        for parent, token in reversed(path):
+            if parent.children[token].entries:
+                break
+            del parent.children[token]
@@ -0,0 +1,130 @@
+# NeuroSwarm Validator Client - Slow Job Profiler
+# Opt-in statistical sampling profiler. While a job runs, a sampler thread
+# periodically captures the stack of the job's worker thread. When the job
+# finishes, its samples are kept only if it is among the slowest N jobs
+# seen so far, and written as collapsed stacks ("frame;frame;frame count"),
+# the input format of flamegraph.pl, speedscope and similar tools.
+#
+# Work done for a job on another thread (the micro-batcher's batch threads)
+# is sampled into the job's profile too, while that thread runs inside
+# working_for(); those stacks are rooted at a "[<thread name>]" frame.
+# Inference in worker processes cannot be sampled from here; profiles then
+# carry a note saying so.
+
+import heapq
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SlowJobProfiler:
+    """
+    Args:
+        top_n: How many of the slowest jobs to keep profiles for
+        out_dir: Directory receiving <jobId>.folded files
+        interval: Seconds between stack samples
+        note: Written into every profile (e.g. what the samples cannot cover)
+    """
+
+    def __init__(self, top_n: int, out_dir: str, interval: float = DEFAULT_SAMPLE_INTERVAL, note: Optional[str] = None):
+        self.top_n = top_n
+        self.out_dir = out_dir
+        self.interval = interval
+        self.note = note
+        os.makedirs(out_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._active: Dict[int, Tuple[str, Counter]] = {} # thread ident -> (jobId, stack counts)
+        self._helpers: Dict[int, Tuple[str, List[Counter]]] = {} # thread ident -> (thread name, stack counts of the jobs it works for)
+        self._slowest: List[Tuple[float, str]] = [] # min-heap of (duration, jobId)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+        self._thread.start()
+
+    def job_started(self, job_id: str):
+        """Starts sampling the calling thread on behalf of job_id."""
+        with self._lock:
+            self._active[threading.get_ident()] = (job_id, Counter())
+
+    def current_job(self) -> Optional[Counter]:
+        """
+        The profile of the job the calling thread runs (None outside a job),
+        to hand to working_for() on the thread that does work for it.
+        """
+        with self._lock:
+            entry = self._active.get(threading.get_ident())
+            return entry[1] if entry else None
+
+    @contextmanager
+    def working_for(self, jobs: List[Optional[Counter]]):
+        """Samples the calling thread into each of the jobs' profiles (from current_job()) while the block runs."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._helpers[ident] = (threading.current_thread().name, [job for job in jobs if job is not None])
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._helpers.pop(ident, None)
+
+    def job_finished(self, duration: float):
+        """Stops sampling the calling thread and keeps its profile if it ranks in the slowest N."""
+        with self._lock:
+            entry = self._active.pop(threading.get_ident(), None)
+            if entry is None:
+                return
+            job_id, samples = entry
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, (duration, job_id))
+                evicted = None
+            elif duration > self._slowest[0][0]:
+                evicted = heapq.heapreplace(self._slowest, (duration, job_id))[1]
+            else:
+                return
+        if evicted:
+            try:
+                os.remove(self._path(evicted))
+            except OSError:
+                pass
+        with open(self._path(job_id), "w", encoding="utf-8") as f:
+            f.write(f"# job {job_id} took {duration:.3f}s ({sum(samples.values())} samples at {self.interval * 1000:.1f} ms)\n")
+            if self.note:
+                f.write(f"# {self.note}\n")
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def close(self):
+        self._stopping.set()
+        self._thread.join(timeout=1)
+
+    def _path(self, job_id: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in job_id)
+        return os.path.join(self.out_dir, f"{safe}.folded")
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, (_, samples) in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[_collapse(frame)] += 1
+                for ident, (name, jobs) in self._helpers.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stack = f"[{name}];{_collapse(frame)}"
+                        for samples in jobs:
+                            samples[stack] += 1
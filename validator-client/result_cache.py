@@ -0,0 +1,133 @@
+# NeuroSwarm Validator Client - Inference Result Cache
+# Exact-match cache of inference results keyed on (model, prompt hash,
+# generation params). Bounded by entry count and memory, evicted LRU-first,
+# with per-entry TTL. Optionally write-through to a SQLite file so a warm
+# cache survives restarts.
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600
+
+
+def make_cache_key(model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """
+    Stable key for a generation request. The prompt is hashed so keys stay
+    small regardless of prompt length.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    canonical = json.dumps({"model": model, "prompt": prompt_hash, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Args:
+        max_entries: Maximum cached results
+        max_bytes: Maximum total size of cached results (UTF-8 bytes)
+        ttl_seconds: Lifetime of an entry; expired entries are never served
+        persist_path: Optional SQLite file for a write-through on-disk copy
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict() # key -> (value, expires_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._db.commit()
+            self._load()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += size
+            if self._db:
+                self._db.execute("INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+            self._evict()
+            if self._db:
+                self._db.commit()
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    # --- Internals (caller holds self._lock) ---
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+        if self._db:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _load(self):
+        now = time.time()
+        self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        # Oldest first so the most recently written entries end up most recently used
+        rows = self._db.execute("SELECT key, value, expires_at FROM results ORDER BY expires_at ASC").fetchall()
+        for key, value, expires_at in rows:
+            self._entries[key] = (value, expires_at)
+            self._bytes += len(value.encode("utf-8"))
+        self._evict()
+        self._db.commit()
+        if self._entries:
+            print(f"   [CACHE] Warmed {len(self._entries)} cached result(s) from disk")
@@ -0,0 +1,736 @@
+# NeuroSwarm Local Router Stand-in
+# A minimal, dependency-free stand-in for the Router API endpoints the
+# Validator Client talks to, so the client can be exercised offline:
+#   POST /api/v1/validator/poll/{validatorId}   (long-poll, batch job delivery)
+#   POST /api/v1/request/complete               (completion report)
+#   POST /api/v1/request/complete/batch         (batched completion reports)
+#   POST /api/v1/request/submit                 (enqueue a job, like JobQueueService.assignValidator)
+#   POST /api/v1/request/release                (a draining validator hands an unfinished job back)
+#   POST /api/v1/validator/stream/{validatorId} (persistent chunked SSE upload of generated tokens)
+#   GET  /api/v1/request/stream/{jobId}         (relays a job's tokens to users as SSE, NS-LLM contract)
+#
+# It doubles as a load simulator: jobs arrive on a configurable process
+# (uniform, Poisson or bursty) with a configurable prompt-length
+# distribution, or are replayed from a recorded job trace, and faults (HTTP 503s, connection resets, lost
+# acknowledgements, added latency) can be injected into the endpoints.
+# load_driver.py runs validator clients against it and reports results.
+#
+# Usage:
+#   python router_stub.py --port 3000 --job-interval 2
+#   python router_stub.py --port 3000 --arrival poisson --rate 5 --prompt-dist lognormal --error-rate 0.05
+#   python router_stub.py --port 3000 --replay jobs.trace.gz --speed 4
+#   python router_stub.py --port 3000 --rate 2 --embed-share 0.5 --embed-texts 64
+#   python validator_client.py --router-url http://localhost:3000/api/v1 --delivery longpoll
+
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Tuple
+
+import codec
+from job_trace import read_job_trace
+
+MAX_LONG_POLL_SECONDS = 30
+JOB_TIMEOUT_SECONDS = 60 # Like the router's timeout_at: jobs not completed by then have timed out
+DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2" # Packaged by NS-LLM/model-pipeline/download_and_export.py
+
+ARRIVAL_PROCESSES = ("uniform", "poisson", "bursty")
+PROMPT_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+PROMPT_VOCABULARY = ("neuroswarm", "validator", "router", "consensus", "token", "reward", "ledger", "model",
+                     "inference", "stake", "summary", "economic", "network", "fee", "split", "solana")
+
+_POLL_PATH = re.compile(r"^/api/v1/validator/poll/(?P<validator_id>[^/]+)$")
+_STREAM_UPLOAD_PATH = re.compile(r"^/api/v1/validator/stream/(?P<validator_id>[^/]+)$")
+_STREAM_RELAY_PATH = re.compile(r"^/api/v1/request/stream/(?P<job_id>[^/]+)$")
+
+
+class LocalRouter:
+    """
+    In-memory job queue with per-validator assignment. Validators waiting in a
+    long-poll are woken the moment a job is assigned to them.
+    """
+
+    def __init__(self, job_timeout: float = JOB_TIMEOUT_SECONDS):
+        self.job_timeout = job_timeout
+        self._cond = threading.Condition()
+        self._queues: Dict[str, deque] = {}
+        self._job_ids = itertools.count(1)
+        self._rr = 0
+        self.completions: List[Dict[str, Any]] = []
+        self.assigned_at: Dict[str, float] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.released = 0
+        self.streams: Dict[str, Dict[str, Any]] = {} # jobId -> {"meta", "tokens", "done", "result"}
+        self.last_health: Dict[str, Dict[str, Any]] = {}
+
+    def known_validators(self) -> List[str]:
+        with self._cond:
+            return list(self._queues.keys())
+
+    def assign(self, job: Dict[str, Any], validator_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Assigns a job to a validator (round-robin over validators that have
+        polled when none is given). Returns the job, or None if no validator
+        is known yet.
+        """
+        with self._cond:
+            if validator_id is None:
+                if not self._queues:
+                    return None
+                ids = list(self._queues.keys())
+                validator_id = ids[self._rr % len(ids)]
+                self._rr += 1
+            job = dict(job)
+            job.setdefault("jobId", f"job-{next(self._job_ids)}")
+            job.setdefault("feeAmount", 0.5)
+            job.setdefault("userWallet", "AABBCCDD...")
+            job.setdefault("model", "NS-LLM-70B")
+            job["assignedValidator"] = validator_id
+            job["assignedAt"] = time.time()
+            job.setdefault("timeoutAt", job["assignedAt"] + self.job_timeout)
+            self.assigned_at[job["jobId"]] = job["assignedAt"]
+            self.jobs[job["jobId"]] = job
+            self._queues.setdefault(validator_id, deque()).append(job)
+            self._cond.notify_all()
+            return job
+
+    def claim(self, validator_id: str, wait_seconds: float = 0, max_jobs: int = 1) -> List[Dict[str, Any]]:
+        """
+        Pops up to max_jobs jobs for a validator, waiting up to wait_seconds
+        for at least one to arrive.
+        """
+        deadline = time.monotonic() + min(wait_seconds, MAX_LONG_POLL_SECONDS)
+        with self._cond:
+            queue = self._queues.setdefault(validator_id, deque())
+            while not queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return [queue.popleft() for _ in range(min(max(max_jobs, 1), len(queue)))]
+
+    def release(self, job_id: str, validator_id: str) -> Optional[str]:
+        """
+        Re-queues a job its validator handed back unfinished, at the front of
+        another validator's queue when there is one. Returns the validator it
+        went to, or None if the job is unknown or already completed.
+        """
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or self.streams.get(job_id, {}).get("done"):
+                return None
+            others = [v for v in self._queues if v != validator_id] or [validator_id]
+            target = others[self._rr % len(others)]
+            self._rr += 1
+            job["assignedValidator"] = target
+            self._queues.setdefault(target, deque()).appendleft(job)
+            self.released += 1
+            self._cond.notify_all()
+            return target
+
+    def complete(self, payload: Dict[str, Any]):
+        with self._cond:
+            payload = dict(payload)
+            payload["receivedAt"] = time.time()
+            self.completions.append(payload)
+            # The completion is the authoritative end of a streamed job
+            stream = self._stream(payload["jobId"])
+            stream["result"] = payload.get("inferenceResult")
+            stream["done"] = True
+            self._cond.notify_all()
+
+    def _stream(self, job_id: str) -> Dict[str, Any]:
+        # Caller holds self._cond
+        return self.streams.setdefault(job_id, {"meta": None, "tokens": [], "done": False, "result": None})
+
+    def stream_event(self, event: str, data: Dict[str, Any]):
+        """Applies one event from a validator's token stream."""
+        job_id = data.get("jobId")
+        if not job_id:
+            return
+        with self._cond:
+            stream = self._stream(job_id)
+            if event == "meta":
+                stream["meta"] = data
+            elif event == "token" and not stream["done"]:
+                stream["tokens"].append(data.get("token", ""))
+            elif event == "done":
+                stream["done"] = True
+            self._cond.notify_all()
+
+    def stream_updates(self, job_id: str, sent: int, wait_seconds: float) -> Tuple[Optional[Dict[str, Any]], List[str], bool, Optional[str]]:
+        """
+        Waits until a job has tokens beyond the first `sent` or is done.
+        Returns (meta, new tokens, done, final result if known).
+        """
+        deadline = time.monotonic() + wait_seconds
+        with self._cond:
+            stream = self._stream(job_id)
+            while len(stream["tokens"]) <= sent and not stream["done"]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return stream["meta"], stream["tokens"][sent:], stream["done"], stream["result"]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Assignment/completion accounting. Completions are at-least-once, so
+        repeats of a jobId count as duplicates; latency is assignment to the
+        first completion received, and completions after the job's timeoutAt
+        count as late.
+        """
+        with self._cond:
+            first: Dict[str, float] = {}
+            for completion in self.completions:
+                first.setdefault(completion["jobId"], completion["receivedAt"])
+            assigned = dict(self.assigned_at)
+            late = sum(1 for job_id, at in first.items() if job_id in self.jobs and at > self.jobs[job_id]["timeoutAt"])
+            backlog = sum(len(q) for q in self._queues.values())
+        latencies = sorted(first[job_id] - at for job_id, at in assigned.items() if job_id in first)
+        return {
+            "assigned": len(assigned),
+            "completed": sum(1 for job_id in first if job_id in assigned),
+            "duplicates": len(self.completions) - len(first),
+            "released": self.released,
+            "late": late,
+            "unclaimed": backlog,
+            "last_completion_at": max(first.values(), default=None),
+            "latencies": latencies,
+        }
+
+
+class FaultInjector:
+    """
+    Randomly fails router endpoints so client retry paths get exercised.
+
+    Args:
+        error_rate: Share of requests answered with HTTP 503
+        reset_rate: Share of requests whose connection is dropped without a response
+        ack_loss_rate: Share of completion reports that are recorded but whose
+            response is lost (the client sees a reset and must retry)
+        latency_ms / jitter_ms: Added delay per request (mean, uniform +/- jitter)
+    """
+
+    def __init__(self, error_rate: float = 0.0, reset_rate: float = 0.0, ack_loss_rate: float = 0.0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.ack_loss_rate = ack_loss_rate
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.injected = {"error": 0, "reset": 0, "ack_loss": 0}
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self._lock:
+                delay_ms = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(0.0, delay_ms) / 1000.0)
+
+    def decide(self, completion: bool = False) -> Optional[str]:
+        """Returns the fault to inject into this request ("error", "reset", "ack_loss") or None."""
+        with self._lock:
+            roll = self._random.random()
+            for fault, rate in (("error", self.error_rate), ("reset", self.reset_rate),
+                                ("ack_loss", self.ack_loss_rate if completion else 0.0)):
+                if roll < rate:
+                    self.injected[fault] += 1
+                    return fault
+                roll -= rate
+        return None
+
+
+class PromptSampler:
+    """
+    Generates prompts whose length in words follows a distribution:
+    fixed (always mean_words), uniform (1 .. 2 x mean_words) or lognormal
+    (mean mean_words, long right tail with shape sigma).
+    """
+
+    def __init__(self, distribution: str = "fixed", mean_words: int = 10, sigma: float = 1.0, seed: Optional[int] = None):
+        if distribution not in PROMPT_DISTRIBUTIONS:
+            raise ValueError(f"Unknown prompt distribution {distribution!r}; expected one of {PROMPT_DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.mean_words = max(1, mean_words)
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    def length(self) -> int:
+        if self.distribution == "uniform":
+            return self._random.randint(1, 2 * self.mean_words)
+        if self.distribution == "lognormal":
+            mu = math.log(self.mean_words) - self.sigma ** 2 / 2
+            return max(1, int(round(self._random.lognormvariate(mu, self.sigma))))
+        return self.mean_words
+
+    def sample(self) -> str:
+        return " ".join(self._random.choice(PROMPT_VOCABULARY) for _ in range(self.length()))
+
+
+class JobGenerator:
+    """
+    Background thread that submits jobs to a LocalRouter.
+
+    Args:
+        rate: Mean arrivals per second
+        arrival: uniform (fixed spacing), poisson (exponential gaps) or bursty
+            (bursts of burst_size jobs, the bursts themselves Poisson so the
+            mean rate is preserved)
+        prompts: Prompt source; a fixed 10-word sampler by default
+        job_template: Extra fields merged into every job (e.g. model, maxTokens)
+        fee_range: (low, high) feeAmount drawn uniformly per job (default: the router default)
+        embed_share: Share of jobs that are embedding jobs of embed_texts texts for embed_model
+    """
+
+    def __init__(self, router: LocalRouter, rate: float, arrival: str = "poisson", burst_size: int = 10,
+                 prompts: Optional[PromptSampler] = None, job_template: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None, verbose: bool = False, fee_range: Optional[Tuple[float, float]] = None,
+                 embed_share: float = 0.0, embed_texts: int = 32, embed_model: str = DEFAULT_EMBED_MODEL):
+        if arrival not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process {arrival!r}; expected one of {ARRIVAL_PROCESSES}")
+        self.router = router
+        self.rate = rate
+        self.arrival = arrival
+        self.burst_size = max(1, burst_size)
+        self.prompts = prompts or PromptSampler(seed=seed)
+        self.job_template = job_template or {}
+        self.verbose = verbose
+        self.fee_range = fee_range
+        self.embed_share = embed_share
+        self.embed_texts = max(1, embed_texts)
+        self.embed_model = embed_model
+        self.generated = 0
+        self.unassigned = 0
+        self._random = random.Random(seed)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-generator", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(timeout=1)
+
+    def _next_gap(self) -> Tuple[float, int]:
+        # Returns (seconds until the next arrival, jobs arriving then)
+        if self.arrival == "uniform":
+            return 1.0 / self.rate, 1
+        if self.arrival == "bursty":
+            return self._random.expovariate(self.rate / self.burst_size), self.burst_size
+        return self._random.expovariate(self.rate), 1
+
+    def _run(self):
+        if self.rate <= 0:
+            return
+        next_at = time.monotonic()
+        while True:
+            gap, count = self._next_gap()
+            # Schedule against absolute times so generation overhead doesn't lower the rate
+            next_at += gap
+            if self._stopping.wait(max(0.0, next_at - time.monotonic())):
+                return
+            for _ in range(count):
+                if self.embed_share and self._random.random() < self.embed_share:
+                    job = dict(self.job_template, type="embedding", model=self.embed_model,
+                               texts=[self.prompts.sample() for _ in range(self.embed_texts)])
+                else:
+                    job = dict(self.job_template, prompt=self.prompts.sample())
+                if self.fee_range:
+                    job["feeAmount"] = round(self._random.uniform(*self.fee_range), 4)
+                job = self.router.assign(job)
+                if job is None:
+                    self.unassigned += 1
+                    continue
+                self.generated += 1
+                if self.verbose:
+                    print(f"[ASSIGN] {job['jobId']} -> {job['assignedValidator']}")
+
+    def wait(self, timeout: Optional[float] = None):
+        """Blocks for up to timeout seconds (the generator itself never runs out of jobs)."""
+        self._thread.join(timeout)
+
+
+class TraceReplayer:
+    """
+    Submits the jobs of a recorded trace (job_trace.py, written by
+    validator_client.py --record-jobs) at their recorded arrival offsets
+    divided by speed; speed 0 submits them all at once. Same interface as
+    JobGenerator.
+
+    Args:
+        job_template: Fields overriding the recorded ones (e.g. a local model)
+    """
+
+    def __init__(self, router: LocalRouter, path: str, speed: float = 1.0,
+                 job_template: Optional[Dict[str, Any]] = None, verbose: bool = False):
+        self.router = router
+        self.speed = speed
+        self.job_template = job_template or {}
+        self.verbose = verbose
+        _, self.jobs = read_job_trace(path)
+        self.generated = 0
+        self.unassigned = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-replay", daemon=True)
+
+    @property
+    def duration(self) -> float:
+        """Seconds the replay takes at this speed."""
+        if not self.jobs or self.speed <= 0:
+            return 0.0
+        return (self.jobs[-1].get("t", 0.0) - self.jobs[0].get("t", 0.0)) / self.speed
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(timeout=1)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Blocks until every job has been submitted (or the timeout expires)."""
+        self._thread.join(timeout)
+
+    def _run(self):
+        if not self.jobs:
+            return
+        origin = self.jobs[0].get("t", 0.0)
+        started = time.monotonic()
+        for recorded in self.jobs:
+            if self.speed > 0:
+                due = started + (recorded.get("t", 0.0) - origin) / self.speed
+                if self._stopping.wait(max(0.0, due - time.monotonic())):
+                    return
+            elif self._stopping.is_set():
+                return
+            job = {k: v for k, v in recorded.items() if k != "t"}
+            job.update(self.job_template)
+            job = self.router.assign(job)
+            if job is None:
+                self.unassigned += 1
+                continue
+            self.generated += 1
+            if self.verbose:
+                print(f"[REPLAY] {job['jobId']} -> {job['assignedValidator']}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive connection stalls on Nagle + delayed ACK (~40 ms/request).
+    disable_nagle_algorithm = True
+    router: LocalRouter = None  # set by serve()
+    faults: Optional[FaultInjector] = None  # set by serve()
+    formats: List[str] = ["json"]  # body formats accepted and offered; set by serve()
+    encodings: List[str] = []  # content codings accepted and offered; set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type")
+        content_encoding = self.headers.get("Content-Encoding")
+        fmt = codec.format_for_media_type(content_type) or "json"
+        if fmt not in self.formats or (content_encoding or "identity") not in self.encodings + ["identity"]:
+            raise codec.UnsupportedCodecError(f"{content_type} / {content_encoding}")
+        return codec.decode(data, content_type, content_encoding)
+
+    def _send_json(self, status: int, body: Optional[Dict[str, Any]] = None):
+        # Answers in the most compact format/coding the client accepts, and
+        # advertises what we accept in request bodies (Accept-Post / Accept-Encoding)
+        headers = {}
+        data = b""
+        if body is not None:
+            fmt = codec.negotiate(self.headers.get("Accept"), self.formats) or "json"
+            encoding = codec.negotiate(self.headers.get("Accept-Encoding"), self.encodings) or "identity"
+            data, headers = codec.encode(body, fmt, encoding)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Accept-Post", codec.accept_header(self.formats))
+        self.send_header("Accept-Encoding", codec.accept_encoding_header(self.encodings))
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_sse(self, event: str, data: Dict[str, Any]):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _iter_chunks(self):
+        # http.server does not decode chunked request bodies; do it here, one chunk at a time
+        while True:
+            size_line = self.rfile.readline()
+            if not size_line:
+                return
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass # Trailers
+                return
+            data = self.rfile.read(size)
+            self.rfile.readline()
+            yield data
+
+    def _consume_token_stream(self):
+        buffer = b""
+        for chunk in self._iter_chunks():
+            buffer += chunk
+            while b"\n\n" in buffer:
+                block, buffer = buffer.split(b"\n\n", 1)
+                event, data_lines = "message", []
+                for line in block.decode("utf-8").split("\n"):
+                    if line.startswith(":"):
+                        continue # Comment / keepalive
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data_lines.append(line[5:].lstrip())
+                if data_lines:
+                    try:
+                        self.router.stream_event(event, json.loads("\n".join(data_lines)))
+                    except ValueError:
+                        pass
+        self._send_json(200, {"status": "stream closed"})
+
+    def _relay_token_stream(self, job_id: str):
+        # SSE to the user in the NS-LLM streaming contract shape: meta, token*, done
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        sent, streamed, meta_sent = 0, "", False
+        deadline = time.monotonic() + MAX_LONG_POLL_SECONDS * 10
+        while time.monotonic() < deadline:
+            meta, tokens, done, result = self.router.stream_updates(job_id, sent, MAX_LONG_POLL_SECONDS)
+            if meta and not meta_sent:
+                self._send_sse("meta", {"model": meta.get("model"), "validator": meta.get("validatorId")})
+                meta_sent = True
+            for token in tokens:
+                self._send_sse("token", {"token": token, "idx": sent})
+                streamed += token
+                sent += 1
+            if done:
+                # Fill in anything the stream missed from the committed result
+                if isinstance(result, str) and result.startswith(streamed) and len(result) > len(streamed):
+                    self._send_sse("token", {"token": result[len(streamed):], "idx": sent})
+                    sent += 1
+                self._send_sse("done", {"done": True, "token_count": sent})
+                return
+
+    def do_GET(self):
+        match = _STREAM_RELAY_PATH.match(self.path)
+        if match:
+            return self._relay_token_stream(match.group("job_id"))
+        self._send_json(404, {"error": "Not found"})
+
+    def _reset(self):
+        # Drop the connection without answering, like a crashed or restarting router
+        self.close_connection = True
+        self.connection.close()
+
+    def do_POST(self):
+        match = _STREAM_UPLOAD_PATH.match(self.path)
+        if match:
+            return self._consume_token_stream()
+
+        try:
+            body = self._read_json()
+        except codec.UnsupportedCodecError as e:
+            return self._send_json(415, {"error": f"Unsupported body encoding: {e}"})
+        except ValueError:
+            return self._send_json(400, {"error": "Invalid JSON"})
+
+        fault = None
+        if self.faults and not self.path.endswith("/request/submit"):
+            self.faults.delay()
+            fault = self.faults.decide(completion=self.path.startswith("/api/v1/request/complete"))
+            if fault == "error":
+                return self._send_json(503, {"error": "Injected failure"})
+            if fault == "reset":
+                return self._reset()
+
+        match = _POLL_PATH.match(self.path)
+        if match:
+            validator_id = match.group("validator_id")
+            self.router.last_health[validator_id] = body
+            jobs = self.router.claim(validator_id, body.get("wait_ms", 0) / 1000.0, body.get("max_jobs", 1))
+            if not jobs:
+                return self._send_json(204)
+            if "max_jobs" in body:
+                return self._send_json(200, {"jobs": jobs})
+            return self._send_json(200, jobs[0]) # Legacy single-job clients
+
+        if self.path == "/api/v1/request/complete":
+            if not body.get("jobId"):
+                return self._send_json(400, {"error": "Missing required fields"})
+            self.router.complete(body)
+            if fault == "ack_loss":
+                return self._reset()
+            return self._send_json(200, {"status": "completed", "tx_signature": f"stub-{body['jobId']}"})
+
+        if self.path == "/api/v1/request/complete/batch":
+            completions = body.get("completions") or []
+            if any(not c.get("jobId") for c in completions):
+                return self._send_json(400, {"error": "Missing required fields"})
+            for completion in completions:
+                self.router.complete(completion)
+            if fault == "ack_loss":
+                return self._reset()
+            return self._send_json(200, {"status": "completed", "count": len(completions)})
+
+        if self.path == "/api/v1/request/release":
+            if not body.get("jobId") or not body.get("validatorId"):
+                return self._send_json(400, {"error": "Missing required fields"})
+            target = self.router.release(body["jobId"], body["validatorId"])
+            if target is None:
+                return self._send_json(409, {"error": "Job is unknown or already completed"})
+            return self._send_json(200, {"status": "requeued", "validator": {"id": target}})
+
+        if self.path == "/api/v1/request/submit":
+            validator_id = body.pop("validatorId", None)
+            job = self.router.assign(body, validator_id)
+            if job is None:
+                return self._send_json(202, {"status": "queued", "message": "No validators currently available."})
+            return self._send_json(200, {"status": "assigned", "job_id": job["jobId"], "validator": {"id": job["assignedValidator"]}})
+
+        self._send_json(404, {"error": "Not found"})
+
+
+def serve(router: LocalRouter, host: str = "127.0.0.1", port: int = 3000,
+          faults: Optional[FaultInjector] = None, formats: Optional[List[str]] = None,
+          encodings: Optional[List[str]] = None) -> ThreadingHTTPServer:
+    """
+    Starts the stand-in on a background thread and returns the server
+    (use server.server_address for the bound port when port=0). formats and
+    encodings restrict the body codecs it negotiates (default: all available).
+    """
+    formats = [f for f in (formats if formats is not None else codec.available_formats()) if f in codec.available_formats()]
+    encodings = [e for e in (encodings if encodings is not None else codec.available_encodings()) if e in codec.available_encodings()]
+    if "json" not in formats:
+        formats.append("json")
+    handler = type("RouterHandler", (_Handler,), {"router": router, "faults": faults,
+                                                  "formats": formats, "encodings": encodings})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="router-stub", daemon=True).start()
+    return server
+
+
+def add_simulation_args(parser: argparse.ArgumentParser):
+    """Job generation and fault injection options (shared with load_driver.py)."""
+    parser.add_argument('--arrival', choices=ARRIVAL_PROCESSES, default='uniform', help='Job arrival process')
+    parser.add_argument('--rate', type=float, default=0.5, help='Mean job arrivals per second (0 disables the generator)')
+    parser.add_argument('--burst-size', type=int, default=10, help='Jobs per burst with --arrival bursty')
+    parser.add_argument('--prompt-dist', choices=PROMPT_DISTRIBUTIONS, default='fixed', help='Prompt length distribution')
+    parser.add_argument('--prompt-words', type=int, default=10, help='Mean prompt length in words')
+    parser.add_argument('--model', help='Model requested by generated jobs (default: the router default)')
+    parser.add_argument('--max-tokens', type=int, help='maxTokens requested by generated jobs')
+    parser.add_argument('--embed-share', type=float, default=0.0, help='Share of generated jobs that are embedding jobs')
+    parser.add_argument('--embed-texts', type=int, default=32, help='Texts per generated embedding job')
+    parser.add_argument('--embed-model', default=DEFAULT_EMBED_MODEL, help='Model requested by generated embedding jobs')
+    parser.add_argument('--fee-range', help='LOW,HIGH: draw each job\'s feeAmount uniformly from this range')
+    parser.add_argument('--job-timeout', type=float, default=JOB_TIMEOUT_SECONDS,
+                        help='Seconds after assignment a job times out (its timeoutAt); later completions count as late')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of poll/complete requests answered with HTTP 503')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='Share of poll/complete requests whose connection is dropped')
+    parser.add_argument('--ack-loss-rate', type=float, default=0.0,
+                        help='Share of completion reports recorded but answered with a dropped connection')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added router latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on the added latency')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    parser.add_argument('--replay', help='Replay a recorded job trace (validator_client.py --record-jobs) instead of generating jobs')
+    parser.add_argument('--speed', type=_replay_speed, default=1.0,
+                        help='Replay speed: 1 = recorded pace, N = N times faster, max = every job at once')
+
+
+def _replay_speed(value: str) -> float:
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def build_simulation(router: LocalRouter, args) -> Tuple[Any, Optional[FaultInjector]]:
+    """
+    Creates the job generator (a TraceReplayer with --replay) and, if any
+    fault is enabled, the fault injector from parsed args.
+    """
+    template = {}
+    if args.model:
+        template["model"] = args.model
+    if args.max_tokens:
+        template["maxTokens"] = args.max_tokens
+    fees = [float(f) for f in args.fee_range.split(',')] if args.fee_range else None
+    fee_range = (fees[0], fees[-1]) if fees else None
+    router.job_timeout = args.job_timeout
+    if args.replay:
+        generator = TraceReplayer(router, args.replay, args.speed, template, verbose=getattr(args, 'verbose', False))
+    else:
+        generator = JobGenerator(router, args.rate, args.arrival, args.burst_size,
+                                 PromptSampler(args.prompt_dist, args.prompt_words, seed=args.seed),
+                                 template, seed=args.seed, verbose=getattr(args, 'verbose', False), fee_range=fee_range,
+                                 embed_share=args.embed_share, embed_texts=args.embed_texts, embed_model=args.embed_model)
+    faults = None
+    if any((args.error_rate, args.reset_rate, args.ack_loss_rate, args.latency_ms, args.jitter_ms)):
+        faults = FaultInjector(args.error_rate, args.reset_rate, args.ack_loss_rate, args.latency_ms, args.jitter_ms, seed=args.seed)
+    return generator, faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Router API stand-in for the Validator Client")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--job-interval', type=float,
+                        help='Seconds between generated jobs (shorthand for --arrival uniform --rate 1/interval; 0 disables)')
+    parser.add_argument('--formats', default=','.join(codec.available_formats()),
+                        help='Body formats to accept/offer, comma-separated (json always works)')
+    parser.add_argument('--encodings', default=','.join(codec.available_encodings()),
+                        help='Content codings to accept/offer, comma-separated (empty disables compression)')
+    add_simulation_args(parser)
+    args = parser.parse_args()
+    if args.job_interval is not None:
+        args.arrival = 'uniform'
+        args.rate = 1.0 / args.job_interval if args.job_interval > 0 else 0
+    args.verbose = True
+
+    router = LocalRouter()
+    generator, faults = build_simulation(router, args)
+    server = serve(router, args.host, args.port, faults,
+                   [f for f in args.formats.split(',') if f], [e for e in args.encodings.split(',') if e])
+    print(f"--- Local Router stand-in listening on http://{args.host}:{server.server_address[1]}/api/v1 ---")
+    if args.replay:
+        print(f"Replaying {len(generator.jobs)} jobs from {args.replay} at {'max speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+    else:
+        print(f"Arrivals: {args.arrival} @ {args.rate:g} jobs/s | Prompts: {args.prompt_dist} (~{args.prompt_words} words)")
+    generator.start()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nShutting down Router stand-in...")
+        generator.stop()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
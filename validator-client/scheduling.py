@@ -0,0 +1,286 @@
+# NeuroSwarm Validator Client - Local Job Scheduling
+# Claimed jobs that cannot start yet wait in a local queue; when a slot
+# frees up, the scheduling policy picks which one runs next.
+#
+# Policies:
+#   fifo - arrival order (previous behaviour)
+#   edf  - earliest deadline first
+#   wsjf - fee-weighted shortest job first: highest fee per estimated second
+#          of runtime, except that a job which would miss its deadline if it
+#          waited behind that pick (but can still make it now) goes first
+#
+# Deadlines come from the job (`deadline` / `timeoutAt`, epoch seconds or
+# ISO 8601) or default to the router's job timeout counted from assignment.
+# Runtimes come from a RuntimeEstimator, an online per-model model of
+# inference time fitted to observed runs.
+
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from inference import DEFAULT_MAX_TOKENS, embedding_texts, is_embedding_job
+
+JOB_TIMEOUT_SECONDS = 60.0 # router-timeout-monitor expires jobs processing longer than this
+DEFAULT_SECONDS_PER_TOKEN = 0.05 # Generation time per output token assumed before a model was observed
+DECAY = 0.95 # Weight kept by each past run per new observation (half-life ~14 runs)
+ERROR_ALPHA = 0.1 # Smoothing of the reported prediction error and the output-length share
+MIN_ESTIMATE_SECONDS = 0.01
+# Prior coefficients (overhead, per prompt token, per output token) and their
+# weight in the fit: a hundredth of a typical run (~64 prompt tokens,
+# DEFAULT_MAX_TOKENS output tokens), so measured runs dominate immediately
+PRIOR_COEFFICIENTS = (0.0, 0.0, DEFAULT_SECONDS_PER_TOKEN)
+PRIOR_WEIGHTS = (0.01, 0.01 * 64.0 ** 2, 0.01 * float(DEFAULT_MAX_TOKENS) ** 2)
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds from epoch seconds/milliseconds or an ISO 8601 string."""
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return seconds / 1000.0 if seconds > 1e12 else seconds
+
+
+def job_deadline(job: Dict[str, Any], default_timeout: float = JOB_TIMEOUT_SECONDS) -> float:
+    for field in ("deadline", "timeoutAt", "timeout_at"):
+        deadline = parse_timestamp(job.get(field))
+        if deadline is not None:
+            return deadline
+    return (parse_timestamp(job.get("assignedAt")) or time.time()) + default_timeout
+
+
+def job_max_tokens(job: Dict[str, Any]) -> int:
+    if is_embedding_job(job):
+        return 0 # Encoders generate nothing; their runtime is all input tokens
+    return int(job.get("maxTokens") or job.get("max_tokens") or DEFAULT_MAX_TOKENS)
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solves a small dense linear system by Gaussian elimination with partial pivoting."""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, n + 1):
+                rows[r][c] -= factor * rows[col][c]
+    solution = [0.0] * n
+    for r in reversed(range(n)):
+        solution[r] = (rows[r][n] - sum(rows[r][c] * solution[c] for c in range(r + 1, n))) / rows[r][r]
+    return solution
+
+
+def _whitespace_tokens(model: str, text: str) -> int:
+    return len(text.split())
+
+
+class _ModelFit:
+    """Exponentially decayed least-squares state for one model."""
+
+    def __init__(self):
+        self.gram = [[0.0] * 3 for _ in range(3)] # sum of decay^age * x x^T
+        self.moment = [0.0] * 3 # sum of decay^age * x * seconds
+        self.coefficients = list(PRIOR_COEFFICIENTS)
+        self.fill = 1.0 # Generated tokens / requested max tokens
+        self.error: Optional[float] = None # Decayed mean absolute relative error of predictions
+        self.observations = 0
+
+
+class RuntimeEstimator:
+    """
+    Online per-model runtime model. A job's inference seconds are predicted as
+
+        overhead + prompt_tokens * seconds_per_prompt_token + output_tokens * seconds_per_output_token
+
+    where prompt tokens come from the model's tokenizer (token_counter),
+    output tokens are the requested max tokens times the share the model
+    usually generates, and the three coefficients are refitted after every
+    run by least squares over past runs weighted by decay^age, so the model
+    follows changes in measured throughput (other jobs, thermal throttling).
+    Until a model has been observed, the coefficients are a prior of
+    DEFAULT_SECONDS_PER_TOKEN per generated token.
+
+    Args:
+        token_counter: (model, text) -> token count; whitespace words by default
+        decay: Weight kept by each past run per new observation
+    """
+
+    def __init__(self, token_counter: Optional[Callable[[str, str], int]] = None, decay: float = DECAY):
+        self.token_counter = token_counter or _whitespace_tokens
+        self.decay = decay
+        self._lock = threading.Lock()
+        self._fits: Dict[str, _ModelFit] = {}
+
+    def estimate(self, job: Dict[str, Any]) -> float:
+        prompt_tokens = self._prompt_tokens(job)
+        with self._lock:
+            fit = self._fits.get(job.get("model", "")) or _ModelFit()
+            return self._predict(fit, prompt_tokens, fit.fill * job_max_tokens(job))
+
+    def observe(self, job: Dict[str, Any], seconds: float, output_tokens: Optional[int] = None):
+        """Records a finished run: its wall seconds and, if known, the tokens it generated."""
+        prompt_tokens = self._prompt_tokens(job)
+        max_tokens = job_max_tokens(job)
+        if output_tokens is None:
+            output_tokens = max_tokens
+        model = job.get("model", "")
+        with self._lock:
+            fit = self._fits.setdefault(model, _ModelFit())
+            if fit.observations: # The first prediction is only the prior; don't score it
+                predicted = self._predict(fit, prompt_tokens, fit.fill * max_tokens)
+                error = abs(predicted - seconds) / max(seconds, 1e-3)
+                fit.error = error if fit.error is None else fit.error + ERROR_ALPHA * (error - fit.error)
+            fit.fill += ERROR_ALPHA * (min(1.0, output_tokens / max(1, max_tokens)) - fit.fill)
+
+            x = (1.0, float(prompt_tokens), float(output_tokens))
+            for i in range(3):
+                fit.moment[i] = self.decay * fit.moment[i] + x[i] * seconds
+                for j in range(3):
+                    fit.gram[i][j] = self.decay * fit.gram[i][j] + x[i] * x[j]
+            fit.observations += 1
+            # Ridge towards the prior keeps the fit defined while runs look alike (e.g. equal max tokens)
+            matrix = [[fit.gram[i][j] + (PRIOR_WEIGHTS[i] if i == j else 0.0) for j in range(3)] for i in range(3)]
+            vector = [fit.moment[i] + PRIOR_WEIGHTS[i] * PRIOR_COEFFICIENTS[i] for i in range(3)]
+            fit.coefficients = _solve(matrix, vector)
+
+    def error(self, model: str) -> Optional[float]:
+        """Decayed mean absolute relative error of this model's predictions (None before its first run)."""
+        with self._lock:
+            fit = self._fits.get(model)
+            return fit.error if fit else None
+
+    def tokens_per_second(self, model: str) -> Optional[float]:
+        """Fitted generation throughput of a model (None before its first run)."""
+        with self._lock:
+            fit = self._fits.get(model)
+        if fit is None or fit.coefficients[2] <= 0:
+            return None
+        return 1.0 / fit.coefficients[2]
+
+    def _prompt_tokens(self, job: Dict[str, Any]) -> int:
+        if is_embedding_job(job):
+            # One count (and one cache entry) for all of the job's texts
+            return self.token_counter(job.get("model", ""), "\n".join(embedding_texts(job)))
+        return self.token_counter(job.get("model", ""), str(job.get("prompt", "")))
+
+    @staticmethod
+    def _predict(fit: _ModelFit, prompt_tokens: float, output_tokens: float) -> float:
+        overhead, per_prompt_token, per_output_token = fit.coefficients
+        return max(MIN_ESTIMATE_SECONDS, overhead + per_prompt_token * prompt_tokens + per_output_token * output_tokens)
+
+
+class QueuedJob:
+    __slots__ = ("job", "context", "deadline", "estimate", "fee", "seq", "enqueued_at")
+
+    def __init__(self, job: Dict[str, Any], context: Tuple, deadline: float, estimate: float, seq: int):
+        self.job = job
+        self.context = context # Caller data handed back with the job (e.g. poll timestamps)
+        self.deadline = deadline
+        self.estimate = estimate
+        self.fee = float(job.get("feeAmount") or 0.0)
+        self.seq = seq
+        self.enqueued_at = time.time()
+
+
+class FifoPolicy:
+    name = "fifo"
+
+    def pick(self, entries: List[QueuedJob], now: float) -> QueuedJob:
+        return min(entries, key=lambda e: e.seq)
+
+
+class EdfPolicy:
+    name = "edf"
+
+    def pick(self, entries: List[QueuedJob], now: float) -> QueuedJob:
+        return min(entries, key=lambda e: (e.deadline, e.seq))
+
+
+class WsjfPolicy:
+    name = "wsjf"
+
+    def pick(self, entries: List[QueuedJob], now: float) -> QueuedJob:
+        best = min(entries, key=lambda e: (-e.fee / max(e.estimate, 1e-3), e.seq))
+        # Jobs that can still finish in time now, but not after waiting for `best`
+        urgent = [e for e in entries
+                  if e is not best and 0 <= e.deadline - now - e.estimate < best.estimate]
+        if urgent:
+            return min(urgent, key=lambda e: (e.deadline, e.seq))
+        return best
+
+
+POLICIES = {cls.name: cls for cls in (FifoPolicy, EdfPolicy, WsjfPolicy)}
+
+
+class JobScheduler:
+    """
+    Thread-safe queue of claimed jobs ordered by a scheduling policy.
+
+    Args:
+        policy: One of POLICIES
+        estimator: Runtime estimates for the wsjf policy (and queue stats)
+        default_timeout: Deadline after assignment for jobs that carry none
+    """
+
+    def __init__(self, policy: str = "fifo", estimator: Optional[RuntimeEstimator] = None,
+                 default_timeout: float = JOB_TIMEOUT_SECONDS):
+        self.policy = POLICIES[policy]()
+        self.estimator = estimator or RuntimeEstimator()
+        self.default_timeout = default_timeout
+        self._cond = threading.Condition()
+        self._entries: List[QueuedJob] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def put(self, job: Dict[str, Any], *context):
+        self.add(self.prepare(job, *context))
+
+    def prepare(self, job: Dict[str, Any], *context) -> QueuedJob:
+        """
+        Builds the queue entry for a job: its deadline and runtime estimate
+        (which may tokenize the prompt). Callers that queue under their own
+        lock prepare first and add() under the lock.
+        """
+        return QueuedJob(job, context, job_deadline(job, self.default_timeout), self.estimator.estimate(job), next(self._seq))
+
+    def add(self, entry: QueuedJob):
+        with self._cond:
+            self._entries.append(entry)
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> bool:
+        """Blocks until the queue is non-empty or the timeout expires."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._entries, timeout=timeout)
+
+    def pop(self) -> Optional[QueuedJob]:
+        """Removes and returns the job the policy wants to run next (None when empty)."""
+        with self._cond:
+            if not self._entries:
+                return None
+            entry = self.policy.pick(self._entries, time.time())
+            self._entries.remove(entry)
+            return entry
+
+    def queued_seconds(self) -> float:
+        """Estimated inference seconds of every queued job."""
+        with self._cond:
+            return sum(e.estimate for e in self._entries)
+
+    def drain(self) -> List[QueuedJob]:
+        """Removes and returns every queued job, in arrival order."""
+        with self._cond:
+            entries, self._entries = sorted(self._entries, key=lambda e: e.seq), []
+            return entries
@@ -0,0 +1,36 @@
+# Rewrites exported models in shared-weights form (model_shared.onnx plus a
+# page-aligned model_shared.onnx.data) so that the inference worker
+# processes started with `validator_client.py --workers N` memory-map a
+# single copy of each model's weights. Requires the `onnx` package.
+#
+# Usage:
+#   python share_weights.py --models-dir ../NS-LLM/models            # every model
+#   python share_weights.py --models-dir ../NS-LLM/models gpt2 phi-2
+
+import argparse
+import os
+
+from inference import DEFAULT_MODELS_DIR, SHARED_WEIGHTS_ALIGNMENT, export_shared_weights, find_model_dir
+from worker_pool import models_without_shared_weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export models with memory-mappable, page-aligned external weights")
+    parser.add_argument('models', nargs='*', help='Models to convert (default: every model not converted yet)')
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR)
+    parser.add_argument('--alignment', type=int, default=SHARED_WEIGHTS_ALIGNMENT, help='Byte alignment of each weight tensor')
+    args = parser.parse_args()
+
+    for model in args.models or models_without_shared_weights(args.models_dir):
+        model_dir = find_model_dir(args.models_dir, model)
+        if model_dir is None:
+            print(f"{model}: not found under {args.models_dir}")
+            continue
+        path = export_shared_weights(model_dir, alignment=args.alignment)
+        data_path = path + ".data"
+        data_mb = os.path.getsize(data_path) / (1024 * 1024) if os.path.exists(data_path) else 0
+        print(f"{model}: wrote {path} ({data_mb:.0f} MB shared weights)")
+
+
+if __name__ == "__main__":
+    main()
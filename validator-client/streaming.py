@@ -0,0 +1,135 @@
+# NeuroSwarm Validator Client - Streamed Token Delivery
+# Forwards generated tokens to the Router while inference is still running,
+# so users see the first token long before the last one is generated.
+#
+# One persistent, chunked HTTP upload per validator
+# (POST {router}/validator/stream/{validatorId}) carries Server-Sent Events
+# for all of this validator's jobs, in the same shape as the NS-LLM
+# streaming contract (NS-LLM/samples/ns_llm_streaming_contract.js), with a
+# jobId added to every event:
+#
+#   event: meta   data: {"jobId", "validatorId", "model"}
+#   event: token  data: {"jobId", "token", "idx"}
+#   event: done   data: {"jobId", "done": true, "token_count"}
+#
+# Streaming is best-effort: events queued while the stream is reconnecting
+# may be lost. The completion report (outbox) remains the authoritative,
+# durable commit that carries the full result and triggers the fee split.
+
+import json
+import queue
+import random
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional
+
+import requests
+
+from transport import CONNECT_TIMEOUT_SECONDS
+
+HEARTBEAT_SECONDS = 15.0 # SSE comment sent on an idle stream so proxies keep it open
+MAX_BUFFERED_EVENTS = 10000
+BASE_RECONNECT_SECONDS = 0.5
+MAX_RECONNECT_SECONDS = 30.0
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> bytes:
+    """One SSE event: `event:` line, one `data:` line per JSON line, blank line."""
+    lines = [f"event: {event}"] + [f"data: {line}" for line in json.dumps(data).split("\n")]
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class JobStream:
+    """
+    Per-job handle. Call it with each new piece of generated text (it is the
+    on_token callback handed to the inference backends), then done().
+    """
+
+    def __init__(self, stream: "TokenStream", job_id: str):
+        self._stream = stream
+        self.job_id = job_id
+        self.idx = 0
+
+    def __call__(self, token: str):
+        self._stream.send("token", {"jobId": self.job_id, "token": token, "idx": self.idx})
+        self.idx += 1
+
+    def done(self):
+        self._stream.send("done", {"jobId": self.job_id, "done": True, "token_count": self.idx})
+
+
+class TokenStream:
+    """
+    Args:
+        url: Stream endpoint, e.g. http://localhost:3000/api/v1/validator/stream/Brock-Node-A
+        validator_id: Included in every job's meta event
+    """
+
+    def __init__(self, url: str, validator_id: str, heartbeat_seconds: float = HEARTBEAT_SECONDS):
+        self.url = url
+        self.validator_id = validator_id
+        self.heartbeat_seconds = heartbeat_seconds
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=MAX_BUFFERED_EVENTS)
+        self._session = requests.Session()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="token-stream", daemon=True)
+        self.dropped = 0
+
+    def start(self):
+        self._thread.start()
+
+    def open_job(self, job_id: str, model: str = "") -> JobStream:
+        self.send("meta", {"jobId": job_id, "validatorId": self.validator_id, "model": model})
+        return JobStream(self, job_id)
+
+    def send(self, event: str, data: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(format_sse(event, data))
+        except queue.Full:
+            self.dropped += 1 # Never block inference on a slow or absent stream
+
+    def close(self, timeout: float = 5.0):
+        """Ends the upload once queued events have been written."""
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._session.close()
+
+    def _events(self) -> Iterator[bytes]:
+        yield b": stream open\n\n"
+        while True:
+            try:
+                chunk = self._queue.get(timeout=self.heartbeat_seconds)
+            except queue.Empty:
+                yield b": keepalive\n\n"
+                continue
+            if chunk is None:
+                return
+            yield chunk
+
+    def _run(self):
+        attempt = 0
+        while not self._stopping.is_set():
+            opened = time.monotonic()
+            try:
+                # A generator body is sent with chunked transfer encoding, one chunk per event;
+                # the router only answers once the upload ends (on close)
+                response = self._session.post(self.url, data=self._events(),
+                                              headers={"Content-Type": "text/event-stream"},
+                                              timeout=(CONNECT_TIMEOUT_SECONDS, None))
+                response.raise_for_status()
+                error = None
+            except requests.exceptions.RequestException as e:
+                error = e
+            if self._stopping.is_set():
+                return
+            if time.monotonic() - opened > MAX_RECONNECT_SECONDS:
+                attempt = 0 # The stream was up for a while; start the backoff over
+            if error is not None and attempt == 0:
+                print(f"   [STREAM] Token stream interrupted: {error}. Reconnecting.")
+            attempt += 1
+            delay = random.uniform(0, min(MAX_RECONNECT_SECONDS, BASE_RECONNECT_SECONDS * 2 ** attempt))
+            self._stopping.wait(delay)
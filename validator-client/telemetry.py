@@ -0,0 +1,158 @@
+# NeuroSwarm Validator Client - Host Telemetry
+# A background sampler reads real host health from /proc and
+# /sys/class/thermal every few seconds: CPU utilization, load average,
+# available memory, this process's RSS and thermal zone temperatures.
+# Samples go into a fixed-size ring buffer; the poll path only averages the
+# most recent ones (a short lock, never a file read), so attaching telemetry
+# to a poll costs nothing measurable.
+#
+# Readings that the host does not provide (no thermal zones in a container,
+# no /proc outside Linux) are simply left out of the samples.
+
+import glob
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL_SECONDS = 2.0
+DEFAULT_HISTORY = 60 # Samples kept in the ring buffer (two minutes at the default interval)
+DEFAULT_WINDOW = 5 # Most recent samples averaged into each reported value
+
+THERMAL_ZONES = "/sys/class/thermal/thermal_zone*"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cpu_times() -> Optional[Tuple[int, int]]:
+    """(busy, total) jiffies of all CPUs from /proc/stat."""
+    text = _read("/proc/stat")
+    if not text:
+        return None
+    fields = [int(v) for v in text.split("\n", 1)[0].split()[1:]]
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0) # idle + iowait
+    # guest time is already counted in user time
+    total = sum(fields[:8])
+    return total - idle, total
+
+
+def _meminfo() -> Dict[str, int]:
+    """MemTotal / MemAvailable in kB."""
+    values = {}
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        name, _, rest = line.partition(":")
+        if name in ("MemTotal", "MemAvailable"):
+            values[name] = int(rest.split()[0])
+    return values
+
+
+def _rss_kb() -> Optional[int]:
+    for line in (_read("/proc/self/status") or "").splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return None
+
+
+def _thermal_zones() -> List[Tuple[str, str]]:
+    """(zone type, temp file) for every readable thermal zone."""
+    zones = []
+    for zone in sorted(glob.glob(THERMAL_ZONES)):
+        kind = (_read(os.path.join(zone, "type")) or os.path.basename(zone)).strip()
+        if _read(os.path.join(zone, "temp")) is not None:
+            zones.append((kind, os.path.join(zone, "temp")))
+    return zones
+
+
+class HostTelemetry:
+    """
+    Args:
+        interval: Seconds between samples
+        history: Samples kept in the ring buffer
+        window: Most recent samples averaged by smoothed()
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS, history: int = DEFAULT_HISTORY,
+                 window: int = DEFAULT_WINDOW):
+        self.interval = interval
+        self.window = window
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._zones = _thermal_zones() # Zones don't come and go at runtime; find them once
+        self._previous_cpu = _cpu_times()
+
+    def start(self):
+        self.sample() # Memory and temperature are available right away; CPU after one interval
+        self._thread = threading.Thread(target=self._run, name="host-telemetry", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def sample(self) -> Dict[str, float]:
+        """Reads the host once and appends the sample to the ring buffer."""
+        sample: Dict[str, float] = {"time": time.time()}
+        cpu = _cpu_times()
+        if cpu and self._previous_cpu and cpu[1] > self._previous_cpu[1]:
+            busy, total = cpu[0] - self._previous_cpu[0], cpu[1] - self._previous_cpu[1]
+            sample["cpu_util"] = busy / total
+        self._previous_cpu = cpu
+        try:
+            sample["load_avg_1m"] = os.getloadavg()[0]
+        except (OSError, AttributeError):
+            pass
+        memory = _meminfo()
+        if "MemAvailable" in memory:
+            sample["mem_available_mb"] = memory["MemAvailable"] / 1024
+            sample["mem_available_ratio"] = memory["MemAvailable"] / max(1, memory["MemTotal"])
+        rss = _rss_kb()
+        if rss is not None:
+            sample["rss_mb"] = rss / 1024
+        temps = [] # (zone type, degrees); several zones can share a type
+        for kind, path in self._zones:
+            text = _read(path)
+            if text and text.strip().lstrip("-").isdigit():
+                temps.append((kind, int(text) / 1000)) # millidegrees Celsius
+        if temps:
+            sample["temp_c"] = max(t for _, t in temps)
+            gpu = [t for kind, t in temps if "gpu" in kind.lower()]
+            if gpu:
+                sample["gpu_temp_c"] = max(gpu)
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def smoothed(self) -> Dict[str, Any]:
+        """
+        Each reading averaged over the last `window` samples that have it,
+        rounded for the wire. Empty before the first sample.
+        """
+        with self._lock:
+            recent = list(self._samples)[-self.window:]
+        values: Dict[str, Any] = {}
+        for name in ("cpu_util", "load_avg_1m", "mem_available_mb", "mem_available_ratio", "rss_mb", "temp_c", "gpu_temp_c"):
+            readings = [s[name] for s in recent if name in s]
+            if readings:
+                values[name] = round(sum(readings) / len(readings), 3)
+        return values
+
+    def history(self) -> List[Dict[str, float]]:
+        with self._lock:
+            return list(self._samples)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e: # Never let a bad reading kill the sampler
+                print(f"   [TELEMETRY] Sample failed: {e}")
@@ -0,0 +1,8 @@
+# NeuroSwarm Validator Client - Test Setup
+# The client's modules live flat in validator-client/; make them importable
+# when pytest runs from there or from this directory.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
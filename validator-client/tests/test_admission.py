@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AIMDLimit, ConcurrencyLimit, GradientLimit, SlotBudget, make_limit
+
+
+@pytest.fixture(autouse=True)
+def idle_host(monkeypatch):
+    monkeypatch.setattr(admission, "host_load_ratio", lambda: 0.0)
+
+
+def test_fixed_limit_ignores_samples():
+    limit = make_limit("fixed", 8)
+    assert type(limit) is ConcurrencyLimit
+    for _ in range(50):
+        limit.on_sample(10.0, 8)
+    assert limit.limit == 8
+
+
+def test_aimd_grows_while_fast_and_in_use():
+    limit = AIMDLimit(10)
+    assert limit.limit == 5
+    for _ in range(100):
+        limit.on_sample(0.05, limit.limit)
+    assert limit.limit == 10 # Capped at max_limit
+
+
+def test_aimd_does_not_grow_an_unused_limit():
+    limit = AIMDLimit(10)
+    for _ in range(100):
+        limit.on_sample(0.05, 1)
+    assert limit.limit == 5
+
+
+def test_aimd_backs_off_on_slow_samples():
+    limit = AIMDLimit(10, initial_limit=8)
+    limit.on_sample(0.05, 8)
+    limit.on_sample(0.5, 8)
+    assert limit.limit == 7 # 8 x 0.9
+    for _ in range(50):
+        limit.on_sample(0.5, 8)
+    assert limit.limit == 1 # Never below min_limit
+
+
+def test_gradient_grows_at_steady_latency_and_shrinks_when_it_climbs():
+    limit = GradientLimit(20, initial_limit=4)
+    for _ in range(50):
+        limit.on_sample(0.05, limit.limit)
+    grown = limit.limit
+    assert grown > 4
+    for _ in range(50):
+        limit.on_sample(0.5, limit.limit)
+    assert limit.limit < grown
+
+
+def test_overloaded_host_caps_growth(monkeypatch):
+    monkeypatch.setattr(admission, "host_load_ratio", lambda: admission.HOST_LOAD_CEILING + 1)
+    limit = AIMDLimit(10, initial_limit=8)
+    limit.on_sample(0.05, 8)
+    assert limit.limit == 7 # 8 x 0.9 although the sample was fast
+
+
+def test_slot_budget_caps_holders():
+    budget = SlotBudget(2)
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.free == 0
+    assert not budget.acquire(timeout=0.01)
+    budget.release()
+    assert budget.free == 1 and budget.acquire(timeout=0.01)
+
+
+@pytest.mark.parametrize("wait", ["acquire", "wait_free"])
+def test_slot_budget_wakes_waiters_on_release(wait):
+    budget = SlotBudget(1)
+    budget.try_acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(getattr(budget, wait)(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    assert results == []
+    budget.release()
+    waiter.join(5)
+    assert results == [True]
+    assert budget.free == (0 if wait == "acquire" else 1)
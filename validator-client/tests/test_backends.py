@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+import inference
+from inference import BackendRegistry, ModelNotFoundError
+
+MB = 1024 * 1024
+
+
+class _Backend:
+    """Stands in for a loaded ONNX session."""
+
+    def __init__(self, model_dir, session_options=None, prefix_cache_bytes=0):
+        self.model_name = os.path.basename(model_dir)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "OnnxGenerativeBackend", _Backend)
+    for name, megabytes in (("small", 1), ("medium", 2), ("large", 3)):
+        model_dir = tmp_path / name
+        model_dir.mkdir()
+        (model_dir / "model.onnx").write_bytes(b"\0" * 1024)
+        (model_dir / "model.onnx_data").write_bytes(b"\0" * (megabytes * MB - 1024))
+        (model_dir / "metadata.json").write_text(json.dumps({"hf_id": f"org/{name}"}))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def make_registry(models_dir):
+    registries = []
+
+    def make(**kwargs):
+        registry = BackendRegistry(models_dir, **kwargs)
+        registries.append(registry)
+        return registry
+
+    yield make
+    for registry in registries:
+        registry.close()
+
+
+def test_resolves_models_by_directory_or_hf_id(make_registry):
+    registry = make_registry()
+    assert registry.get("small") is registry.get("org/small")
+    with pytest.raises(ModelNotFoundError):
+        registry.get("missing")
+    assert make_registry(default_model="small").get("missing").model_name == "small"
+
+
+def test_footprint_counts_external_weight_files(models_dir):
+    assert inference.estimate_footprint(os.path.join(models_dir, "medium")) == 2 * MB
+
+
+def test_evicts_least_recently_used_idle_model_over_budget(make_registry):
+    registry = make_registry(memory_budget_bytes=4 * MB)
+    small, medium = registry.get("small"), registry.get("medium")
+    with registry.lease("small"):
+        pass # small is now the most recently used
+    registry.get("large")
+    assert sorted(registry.resident_models()) == ["large", "small"]
+    assert medium.closed and not small.closed
+    assert registry.resident_bytes() == 4 * MB
+
+
+def test_leased_models_are_never_evicted(make_registry):
+    registry = make_registry(memory_budget_bytes=4 * MB)
+    with registry.lease("small") as small, registry.lease("medium") as medium:
+        registry.get("large") # Over budget, but nothing idle can go
+        assert sorted(registry.resident_models()) == ["large", "medium", "small"]
+        assert not small.closed and not medium.closed
+    # Leases ended: idle models are evicted, oldest first, back under the budget
+    assert registry.resident_bytes() <= 4 * MB
+    assert "large" in registry.resident_models()
+
+
+def test_without_a_budget_every_model_stays_resident(make_registry):
+    registry = make_registry()
+    for model in ("small", "medium", "large"):
+        registry.get(model)
+    assert registry.resident_bytes() == 6 * MB
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batching import MicroBatcher
+
+
+class _Model:
+    """run_batch stand-in that records each batch and echoes its prompts."""
+
+    def __init__(self, results=None):
+        self.batches = []
+        self.results = results
+
+    def __call__(self, model, prompts, max_tokens, on_token):
+        self.batches.append((model, list(prompts)))
+        for callback, prompt in zip(on_token, prompts):
+            if callback:
+                callback(f"{prompt}:token")
+        if self.results:
+            return self.results(prompts)
+        return [f"{model}:{prompt}:{tokens}" for prompt, tokens in zip(prompts, max_tokens)]
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(run_batch, **kwargs):
+        batcher = MicroBatcher(run_batch, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+
+def _submit_all(batcher, requests):
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        futures = [pool.submit(batcher.submit, *request) for request in requests]
+        return [future.result(timeout=5) for future in futures]
+
+
+def test_concurrent_prompts_share_one_batch_and_get_their_own_results(make_batcher):
+    model = _Model()
+    batcher = make_batcher(model, max_batch_size=4, max_wait_ms=200)
+    results = _submit_all(batcher, [("m", f"p{i}", i) for i in range(4)])
+    assert results == [f"m:p{i}:{i}" for i in range(4)]
+    assert len(model.batches) == 1 and sorted(model.batches[0][1]) == ["p0", "p1", "p2", "p3"]
+    assert batcher.stats == {"batches": 1, "requests": 4}
+
+
+def test_batches_never_mix_models_or_exceed_the_size_limit(make_batcher):
+    model = _Model()
+    batcher = make_batcher(model, max_batch_size=2, max_wait_ms=50)
+    requests = [("a", "a1", 1), ("a", "a2", 1), ("a", "a3", 1), ("b", "b1", 1)]
+    assert _submit_all(batcher, requests) == ["a:a1:1", "a:a2:1", "a:a3:1", "b:b1:1"]
+    for name, prompts in model.batches:
+        assert len(prompts) <= 2 and all(prompt.startswith(name) for prompt in prompts)
+
+
+def test_streams_tokens_to_each_submitter(make_batcher):
+    batcher = make_batcher(_Model(), max_wait_ms=0)
+    tokens = []
+    assert batcher.submit("m", "p", 1, tokens.append) == "m:p:1"
+    assert tokens == ["p:token"]
+
+
+def test_a_failing_batch_fails_every_request_in_it(make_batcher):
+    def broken(model, prompts, max_tokens, on_token):
+        raise ValueError("out of memory")
+
+    batcher = make_batcher(broken, max_batch_size=3, max_wait_ms=200)
+    with pytest.raises(ValueError, match="out of memory"):
+        _submit_all(batcher, [("m", f"p{i}", 1) for i in range(3)])
+
+
+def test_a_wrong_number_of_results_fails_every_request(make_batcher):
+    batcher = make_batcher(_Model(results=lambda prompts: prompts[:-1]), max_batch_size=3, max_wait_ms=200)
+    errors = []
+    barrier = threading.Barrier(3)
+
+    def submit(prompt):
+        barrier.wait()
+        try:
+            batcher.submit("m", prompt, 1)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=submit, args=(f"p{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 3 and "2 results for 3 prompts" in errors[0]
@@ -0,0 +1,57 @@
+import struct
+
+import pytest
+
+import codec
+
+
+def test_negotiate_prefers_our_order_among_accepted():
+    assert codec.negotiate("gzip, zstd;q=0.5", ["zstd", "gzip"]) == "zstd"
+    assert codec.negotiate("gzip, zstd;q=0", ["zstd", "gzip"]) == "gzip"
+    assert codec.negotiate("br", ["zstd", "gzip"]) is None
+    assert codec.negotiate(None, ["zstd", "gzip"]) is None
+    assert codec.negotiate("*", ["zstd", "gzip"]) == "zstd"
+
+
+def test_negotiate_maps_media_types_to_formats():
+    header = codec.accept_header(["msgpack", "json"])
+    assert codec.negotiate(header, ["cbor", "msgpack", "json"]) == "msgpack"
+    assert codec.negotiate("application/json", ["msgpack", "json"]) == "json"
+    assert codec.negotiate("*/*", ["msgpack", "json"]) == "msgpack"
+
+
+def test_accept_header_lists_formats_by_descending_quality():
+    assert codec.accept_header(["msgpack", "json"]) == \
+        f"{codec.MEDIA_TYPES['msgpack']}, {codec.MEDIA_TYPES['json']};q=0.9"
+
+
+@pytest.mark.parametrize("fmt", codec.available_formats())
+@pytest.mark.parametrize("encoding", ["identity"] + codec.available_encodings())
+def test_encode_decode_round_trip(fmt, encoding):
+    payload = {"jobId": "job-1", "result": "x" * 4096, "tokens": [1, 2, 3]}
+    body, headers = codec.encode(payload, fmt, encoding)
+    if encoding != "identity":
+        assert headers["Content-Encoding"] == encoding
+        assert len(body) < 4096
+    assert codec.decode(body, headers["Content-Type"], headers.get("Content-Encoding")) == payload
+
+
+def test_small_bodies_are_sent_uncompressed():
+    body, headers = codec.encode({"jobId": "job-1"}, "json", "gzip")
+    assert "Content-Encoding" not in headers
+    assert codec.decode(body, headers["Content-Type"], None) == {"jobId": "job-1"}
+
+
+def test_decompress_passes_through_bodies_the_client_already_decoded():
+    assert codec.decompress(b'{"a":1}', "gzip") == b'{"a":1}'
+    with pytest.raises(codec.UnsupportedCodecError):
+        codec.decompress(b"data", "br")
+
+
+def test_embedding_round_trip():
+    vectors = [[0.5, -1.0, 2.0], [0.0, 0.25, 3.5]]
+    data = struct.pack("<6f", *(value for row in vectors for value in row))
+    payload = codec.encode_embeddings(data, 2, 3)
+    assert codec.decode_embeddings(payload) == vectors
+    with pytest.raises(ValueError):
+        codec.encode_embeddings(data, 3, 3)
@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+import validator_client as vc
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class _Router:
+    """Answers completion reports from canned status codes and records each call."""
+
+    def __init__(self, batch=200, single=None):
+        self.batch = batch
+        self.single = single or {}
+        self.calls = []
+
+    def post(self, kind, path, body):
+        if path.endswith("/batch"):
+            self.calls.append(("batch", [payload["jobId"] for payload in body["completions"]]))
+            return _Response(self.batch)
+        self.calls.append(("single", body["jobId"]))
+        return _Response(self.single.get(body["jobId"], 200))
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(vc, "USE_MOCK_ROUTER", False)
+    monkeypatch.setattr(vc, "_batch_endpoint_supported", True)
+    router = _Router()
+    monkeypatch.setattr(vc, "get_transport", lambda: router)
+    return router
+
+
+def _deliver(*job_ids):
+    validator = vc.ValidatorIdentity("test-validator", "unused.wal")
+    return validator.deliver_completions([{"jobId": job_id, "feeAmount": 1.0} for job_id in job_ids])
+
+
+def test_batch_endpoint_settles_every_entry(router):
+    assert _deliver("a", "b") == {"a": "delivered", "b": "delivered"}
+    assert router.calls == [("batch", ["a", "b"])]
+
+
+def test_missing_batch_endpoint_falls_back_for_good(router):
+    router.batch = 404
+    assert _deliver("a", "b") == {"a": "delivered", "b": "delivered"}
+    assert router.calls == [("batch", ["a", "b"]), ("single", "a"), ("single", "b")]
+    assert vc._batch_endpoint_supported is False
+    router.calls.clear()
+    _deliver("c", "d")
+    assert router.calls == [("single", "c"), ("single", "d")]
+
+
+def test_refused_batch_is_reported_entry_by_entry(router):
+    router.batch = 422
+    router.single = {"b": 409}
+    assert _deliver("a", "b", "c") == {"a": "delivered", "b": "rejected", "c": "delivered"}
+    assert vc._batch_endpoint_supported is True
+
+
+@pytest.mark.parametrize("status", [401, 403, 408, 429, 503])
+def test_transient_refusals_stay_pending(router, status):
+    router.batch = 404
+    router.single = {"b": status}
+    # "a" is settled; "b" and everything after it is left for the outbox to retry
+    assert _deliver("a", "b", "c") == {"a": "delivered"}
+
+
+def test_batch_server_errors_retry_the_whole_batch(router):
+    router.batch = 503
+    with pytest.raises(requests.HTTPError):
+        _deliver("a", "b")
+    assert router.calls == [("batch", ["a", "b"])]
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+import validator_client as vc
+
+
+def _job(job_id):
+    return {"jobId": job_id, "model": "", "prompt": "hello", "feeAmount": 1.0, "userWallet": "wallet"}
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    """An inline-mode identity whose hand-backs are recorded instead of sent."""
+    monkeypatch.setattr(vc, "_draining", vc.threading.Event())
+    monkeypatch.setattr(vc, "_slots", None)
+    validator = vc.ValidatorIdentity("test-validator", str(tmp_path / "outbox.wal"))
+    validator.handed_back = []
+    monkeypatch.setattr(validator, "hand_back_job", lambda job, reason: validator.handed_back.append(job["jobId"]))
+    monkeypatch.setattr(vc, "_validators", [validator])
+    yield validator
+    if validator.outbox:
+        validator.outbox.close(timeout=1)
+
+
+def test_drain_hands_back_jobs_that_never_started(validator):
+    for job_id in ("a", "b"):
+        validator._accept(_job(job_id), time.time(), time.time())
+    vc._draining.set()
+    assert vc.drain_in_flight([validator], timeout=5) == 2
+    assert validator.handed_back == ["a", "b"]
+    assert validator.unfinished() == 0 and len(validator.scheduler) == 0
+
+
+def test_drain_lets_inline_jobs_finish(validator, monkeypatch):
+    monkeypatch.setattr(vc, "run_inference", lambda job, validator: "done")
+    for job_id in ("a", "b"):
+        validator._accept(_job(job_id), time.time(), time.time())
+    validator.run_queued()
+    assert vc.drain_in_flight([validator], timeout=5) == 0
+    assert validator.handed_back == [] and validator.load == 0
+    assert validator.outbox.close(timeout=5) == 0 # Both completions were delivered
+    assert vc.get_slot_budget().free == vc.MAX_CAPACITY
+
+
+def test_interrupted_inline_job_is_handed_back_without_waiting(validator, monkeypatch):
+    def interrupted(job, validator):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(vc, "run_inference", interrupted)
+    for job_id in ("a", "b"):
+        validator._accept(_job(job_id), time.time(), time.time())
+    with pytest.raises(KeyboardInterrupt):
+        validator.run_queued()
+    # The interrupted job went back at once; the drain only hands back the queued one
+    assert validator.handed_back == ["a"]
+    assert validator.unfinished() == 0 and validator.load == 0
+
+    vc._draining.set()
+    start = time.monotonic()
+    assert vc.drain_in_flight([validator], timeout=15) == 1
+    assert time.monotonic() - start < 1
+    assert validator.handed_back == ["a", "b"]
+    assert vc.get_slot_budget().free == vc.MAX_CAPACITY
+
+
+def test_deadline_is_the_one_assigned_when_queued(validator, monkeypatch):
+    # No assignedAt: the deadline counts from when the job was queued, not from when it finished
+    monkeypatch.setattr(vc, "run_inference", lambda job, validator: time.sleep(0.05) or "done")
+    validator.scheduler.default_timeout = 0.01
+    before = vc.JOBS_PAST_DEADLINE.value()
+    validator._accept(_job("late"), time.time(), time.time())
+    validator.run_queued()
+    assert vc.JOBS_PAST_DEADLINE.value() == before + 1
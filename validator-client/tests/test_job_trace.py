@@ -0,0 +1,90 @@
+import gzip
+import json
+import time
+
+import pytest
+
+import job_trace
+from job_trace import JobTraceRecorder, read_job_trace
+from router_stub import LocalRouter, TraceReplayer
+
+
+def _claimed(index, **fields):
+    job = {"jobId": f"job-{index}", "userWallet": "wallet", "assignedValidator": "v1",
+           "prompt": f"prompt {index}", "model": "m", "maxTokens": 32, "feeAmount": 0.5}
+    job.update(fields)
+    return job
+
+
+def test_records_workload_fields_and_arrival_offsets(tmp_path):
+    path = str(tmp_path / "jobs.trace")
+    recorder = JobTraceRecorder(path)
+    now = recorder.started_at
+    recorder.record(_claimed(1, assignedAt=(now + 2.0) * 1000)) # epoch milliseconds
+    recorder.record(_claimed(2, assignedAt=now + 1.0))
+    recorder.record(_claimed(3, texts=["a", "b"], type="embedding"))
+    recorder.close()
+    assert recorder.recorded == 3
+
+    header, jobs = read_job_trace(path)
+    assert header["format"] == job_trace.TRACE_FORMAT
+    assert [job["prompt"] for job in jobs] == ["prompt 3", "prompt 2", "prompt 1"]
+    assert [job["t"] for job in jobs[1:]] == [1.0, 2.0]
+    assert jobs[0]["texts"] == ["a", "b"]
+    assert not {"jobId", "userWallet", "assignedValidator", "assignedAt"} & set(jobs[1])
+
+
+def test_gzip_traces_stay_compact(tmp_path):
+    path = str(tmp_path / "jobs.trace.gz")
+    recorder = JobTraceRecorder(path)
+    for index in range(200):
+        recorder.record(_claimed(index, assignedAt=recorder.started_at))
+    recorder.close()
+    with gzip.open(path, "rb") as f:
+        text = f.read()
+    assert len(read_job_trace(path)[1]) == 200
+    with open(path, "rb") as f:
+        assert len(f.read()) < 1.5 * len(gzip.compress(text))
+
+
+def test_reads_the_jobs_before_a_truncated_gzip_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_trace, "GZIP_FLUSH_SECONDS", 0.0)
+    path = str(tmp_path / "jobs.trace.gz")
+    recorder = JobTraceRecorder(path)
+    for index in range(5):
+        recorder.record(_claimed(index))
+    # The recorder is killed before close(): no end-of-stream marker
+    with open(path, "rb") as f:
+        killed = tmp_path / "killed.trace.gz"
+        killed.write_bytes(f.read())
+    recorder.close()
+    _, jobs = read_job_trace(str(killed))
+    assert [job["prompt"] for job in jobs] == [f"prompt {index}" for index in range(5)]
+
+
+def test_rejects_files_that_are_not_traces(tmp_path):
+    path = tmp_path / "other.jsonl"
+    path.write_text(json.dumps({"hello": "world"}) + "\n")
+    with pytest.raises(ValueError):
+        read_job_trace(str(path))
+
+
+def test_replay_submits_recorded_jobs_at_their_pace(tmp_path):
+    path = str(tmp_path / "jobs.trace")
+    recorder = JobTraceRecorder(path)
+    for index, offset in enumerate((0.0, 1.0, 2.0)):
+        recorder.record(_claimed(index, assignedAt=recorder.started_at + offset))
+    recorder.close()
+
+    router = LocalRouter()
+    router.claim("v1") # Jobs are only assigned to validators that have polled
+    replayer = TraceReplayer(router, path, speed=10, job_template={"model": "local"})
+    assert replayer.duration == pytest.approx(0.2)
+    started = time.monotonic()
+    replayer.start()
+    replayer.wait(5)
+    assert time.monotonic() - started >= 0.18
+    assert replayer.generated == 3
+    jobs = router.claim("v1", max_jobs=10)
+    assert [job["prompt"] for job in jobs] == ["prompt 0", "prompt 1", "prompt 2"]
+    assert {job["model"] for job in jobs} == {"local"}
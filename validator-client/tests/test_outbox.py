@@ -0,0 +1,89 @@
+import json
+import threading
+
+import outbox
+from outbox import CompletionOutbox
+
+
+def _payload(job_id):
+    return {"jobId": job_id, "feeAmount": 1.0, "result": "ok"}
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _unsent(path, *job_ids):
+    # A WAL left behind by a crashed run: puts with no matching ack
+    box = CompletionOutbox(str(path), send_batch=lambda batch: {}, fsync=False)
+    for job_id in job_ids:
+        box.enqueue(_payload(job_id))
+    box._file.close()
+
+
+def test_replays_unacknowledged_entries_after_restart(tmp_path):
+    path = tmp_path / "outbox.wal"
+    _unsent(path, "job-1", "job-2")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "ack", "jobId": "job-1", "status": "delivered"}) + "\n")
+        f.write('{"op": "put", "jobId": "job-3", "pay') # torn write
+
+    sent = []
+    delivered = threading.Event()
+
+    def send_batch(batch):
+        sent.extend(payload["jobId"] for payload in batch)
+        delivered.set()
+        return {payload["jobId"]: "delivered" for payload in batch}
+
+    box = CompletionOutbox(str(path), send_batch, fsync=False)
+    assert box.start() == 1
+    assert delivered.wait(5)
+    assert box.close(timeout=5) == 0
+    assert sent == ["job-2"]
+
+
+def test_start_compacts_the_log_to_pending_entries(tmp_path):
+    path = tmp_path / "outbox.wal"
+    _unsent(path, "job-1", "job-2")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "ack", "jobId": "job-1", "status": "rejected"}) + "\n")
+
+    box = CompletionOutbox(str(path), send_batch=lambda batch: {}, fsync=False)
+    box._replay()
+    box._compact()
+    assert _records(path) == [{"op": "put", "jobId": "job-2", "payload": _payload("job-2")}]
+
+
+def test_compacts_once_enough_acks_accumulate(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox, "COMPACT_AFTER_ACKS", 2)
+    path = tmp_path / "outbox.wal"
+    box = CompletionOutbox(str(path), lambda batch: {p["jobId"]: "delivered" for p in batch},
+                           batch_size=2, fsync=False)
+    box.start()
+    for index in range(4):
+        box.enqueue(_payload(f"job-{index}"))
+    assert box.close(timeout=5) == 0
+    # Every ack triggered a rewrite, so no put or ack of a settled job is left
+    assert _records(path) == []
+
+
+def test_keeps_entries_the_router_did_not_settle(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox, "BASE_BACKOFF_SECONDS", 0.01)
+    path = tmp_path / "outbox.wal"
+    attempts = []
+
+    def send_batch(batch):
+        attempts.append([payload["jobId"] for payload in batch])
+        if len(attempts) == 1:
+            return {"job-1": "rejected"}
+        return {payload["jobId"]: "delivered" for payload in batch}
+
+    box = CompletionOutbox(str(path), send_batch, fsync=False)
+    box.start()
+    box.enqueue(_payload("job-1"))
+    box.enqueue(_payload("job-2"))
+    assert box.close(timeout=5) == 0
+    assert attempts[-1] == ["job-2"]
+    assert all("job-1" not in attempt for attempt in attempts[1:])
@@ -0,0 +1,62 @@
+import numpy as np
+
+from prefix_cache import PrefixCache
+
+
+def _kv(length, fill=0.0):
+    return {"past.0.key": np.full((1, 2, length, 4), fill, dtype=np.float32),
+            "past.0.value": np.full((1, 2, length, 4), fill, dtype=np.float32)}
+
+
+def test_lookup_returns_longest_cached_prefix():
+    cache = PrefixCache(min_prefix_tokens=2)
+    cache.insert([1, 2, 3, 4, 5, 6], _kv(6))
+    length, kv = cache.lookup([1, 2, 3, 4, 9, 9])
+    assert length == 4
+    assert kv["past.0.key"].shape == (1, 2, 4, 4)
+    assert cache.stats["hits"] == 1 and cache.stats["reused_tokens"] == 4
+
+
+def test_lookup_leaves_the_last_token_to_feed():
+    cache = PrefixCache(min_prefix_tokens=2)
+    cache.insert([1, 2, 3, 4], _kv(4))
+    length, _ = cache.lookup([1, 2, 3, 4])
+    assert length == 3
+
+
+def test_short_matches_are_misses():
+    cache = PrefixCache(min_prefix_tokens=4)
+    cache.insert([1, 2, 3, 4, 5], _kv(5))
+    assert cache.lookup([1, 2, 3, 7, 8]) == (0, None)
+    cache.insert([1, 2, 3], _kv(3))
+    assert len(cache) == 1
+    assert cache.hit_rate() == 0.0
+
+
+def test_lookup_prefers_the_newest_entry():
+    cache = PrefixCache(min_prefix_tokens=2)
+    cache.insert([1, 2, 3, 4], _kv(4, fill=1.0))
+    cache.insert([1, 2, 3, 5], _kv(4, fill=2.0))
+    length, kv = cache.lookup([1, 2, 3, 6])
+    assert length == 3
+    assert float(kv["past.0.key"][0, 0, 0, 0]) == 2.0
+
+
+def test_insert_skips_prefixes_already_covered():
+    cache = PrefixCache(min_prefix_tokens=2)
+    cache.insert([1, 2, 3, 4], _kv(4))
+    cache.insert([1, 2, 3], _kv(3))
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used_entries_over_budget():
+    entry_bytes = sum(array.nbytes for array in _kv(4).values())
+    cache = PrefixCache(max_bytes=2 * entry_bytes, min_prefix_tokens=2)
+    cache.insert([1, 1, 1, 1], _kv(4))
+    cache.insert([2, 2, 2, 2], _kv(4))
+    cache.lookup([1, 1, 1, 1, 0]) # 1s become the most recently used
+    cache.insert([3, 3, 3, 3], _kv(4))
+    assert len(cache) == 2 and cache.bytes == 2 * entry_bytes
+    assert cache.stats["evictions"] == 1
+    assert cache.lookup([2, 2, 2, 2, 0]) == (0, None)
+    assert cache.lookup([1, 1, 1, 1, 0])[0] == 4
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, make_cache_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_keys_cover_model_prompt_and_params():
+    key = make_cache_key("m", "hello", {"maxTokens": 8, "temperature": 0})
+    assert key == make_cache_key("m", "hello", {"temperature": 0, "maxTokens": 8})
+    assert key != make_cache_key("other", "hello", {"maxTokens": 8, "temperature": 0})
+    assert key != make_cache_key("m", "hello!", {"maxTokens": 8, "temperature": 0})
+    assert key != make_cache_key("m", "hello", {"maxTokens": 9, "temperature": 0})
+
+
+def test_expired_entries_are_never_served(clock):
+    cache = ResultCache(ttl_seconds=10)
+    cache.put("k", "result")
+    clock.now += 9.9
+    assert cache.get("k") == "result"
+    clock.now += 0.1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used_by_count():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1" # b is now the least recently used
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_evicts_by_size_and_skips_oversized_results():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", "x" * 6)
+    cache.put("b", "y" * 6)
+    assert cache.get("a") is None and cache.get("b") == "y" * 6
+    cache.put("big", "z" * 11)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_replacing_an_entry_keeps_the_byte_count(clock):
+    cache = ResultCache()
+    cache.put("k", "short")
+    cache.put("k", "longer value")
+    assert cache.get("k") == "longer value"
+    assert cache.stats() == {"entries": 1, "bytes": 12, "hits": 1, "misses": 0, "evictions": 0}
+
+
+def test_persisted_results_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(ttl_seconds=10, persist_path=path)
+    cache.put("old", "1")
+    clock.now += 5
+    cache.put("new", "2")
+    cache.close()
+
+    clock.now += 6 # "old" has expired, "new" has not
+    warm = ResultCache(ttl_seconds=10, persist_path=path)
+    assert warm.get("old") is None
+    assert warm.get("new") == "2"
+    warm.close()
+
+
+def test_warm_start_keeps_the_most_recent_entries(tmp_path, clock):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(persist_path=path)
+    for index in range(3):
+        cache.put(f"k{index}", str(index))
+        clock.now += 1
+    cache.close()
+
+    warm = ResultCache(max_entries=2, persist_path=path)
+    assert warm.get("k0") is None
+    assert warm.get("k1") == "1" and warm.get("k2") == "2"
+    warm.close()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from scheduling import JobScheduler, RuntimeEstimator, job_deadline, parse_timestamp
+
+
+class _FixedEstimator(RuntimeEstimator):
+    def estimate(self, job):
+        return job["estimate"]
+
+
+def _order(policy, jobs):
+    scheduler = JobScheduler(policy, _FixedEstimator())
+    for job in jobs:
+        scheduler.put(job)
+    return [scheduler.pop().job["jobId"] for _ in jobs]
+
+
+def test_parse_timestamp_accepts_seconds_milliseconds_and_iso():
+    assert parse_timestamp(1700000000) == 1700000000.0
+    assert parse_timestamp(1700000000500) == pytest.approx(1700000000.5)
+    assert parse_timestamp("2023-11-14T22:13:20+00:00") == 1700000000.0
+    assert parse_timestamp("2023-11-14T22:13:20Z") == 1700000000.0
+    assert parse_timestamp("soon") is None
+    assert parse_timestamp(None) is None
+
+
+def test_job_deadline_defaults_to_timeout_after_assignment():
+    assert job_deadline({"deadline": 1700000100}) == 1700000100.0
+    assert job_deadline({"assignedAt": 1700000000000}, default_timeout=60) == pytest.approx(1700000060.0)
+
+
+def test_fifo_runs_jobs_in_arrival_order():
+    now = time.time()
+    jobs = [{"jobId": "a", "estimate": 5, "deadline": now + 90},
+            {"jobId": "b", "estimate": 1, "deadline": now + 10},
+            {"jobId": "c", "estimate": 2, "deadline": now + 50}]
+    assert _order("fifo", jobs) == ["a", "b", "c"]
+
+
+def test_edf_runs_earliest_deadline_first():
+    now = time.time()
+    jobs = [{"jobId": "a", "estimate": 5, "deadline": now + 90},
+            {"jobId": "b", "estimate": 1, "deadline": now + 10},
+            {"jobId": "c", "estimate": 2, "deadline": now + 50},
+            {"jobId": "d", "estimate": 2, "deadline": now + 10}]
+    assert _order("edf", jobs) == ["b", "d", "c", "a"]
+
+
+def test_wsjf_runs_highest_fee_per_second_first():
+    now = time.time()
+    jobs = [{"jobId": "a", "estimate": 4, "feeAmount": 4, "deadline": now + 600},
+            {"jobId": "b", "estimate": 1, "feeAmount": 3, "deadline": now + 600},
+            {"jobId": "c", "estimate": 2, "feeAmount": 1, "deadline": now + 600}]
+    assert _order("wsjf", jobs) == ["b", "a", "c"]
+
+
+def test_wsjf_lets_a_job_that_would_miss_its_deadline_go_first():
+    now = time.time()
+    jobs = [{"jobId": "rich", "estimate": 10, "feeAmount": 100, "deadline": now + 600},
+            {"jobId": "urgent", "estimate": 2, "feeAmount": 1, "deadline": now + 5}]
+    assert _order("wsjf", jobs) == ["urgent", "rich"]
+
+
+def test_drain_returns_everything_in_arrival_order():
+    scheduler = JobScheduler("edf", _FixedEstimator())
+    now = time.time()
+    scheduler.put({"jobId": "a", "estimate": 1, "deadline": now + 60}, "ctx-a")
+    scheduler.put({"jobId": "b", "estimate": 1, "deadline": now + 5}, "ctx-b")
+    entries = scheduler.drain()
+    assert [(e.job["jobId"], e.context) for e in entries] == [("a", ("ctx-a",)), ("b", ("ctx-b",))]
+    assert len(scheduler) == 0 and scheduler.pop() is None
+
+
+def test_prepared_entries_queue_only_once_added():
+    scheduler = JobScheduler("fifo", _FixedEstimator())
+    entry = scheduler.prepare({"jobId": "a", "estimate": 3}, "ctx")
+    assert entry.estimate == 3 and entry.context == ("ctx",)
+    assert len(scheduler) == 0
+    scheduler.add(entry)
+    assert scheduler.pop() is entry
@@ -0,0 +1,69 @@
+import pytest
+
+import telemetry
+from telemetry import HostTelemetry
+
+PROC = {
+    "/proc/stat": "cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 100 0 100 700 100 0 0 0 0 0\n",
+    "/proc/meminfo": "MemTotal:       8000000 kB\nMemFree:        1000000 kB\nMemAvailable:   2000000 kB\n",
+    "/proc/self/status": "Name:\tpython\nVmRSS:\t  204800 kB\n",
+}
+
+
+@pytest.fixture
+def host(tmp_path, monkeypatch):
+    """Fake /proc files and thermal zones; returns a callable that adds zones."""
+    files = dict(PROC)
+    monkeypatch.setattr(telemetry, "THERMAL_ZONES", str(tmp_path / "thermal_zone*"))
+    real_read = telemetry._read
+    monkeypatch.setattr(telemetry, "_read", lambda path: files.get(path) if path.startswith("/proc") else real_read(path))
+
+    def add_zone(index, kind, millidegrees):
+        zone = tmp_path / f"thermal_zone{index}"
+        zone.mkdir()
+        (zone / "type").write_text(kind + "\n")
+        (zone / "temp").write_text(f"{millidegrees}\n")
+
+    add_zone.files = files
+    return add_zone
+
+
+def test_cpu_times_count_idle_and_iowait_as_idle(host):
+    assert telemetry._cpu_times() == (200, 1000)
+
+
+def test_parses_memory_rss_and_cpu_utilization(host):
+    sampler = HostTelemetry()
+    host.files["/proc/stat"] = "cpu  400 0 100 800 200 0 0 0 0 0\n"
+    sample = sampler.sample()
+    assert sample["cpu_util"] == pytest.approx(300 / 500)
+    assert sample["mem_available_mb"] == pytest.approx(2000000 / 1024)
+    assert sample["mem_available_ratio"] == pytest.approx(0.25)
+    assert sample["rss_mb"] == 200
+
+
+def test_hottest_zone_wins_among_zones_of_one_type(host):
+    host(0, "x86_pkg_temp", 71000)
+    host(1, "x86_pkg_temp", 48000)
+    host(2, "acpitz", 40000)
+    host(3, "gpu-thermal", 65000)
+    host(4, "gpu-thermal", 58500)
+    sample = HostTelemetry().sample()
+    assert sample["temp_c"] == 71.0
+    assert sample["gpu_temp_c"] == 65.0
+
+
+def test_missing_readings_are_left_out(host):
+    for path in PROC:
+        host.files[path] = None
+    sample = HostTelemetry().sample()
+    assert not {"cpu_util", "mem_available_mb", "rss_mb", "temp_c"} & set(sample)
+
+
+def test_smoothed_averages_the_recent_window(host):
+    sampler = HostTelemetry(window=2)
+    for kb in (1024000, 2048000, 3072000):
+        host.files["/proc/self/status"] = f"VmRSS:\t{kb} kB\n"
+        sampler.sample()
+    assert sampler.smoothed()["rss_mb"] == 2500.0
+    assert len(sampler.history()) == 3
@@ -0,0 +1,213 @@
+# NeuroSwarm Validator Client - Per-Job Stage Tracing
+# Records where each job's wall time goes (receive, queue, batch_wait,
+# tokenize, infer, serialize, report) as spans, and exports one trace per
+# job to a JSONL file and/or an OTLP/HTTP (JSON) collector.
+#
+# Code on the hot path just wraps a stage in `with tracing.span("infer"):`.
+# The active job trace(s) travel in a context variable, so inference
+# backends need no extra arguments; a batched call records its spans on
+# every job in the batch.
+
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import requests
+
+_current: contextvars.ContextVar = contextvars.ContextVar("validator_job_traces", default=())
+
+
+class JobTrace:
+    def __init__(self, job_id: str, attributes: Optional[Dict[str, Any]] = None):
+        self.job_id = job_id
+        self.trace_id = os.urandom(16).hex()
+        self.attributes = attributes or {}
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, **attributes):
+        """Records a finished span; times are time.time() seconds."""
+        with self._lock:
+            self.spans.append({"name": name, "start": start, "end": end, "attributes": attributes})
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        start = spans[0]["start"] if spans else 0.0
+        end = max((s["end"] for s in spans), default=0.0)
+        return {
+            "traceId": self.trace_id,
+            "jobId": self.job_id,
+            "attributes": self.attributes,
+            "total_ms": round((end - start) * 1000, 3),
+            "spans": [
+                {"name": s["name"], "start": s["start"], "end": s["end"],
+                 "duration_ms": round((s["end"] - s["start"]) * 1000, 3), **({"attributes": s["attributes"]} if s["attributes"] else {})}
+                for s in spans
+            ],
+        }
+
+
+def current() -> Tuple[JobTrace, ...]:
+    """The job trace(s) active in this thread/context."""
+    return _current.get()
+
+
+@contextmanager
+def activate(traces: Iterable[JobTrace]):
+    """Makes `traces` the target of span() calls within the block."""
+    token = _current.set(tuple(traces))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Times the block and records it on every active job trace (no-op when none)."""
+    traces = _current.get()
+    if not traces:
+        yield
+        return
+    start = time.time()
+    try:
+        yield
+    finally:
+        end = time.time()
+        for trace in traces:
+            trace.add(name, start, end, **attributes)
+
+
+class JsonlExporter:
+    """Appends one JSON line per finished job trace."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, trace: JobTrace):
+        line = json.dumps(trace.to_dict(), separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class OtlpHttpExporter:
+    """
+    Ships traces to an OpenTelemetry collector over OTLP/HTTP with JSON
+    encoding (POST {endpoint}/v1/traces), batched on a background thread so
+    exporting never slows the job.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "neuroswarm-validator-client",
+                 batch_size: int = 64, flush_interval: float = 2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[JobTrace]]" = queue.Queue(maxsize=10000)
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: JobTrace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass # Drop rather than block the job path
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self._session.post(self.url, json=self._encode(batch), timeout=5)
+                except requests.exceptions.RequestException as e:
+                    print(f"   [TRACE] OTLP export of {len(batch)} trace(s) failed: {e}")
+
+    def _encode(self, traces: List[JobTrace]) -> Dict[str, Any]:
+        spans = []
+        for trace in traces:
+            data = trace.to_dict()
+            if not data["spans"]:
+                continue
+            root_id = os.urandom(8).hex()
+            root_attributes = dict(trace.attributes, jobId=trace.job_id)
+            spans.append(self._span(trace.trace_id, root_id, None, "job", data["spans"][0]["start"],
+                                    max(s["end"] for s in data["spans"]), root_attributes))
+            for s in data["spans"]:
+                spans.append(self._span(trace.trace_id, os.urandom(8).hex(), root_id, s["name"], s["start"], s["end"],
+                                        s.get("attributes", {})))
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "validator_client.tracing"}, "spans": spans}],
+        }]}
+
+    @staticmethod
+    def _span(trace_id, span_id, parent_id, name, start, end, attributes):
+        span = {
+            "traceId": trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": 1, # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(start * 1e9)),
+            "endTimeUnixNano": str(int(end * 1e9)),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in attributes.items()],
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        return span
+
+
+class Tracer:
+    """
+    Creates a JobTrace per job and hands finished traces to the exporters.
+    With no exporters configured it still returns traces but exports nothing.
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.exporters = exporters or []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def start(self, job_id: str, **attributes) -> JobTrace:
+        return JobTrace(job_id, attributes)
+
+    def finish(self, trace: JobTrace):
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                print(f"   [TRACE] Export failed for {trace.job_id}: {e}")
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
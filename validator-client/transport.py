@@ -0,0 +1,116 @@
+# NeuroSwarm Validator Client - Router Transport
+# Shared, pooled HTTP transport for all validator <-> router traffic.
+# A single keep-alive connection pool is reused by polls and completion
+# reports so steady-state requests skip the TCP (and TLS) handshake.
+# Bodies use the most compact format and content coding both sides support
+# (see codec.py), starting from plain JSON until the router advertises more.
+
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional
+
+import codec
+
+try:
+    import httpx  # Optional: only needed for HTTP/2 (pip install "httpx[http2]")
+    HAVE_HTTPX = True
+except ImportError:
+    httpx = None
+    HAVE_HTTPX = False
+
+CONNECT_TIMEOUT_SECONDS = 3.05
+
+# Read timeout per logical endpoint; long-polls add their hold time on top.
+DEFAULT_TIMEOUTS = {
+    "poll": 3.0,
+    "complete": 5.0,
+}
+
+# Exceptions callers should treat as "router unavailable / request failed"
+TRANSPORT_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if HAVE_HTTPX else ())
+
+
+class RouterTransport:
+    """
+    Keep-alive HTTP client for the Router API.
+
+    Args:
+        base_url: Router API base URL, e.g. http://localhost:3000/api/v1
+        pool_size: Maximum pooled connections (size it to concurrent callers)
+        timeouts: Per-endpoint read timeouts, merged over DEFAULT_TIMEOUTS
+        http2: Use HTTP/2 via httpx when it is installed
+        formats: Body formats we may use, in preference order (default: all
+            available, see codec.available_formats(); ["json"] disables binary bodies)
+        encodings: Content codings we may use, in preference order (default:
+            all available; [] disables compression)
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 10,
+                 timeouts: Optional[Dict[str, float]] = None, http2: bool = False,
+                 formats: Optional[List[str]] = None, encodings: Optional[List[str]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.http2 = http2 and HAVE_HTTPX
+        self.formats = [f for f in (formats if formats is not None else codec.available_formats()) if f in codec.available_formats()]
+        self.encodings = [e for e in (encodings if encodings is not None else codec.available_encodings()) if e in codec.available_encodings()]
+        if "json" not in self.formats:
+            self.formats.append("json")
+        # What we send until the router tells us it can decode more
+        self.request_format = "json"
+        self.request_encoding = "identity"
+        self._accept = codec.accept_header(self.formats)
+        self._accept_encoding = codec.accept_encoding_header(self.encodings)
+
+        if http2 and not HAVE_HTTPX:
+            print("   [WARNING] HTTP/2 requested but httpx is not installed; falling back to HTTP/1.1 keep-alive.")
+
+        if self.http2:
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            self._client = httpx.Client(http2=True, limits=limits)
+        else:
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+
+    def post(self, endpoint: str, path: str, payload: Dict[str, Any], extra_wait: float = 0):
+        """
+        POSTs payload to base_url + path using the timeout configured for `endpoint`.
+        extra_wait extends the read timeout, e.g. by a long-poll's hold time.
+        Returns the response object (requests.Response or httpx.Response);
+        read its body with decode().
+        """
+        response = self._send(endpoint, path, payload, extra_wait)
+        if response.status_code == 415 and (self.request_format, self.request_encoding) != ("json", "identity"):
+            # The router stopped accepting what it advertised (e.g. a rolling upgrade); fall back and retry once
+            print(f"   [TRANSPORT] Router rejected {self.request_format}/{self.request_encoding} bodies; falling back to JSON.")
+            self.request_format, self.request_encoding = "json", "identity"
+            response = self._send(endpoint, path, payload, extra_wait)
+        self._learn(response.headers)
+        return response
+
+    def decode(self, response) -> Any:
+        """Parses a response body in whatever format/coding the router chose."""
+        return codec.decode(response.content, response.headers.get("Content-Type"), response.headers.get("Content-Encoding"))
+
+    def _send(self, endpoint: str, path: str, payload: Dict[str, Any], extra_wait: float):
+        read_timeout = self.timeouts.get(endpoint, DEFAULT_TIMEOUTS["complete"]) + extra_wait
+        url = f"{self.base_url}{path}"
+        body, headers = codec.encode(payload, self.request_format, self.request_encoding)
+        headers["Accept"] = self._accept
+        headers["Accept-Encoding"] = self._accept_encoding
+        if self.http2:
+            return self._client.post(url, content=body, headers=headers, timeout=httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT_SECONDS))
+        return self._client.post(url, data=body, headers=headers, timeout=(CONNECT_TIMEOUT_SECONDS, read_timeout))
+
+    def _learn(self, headers):
+        # Upgrade request bodies to the best format/coding the router advertises (RFC 7694 style)
+        fmt = codec.negotiate(headers.get("Accept-Post"), self.formats)
+        if fmt:
+            self.request_format = fmt
+        encoding = codec.negotiate(headers.get("Accept-Encoding"), self.encodings)
+        if encoding:
+            self.request_encoding = encoding
+
+    def close(self):
+        self._client.close()
@@ -1,164 +1,1184 @@
 # NeuroSwarm Validator Client V0.2.0 (Consumer Hardware Adaption)
 # This client simulates the primary functions of a Validator node: 
 # 1. Polling the Router API for assigned jobs.
-# 2. Simulating LLM inference on the consumer GPU.
+# 2. Running LLM inference (simulated, or ONNX Runtime via inference.py):
+#    text generation, or batched sentence embeddings for `type: "embedding"` jobs.
 # 3. Reporting completion to the Router to trigger the Solana NSD Fee Split.
 
+import argparse
+import array
+import hashlib
+import math
+import os
+import sys
 import time
 import json
 import random
-import requests
-from typing import Dict, Any, Optional
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from admission import ConcurrencyLimit, SlotBudget, make_limit, ALGORITHMS
+from batching import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+import codec
+import metrics
+from job_trace import JobTraceRecorder
+from inference import (BackendRegistry, TokenCounter, DEFAULT_EMBED_BATCH_SIZE, DEFAULT_MAX_TOKENS, DEFAULT_MODELS_DIR,
+                       DEFAULT_PREFIX_CACHE_BYTES, DEFAULT_SESSION_OPTIONS, embedding_texts, is_embedding_job)
+from outbox import CompletionOutbox
+from profiling import SlowJobProfiler
+from scheduling import JobScheduler, RuntimeEstimator, POLICIES
+from result_cache import ResultCache, make_cache_key, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS
+from streaming import TokenStream
+from telemetry import HostTelemetry, DEFAULT_INTERVAL_SECONDS as DEFAULT_TELEMETRY_INTERVAL
+from transport import RouterTransport, TRANSPORT_ERRORS
+import tracing
+from worker_pool import ProcessWorkerPool
 
 # --- Configuration ---
 # NOTE: Replace with your actual Validator ID for testing the full flow.
 VALIDATOR_ID = "Brock-Node-A" 
+VALIDATOR_IDS: List[str] = [VALIDATOR_ID] # Identities hosted by this process; several run as a fleet sharing the models
 ROUTER_API_URL = "http://localhost:3000/api/v1" # Router API (Task 3) address
 POLL_INTERVAL_SECONDS = 5
-MAX_CAPACITY = 10 # Total processing slots available on this hardware
+LONG_POLL_SECONDS = 25 # How long the router may hold a poll open in long-poll delivery mode
+MAX_CAPACITY = 10 # Total processing slots available on this hardware (hard ceiling)
+ADMISSION_ALGORITHM = "gradient" # fixed | aimd | gradient - how many of those slots we currently accept work for
+SCHEDULING_POLICY = "fifo" # fifo | edf | wsjf - which claimed job runs next when a slot frees up
+LOCAL_QUEUE_DEPTH = 2 # Jobs claimed ahead of free slots (prefetch); they wait locally in SCHEDULING_POLICY order
+# When True the client fabricates jobs locally instead of calling the router.
+# Set --router-url (e.g. the local stand-in in router_stub.py) to disable.
+USE_MOCK_ROUTER = True
+USE_HTTP2 = False # Requires httpx[http2]; HTTP/1.1 keep-alive is used otherwise
+WIRE_FORMATS = None # Body formats offered to the router, e.g. ["msgpack", "json"] (None: all installed)
+WIRE_ENCODINGS = None # Content codings offered to the router, e.g. ["zstd", "gzip"] (None: all installed, []: none)
+OUTBOX_PATH = "completion_outbox.wal" # Durable log of completions not yet acknowledged by the router
+# Router answers that settle a completion for good (bad payload, unknown or
+# already completed job); any other failure keeps it in the outbox for a retry
+REJECTED_COMPLETION_STATUSES = (400, 404, 409, 422)
+OUTBOX_DRAIN_SECONDS = 10 # How long shutdown waits for pending completions to be delivered
+DRAIN_TIMEOUT_SECONDS = 30 # How long shutdown lets in-flight jobs finish before handing them back to the router
+STREAM_TOKENS = False # Forward tokens to the router as they are generated (real router only)
+INFERENCE_ENGINE = "simulated" # simulated | onnx
+MODELS_DIR = DEFAULT_MODELS_DIR # Output directory of NS-LLM/model-pipeline/export_large_models.py
+DEFAULT_MODEL = None # Local model used for jobs whose `model` is not exported here (onnx engine only)
+SESSION_OPTIONS = dict(DEFAULT_SESSION_OPTIONS) # ONNX Runtime threads / graph optimization level
+MODEL_MEMORY_BUDGET_MB = None # RAM budget for resident models; least recently used idle models are evicted
+PREFIX_CACHE_MB = DEFAULT_PREFIX_CACHE_BYTES / (1024 * 1024) # Shared-prompt-prefix KV cache per with-past model (0 disables it)
+WORKER_PROCESSES = 0 # Run ONNX inference in this many worker processes (0: in this process)
+PRELOAD_MODELS: List[str] = [] # Models to start loading in the background at startup
+BATCH_MAX_SIZE = DEFAULT_MAX_BATCH_SIZE # Prompts per batched inference call (1 disables micro-batching)
+BATCH_MAX_WAIT_MS = DEFAULT_MAX_WAIT_MS # How long a prompt waits for others to share its batch
+EMBED_BATCH_SIZE = DEFAULT_EMBED_BATCH_SIZE # Texts per ONNX run within an embedding job
+SIMULATED_EMBEDDING_DIMS = 384 # Vector size returned by the simulated engine (all-MiniLM-L6-v2's)
+CACHE_MAX_ENTRIES = DEFAULT_MAX_ENTRIES # Result cache size (0 disables the cache)
+CACHE_MAX_BYTES = DEFAULT_MAX_BYTES
+CACHE_TTL_SECONDS = DEFAULT_TTL_SECONDS
+CACHE_PATH = None # Optional SQLite file that keeps the result cache warm across restarts
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9110 # Local Prometheus /metrics endpoint (0 disables)
+TRACE_PATH = None # JSONL file receiving one stage-timing trace per job
+OTLP_ENDPOINT = None # OpenTelemetry collector base URL (OTLP/HTTP JSON), e.g. http://localhost:4318
+PROFILE_SLOWEST = 0 # Keep sampled stack profiles of the N slowest jobs (0 disables)
+PROFILE_DIR = "profiles" # Where the slow-job profiles (collapsed stacks) are written
+JOB_TRACE_PATH = None # Record every claimed job to this trace file (.gz compresses) for replay with load_driver.py --replay
+TELEMETRY_INTERVAL_SECONDS = DEFAULT_TELEMETRY_INTERVAL # Host health sampling period; polls carry smoothed readings (0 disables)
 
 # --- State ---
-current_gpu_load = 0 # Simulate current number of jobs being processed
-is_throttled = False
+# Per-identity state (slots, local queue, outbox) lives on ValidatorIdentity;
+# everything here is shared by every identity in the process.
+_validators: List["ValidatorIdentity"] = []
+_slots: Optional[SlotBudget] = None
+_transport: Optional[RouterTransport] = None
+_batch_endpoint_supported = True
+_backends: Optional[BackendRegistry] = None
+_batcher: Optional[MicroBatcher] = None
+_result_cache: Optional[ResultCache] = None
+_tracer: Optional[tracing.Tracer] = None
+_profiler: Optional[SlowJobProfiler] = None
+_telemetry: Optional[HostTelemetry] = None
+_job_recorder: Optional[JobTraceRecorder] = None
+_estimator: Optional[RuntimeEstimator] = None
+_draining = threading.Event() # Set once shutdown starts; no new jobs are claimed after it
+_worker_pool: Optional[ProcessWorkerPool] = None
+
+# --- Metrics (served on METRICS_PORT at /metrics) ---
+POLLS = metrics.REGISTRY.counter("validator_polls_total", "Polls sent to the router, by outcome", ["result"])
+POLL_LATENCY = metrics.REGISTRY.histogram("validator_poll_latency_seconds", "Poll round-trip time (long-polls include the router's hold time)", ["delivery"])
+QUEUE_WAIT = metrics.REGISTRY.histogram("validator_queue_wait_seconds", "Time from claiming a job to starting work on it")
+INFERENCE_LATENCY = metrics.REGISTRY.histogram("validator_inference_latency_seconds", "Inference wall time per job (cache hits excluded)", ["model"])
+GENERATED_TOKENS = metrics.REGISTRY.counter("validator_generated_tokens_total", "Tokens generated", ["model"])
+EMBEDDED_TEXTS = metrics.REGISTRY.counter("validator_embedded_texts_total", "Texts embedded by embedding jobs", ["model"])
+TOKENS_PER_SECOND = metrics.REGISTRY.gauge("validator_tokens_per_second", "Generation throughput of the most recent inference call", ["model"])
+RUNTIME_ESTIMATE_ERROR = metrics.REGISTRY.gauge("validator_runtime_estimate_error_ratio",
+                                                "Mean absolute error of predicted inference time relative to the measured time (decayed)", ["model"])
+JOBS_PAST_DEADLINE = metrics.REGISTRY.counter("validator_jobs_past_deadline_total", "Jobs whose completion was committed after their router deadline")
+REPORT_LATENCY = metrics.REGISTRY.histogram("validator_completion_report_latency_seconds", "Completion report round-trip time", ["endpoint"])
+metrics.REGISTRY.gauge("validator_empty_poll_ratio", "Share of polls that returned no job",
+                       fn=lambda: POLLS.value(result="empty") / max(1.0, POLLS.value(result="empty") + POLLS.value(result="job")))
+# Per-identity values are summed over every identity in the process
+metrics.REGISTRY.gauge("validator_identities", "Validator identities hosted by this process", fn=lambda: len(_validators))
+metrics.REGISTRY.gauge("validator_jobs_in_flight", "Jobs currently being processed", fn=lambda: sum(v.load for v in _validators))
+metrics.REGISTRY.gauge("validator_scheduler_queue_depth", "Claimed jobs waiting locally for a slot", fn=lambda: sum(len(v.scheduler) for v in _validators))
+metrics.REGISTRY.gauge("validator_concurrency_limit", "Jobs the admission controllers currently accept", fn=lambda: sum(v.admission.limit for v in _validators))
+metrics.REGISTRY.gauge("validator_outbox_depth", "Completions waiting to be acknowledged by the router",
+                       fn=lambda: sum(v.outbox.depth() for v in _validators if v.outbox))
+metrics.REGISTRY.gauge("validator_cache_hit_ratio", "Inference result cache hit ratio", fn=lambda: _result_cache.hit_rate() if _result_cache else 0)
+metrics.REGISTRY.gauge("validator_worker_restarts", "Inference worker processes replaced after exiting", fn=lambda: _worker_pool.restarts if _worker_pool else 0)
+metrics.REGISTRY.gauge("validator_prefix_cache_hit_ratio", "Share of prompts that reused a cached KV prefix (in-process inference)",
+                       fn=lambda: _backends.prefix_cache_hit_rate() if _backends else 0)
+metrics.REGISTRY.gauge("validator_resident_model_bytes", "Estimated size of loaded models", fn=lambda: _backends.resident_bytes() if _backends else 0)
+
+def record_generation(model: str, tokens: int, seconds: float):
+    GENERATED_TOKENS.inc(tokens, model=model)
+    if seconds > 0:
+        TOKENS_PER_SECOND.set(tokens / seconds, model=model)
 
-def poll_for_jobs() -> Optional[Dict[str, Any]]:
+def get_runtime_estimator() -> RuntimeEstimator:
     """
-    Simulates checking the Router API for jobs assigned to this validator.
-    In a real system, this would be a secure long-poll connection.
+    Returns the per-model inference runtime model, fitted to observed
+    inference times and token counts from each model's tokenizer.
     """
-    print(f"\n[{time.strftime('%H:%M:%S')}] Polling Router for new jobs assigned to {VALIDATOR_ID}...")
-    
-    # MOCK ROUTER ENDPOINT: We assume a /validator/poll endpoint exists in the router
-    # that returns a job assigned to this ID if one is available.
-    try:
-        # We also send our current capacity/health status to the router
-        health_data = {
-            "capacity": MAX_CAPACITY - current_gpu_load,
-            "gpu_temp_c": random.randint(50, 80),
-            "is_throttled": is_throttled,
-        }
-        
-        # Mock API Call - Replace with actual authenticated request
-        # response = requests.post(f"{ROUTER_API_URL}/validator/poll/{VALIDATOR_ID}", json=health_data, timeout=3)
-        # response.raise_for_status()
-        
-        # --- Mock Response Logic (since we don't have the real router running) ---
-        if random.random() < 0.2: # 20% chance of receiving a job
-             mock_job = {
-                "jobId": f"job-{random.randint(1000, 9999)}",
-                "prompt": "Write a 5-sentence summary of the NeuroSwarm economic model.",
-                "feeAmount": 0.5, # NSD
-                "assignedValidator": VALIDATOR_ID,
-                "userWallet": "AABBCCDD...",
-                "model": "NS-LLM-70B"
-            }
-             return mock_job
-        # --- End Mock Response Logic ---
+    global _estimator
+    if _estimator is None:
+        _estimator = RuntimeEstimator(TokenCounter(MODELS_DIR, DEFAULT_MODEL))
+    return _estimator
 
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR: Could not connect to Router API. Check router status. Details: {e}")
-        return None
-    
-    return None
+def get_slot_budget() -> SlotBudget:
+    """
+    Returns the MAX_CAPACITY hardware slots shared by every identity: each
+    identity's admission limit caps its own jobs, this caps their sum.
+    """
+    global _slots
+    if _slots is None:
+        _slots = SlotBudget(MAX_CAPACITY)
+    return _slots
+
+def get_transport() -> RouterTransport:
+    """
+    Returns the shared keep-alive Router transport, creating it on first use.
+    """
+    global _transport
+    if _transport is None:
+        # One connection per worker reporting completions, plus the poller, for every identity
+        _transport = RouterTransport(ROUTER_API_URL, pool_size=(MAX_CAPACITY + 1) * len(VALIDATOR_IDS), http2=USE_HTTP2,
+                                     formats=WIRE_FORMATS, encodings=WIRE_ENCODINGS)
+    return _transport
+
+def get_backends() -> BackendRegistry:
+    """
+    Returns the inference session pool (one ONNX session per resident model).
+    """
+    global _backends
+    if _backends is None:
+        budget = int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024) if MODEL_MEMORY_BUDGET_MB else None
+        _backends = BackendRegistry(MODELS_DIR, SESSION_OPTIONS, default_model=DEFAULT_MODEL, memory_budget_bytes=budget,
+                                    prefix_cache_bytes=int(PREFIX_CACHE_MB * 1024 * 1024))
+    return _backends
+
+def get_worker_pool() -> Optional[ProcessWorkerPool]:
+    """
+    Returns the inference worker processes, or None when inference runs in
+    this process (WORKER_PROCESSES == 0).
+    """
+    global _worker_pool
+    if _worker_pool is None and WORKER_PROCESSES > 0:
+        budget = int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024) if MODEL_MEMORY_BUDGET_MB else None
+        _worker_pool = ProcessWorkerPool(WORKER_PROCESSES, MODELS_DIR, SESSION_OPTIONS,
+                                         default_model=DEFAULT_MODEL, memory_budget_bytes=budget,
+                                         prefix_cache_bytes=int(PREFIX_CACHE_MB * 1024 * 1024))
+    return _worker_pool
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """
+    Returns the micro-batcher in front of the inference backends, or None
+    when batching is disabled (BATCH_MAX_SIZE <= 1).
+    """
+    global _batcher
+    if _batcher is None and BATCH_MAX_SIZE > 1:
+        _batcher = MicroBatcher(run_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, profiler=get_profiler())
+    return _batcher
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Returns the inference result cache, or None when it is disabled. The
+    simulated engine is never cached since its output is not a real result.
+    """
+    global _result_cache
+    if _result_cache is None and CACHE_MAX_ENTRIES > 0 and INFERENCE_ENGINE != "simulated":
+        _result_cache = ResultCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL_SECONDS, persist_path=CACHE_PATH)
+    return _result_cache
+
+def get_tracer() -> tracing.Tracer:
+    """
+    Returns the per-job stage tracer (exports nothing unless TRACE_PATH or
+    OTLP_ENDPOINT is set).
+    """
+    global _tracer
+    if _tracer is None:
+        exporters = []
+        if TRACE_PATH:
+            exporters.append(tracing.JsonlExporter(TRACE_PATH))
+        if OTLP_ENDPOINT:
+            exporters.append(tracing.OtlpHttpExporter(OTLP_ENDPOINT))
+        _tracer = tracing.Tracer(exporters)
+    return _tracer
+
+def get_profiler() -> Optional[SlowJobProfiler]:
+    """
+    Returns the slow-job sampling profiler, or None unless PROFILE_SLOWEST > 0.
+    """
+    global _profiler
+    if _profiler is None and PROFILE_SLOWEST > 0:
+        note = "inference runs in worker processes (--workers) and is not sampled" if WORKER_PROCESSES > 0 else None
+        _profiler = SlowJobProfiler(PROFILE_SLOWEST, PROFILE_DIR, note=note)
+    return _profiler
+
+def get_telemetry() -> Optional[HostTelemetry]:
+    """
+    Returns the background host telemetry sampler, or None when
+    TELEMETRY_INTERVAL_SECONDS is 0.
+    """
+    global _telemetry
+    if _telemetry is None and TELEMETRY_INTERVAL_SECONDS > 0:
+        _telemetry = HostTelemetry(TELEMETRY_INTERVAL_SECONDS)
+        _telemetry.start()
+    return _telemetry
+
+def get_job_recorder() -> Optional[JobTraceRecorder]:
+    """
+    Returns the job trace recorder, or None unless JOB_TRACE_PATH is set.
+    """
+    global _job_recorder
+    if _job_recorder is None and JOB_TRACE_PATH:
+        _job_recorder = JobTraceRecorder(JOB_TRACE_PATH)
+    return _job_recorder
 
-def simulate_inference(prompt: str) -> str:
+def simulate_inference(prompt: str, validator_id: str, on_token=None) -> str:
     """
     Placeholder for the actual LLM workload on the consumer GPU.
-    Simulates processing time based on prompt length and hardware load.
+    Simulates processing time based on prompt length and hardware load
+    (the jobs in flight for every identity on this hardware).
+    With on_token the mock result is emitted word by word over that time.
     """
-    global is_throttled
-    
     # Mock inference time between 2 to 10 seconds
-    inference_time = max(2, min(10, len(prompt) / 10 + current_gpu_load * 0.5)) 
+    inference_time = max(2, min(10, len(prompt) / 10 + sum(v.load for v in _validators) * 0.5)) 
     
     print(f"   [INFERENCE] Starting workload for {prompt[:30]}... (Estimated: {inference_time:.2f}s)")
     
     start_time = time.time()
+    if on_token:
+        # Stream the mock response word by word, spread over the inference time
+        mock_result = f"Result for prompt: '{prompt}'. The inference was successfully completed by {validator_id} in {inference_time:.2f} seconds. The quality score is excellent, securing the 70% NSD reward."
+        words = mock_result.split(" ")
+        for index, word in enumerate(words):
+            time.sleep(inference_time / len(words))
+            on_token(word if index == 0 else " " + word)
+        return mock_result
+
     time.sleep(inference_time)
     
-    # Simulate thermal throttling if inference was long (simple check)
-    if inference_time > 8:
-        is_throttled = True
-        print("   [WARNING] High inference time detected. Throttling initiated.")
-    
     # Mock LLM Response
-    mock_result = f"Result for prompt: '{prompt}'. The inference was successfully completed by {VALIDATOR_ID} in {time.time() - start_time:.2f} seconds. The quality score is excellent, securing the 70% NSD reward."
+    mock_result = f"Result for prompt: '{prompt}'. The inference was successfully completed by {validator_id} in {time.time() - start_time:.2f} seconds. The quality score is excellent, securing the 70% NSD reward."
     return mock_result
 
-def report_completion(job_data: Dict[str, Any], result: str):
+def simulate_embedding(texts: List[str]) -> bytes:
     """
-    Reports the completed job back to the Router, which triggers the 
-    Solana 'complete_request' instruction and the 70/20/10 fee split.
+    Placeholder embedding workload: a few milliseconds per text, and a
+    unit-length pseudo-random vector per text (the same text always gets
+    the same vector), packed as little-endian float32.
     """
-    job_id = job_data['jobId']
-    
-    completion_payload = {
-        "jobId": job_id,
-        "validatorId": VALIDATOR_ID,
-        "inferenceResult": result,
-        "success": True,
-        # The Router will handle building the Solana transaction using these inputs:
-        "feeAmount": job_data['feeAmount'],
-        "userWallet": job_data['userWallet']
-    }
-    
-    print(f"   [REPORT] Reporting job {job_id} completion to Router...")
-    
-    # MOCK ROUTER ENDPOINT: Assume a /request/complete endpoint exists
+    time.sleep(min(10, 0.2 + 0.005 * len(texts)))
+    values = array.array("f")
+    for text in texts:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(SIMULATED_EMBEDDING_DIMS)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        values.extend(v / norm for v in vector)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+def generation_params(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The job fields that change what a model generates for a given prompt.
+    """
+    params = {"max_tokens": int(job_data.get('maxTokens') or job_data.get('max_tokens') or DEFAULT_MAX_TOKENS)}
+    for name in ("temperature", "top_p", "seed"):
+        if job_data.get(name) is not None:
+            params[name] = job_data[name]
+    return params
+
+def run_inference(job_data: Dict[str, Any], validator: "ValidatorIdentity") -> Any:
+    """
+    Returns the job's result, from the result cache when an identical
+    (model, prompt, params) request was served recently, otherwise by running
+    the configured engine. With token streaming on, the result is also
+    forwarded to the router piece by piece as it is generated, on the
+    stream of the identity that claimed the job. Embedding jobs return
+    their packed vectors (see run_embedding).
+    """
+    if is_embedding_job(job_data):
+        return run_embedding(job_data, validator)
+    params = generation_params(job_data)
+    token_stream = validator.get_token_stream()
+    job_stream = token_stream.open_job(job_data['jobId'], job_data.get('model', '')) if token_stream else None
     try:
-        # Mock API Call - Replace with actual authenticated request
-        # response = requests.post(f"{ROUTER_API_URL}/request/complete", json=completion_payload, timeout=5)
-        # response.raise_for_status()
-        
-        # --- Mock Success Logic ---
-        print(f"   [SUCCESS] Router accepted completion for {job_id}. NSD Fee Split (70/20/10) triggered on Solana.")
-        print(f"   [REWARD] {job_data['feeAmount'] * 0.7:.4f} NSD reward secured for {VALIDATOR_ID}.")
-        # --- End Mock Success Logic ---
-
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR: Failed to report job completion for {job_id}. Router error: {e}")
-        # Implement robust retry/logging here to ensure payment
-        
-def main_loop():
+        return _run_inference(job_data, params, job_stream, validator)
+    finally:
+        if job_stream:
+            job_stream.done()
+
+def _run_inference(job_data: Dict[str, Any], params: Dict[str, Any], job_stream, validator: "ValidatorIdentity") -> str:
+    cache = get_result_cache()
+    if cache:
+        key = make_cache_key(job_data.get('model', ''), job_data['prompt'], params)
+        with tracing.span("cache_lookup"):
+            cached = cache.get(key)
+        if cached is not None:
+            print(f"   [CACHE] Hit for job {job_data['jobId']}. Skipping inference (hit rate {cache.hit_rate():.0%}).")
+            if job_stream:
+                job_stream(cached)
+            return cached
+
+    start = time.monotonic()
+    result = execute_inference(job_data, params["max_tokens"], job_stream, validator.validator_id)
+    elapsed = time.monotonic() - start
+    INFERENCE_LATENCY.observe(elapsed, model=job_data.get('model', ''))
+    estimator = get_runtime_estimator()
+    model = job_data.get('model', '')
+    generated = estimator.token_counter(model, result)
+    estimator.observe(job_data, elapsed, generated)
+    error = estimator.error(model)
+    if error is not None:
+        RUNTIME_ESTIMATE_ERROR.set(error, model=model)
+    # Feed per-token latency to the admission controller (cache hits are excluded above),
+    # per token actually generated: a short completion is not faster per token than a long one
+    validator.admission.on_sample(elapsed / max(1, generated), validator.load)
+    if cache:
+        cache.put(key, result)
+    return result
+
+def run_embedding(job_data: Dict[str, Any], validator: "ValidatorIdentity") -> Dict[str, Any]:
     """
-    The main execution loop for the Validator Client.
+    Embeds every text of an embedding job and returns the vectors as a
+    codec.encode_embeddings() payload. Embedding jobs skip the result cache
+    and token streaming, and are not fed to the admission controller, whose
+    per-token latency signal only fits generation.
     """
-    global current_gpu_load
-    print(f"--- NeuroSwarm Validator Client V0.2.0 Initialized ---")
-    print(f"Validator ID: {VALIDATOR_ID} | Max Capacity: {MAX_CAPACITY} jobs")
-    print(f"Press Ctrl+C to stop the client.")
-    
-    while True:
+    texts = embedding_texts(job_data)
+    model = job_data.get('model', '')
+    start = time.monotonic()
+    data, dims = execute_embedding(model, texts)
+    elapsed = time.monotonic() - start
+    INFERENCE_LATENCY.observe(elapsed, model=model)
+    EMBEDDED_TEXTS.inc(len(texts), model=model)
+    estimator = get_runtime_estimator()
+    estimator.observe(job_data, elapsed, 0)
+    error = estimator.error(model)
+    if error is not None:
+        RUNTIME_ESTIMATE_ERROR.set(error, model=model)
+    with tracing.span("serialize"):
+        return codec.encode_embeddings(data, len(texts), dims)
+
+def execute_embedding(model: str, texts: List[str]) -> Tuple[bytes, int]:
+    """
+    Runs the texts through the configured engine, EMBED_BATCH_SIZE at a time
+    with the onnx engine. Returns (packed little-endian float32 rows, dims).
+    """
+    print(f"   [INFERENCE] Embedding {len(texts)} texts with {model or 'the default model'}...")
+    if INFERENCE_ENGINE == "simulated":
+        with tracing.span("infer", model=model, batch_size=len(texts)):
+            return simulate_embedding(texts), SIMULATED_EMBEDDING_DIMS
+    pool = get_worker_pool()
+    if pool:
+        with tracing.span("infer", model=model, batch_size=len(texts)):
+            vectors, _ = pool.embed(model, texts, EMBED_BATCH_SIZE)
+    else:
+        with get_backends().lease(model) as backend:
+            vectors = backend.embed(texts, EMBED_BATCH_SIZE)
+    return vectors.astype("<f4", copy=False).tobytes(), (vectors.shape[1] if texts else 0)
+
+def execute_inference(job_data: Dict[str, Any], max_tokens: int, on_token=None, validator_id: str = VALIDATOR_ID) -> str:
+    """
+    Runs the job's prompt on the configured engine. With the onnx engine the
+    backend is picked from the job's `model` field. on_token, if given,
+    receives generated text as it is produced.
+    """
+    if INFERENCE_ENGINE == "simulated":
+        start = time.monotonic()
+        with tracing.span("infer", model=job_data.get('model', '')):
+            result = simulate_inference(job_data['prompt'], validator_id, on_token)
+        record_generation(job_data.get('model', ''), len(result.split()), time.monotonic() - start)
+        return result
+
+    model = job_data.get('model', '')
+    print(f"   [INFERENCE] Running {model} for {job_data['prompt'][:30]}... (max {max_tokens} tokens)")
+    batcher = get_batcher()
+    if batcher:
+        return batcher.submit(model, job_data['prompt'], max_tokens, on_token)
+    if get_worker_pool():
+        return run_batch(model, [job_data['prompt']], [max_tokens], [on_token])[0]
+    with get_backends().lease(model) as backend:
+        start = time.monotonic()
+        result = backend.generate(job_data['prompt'], max_tokens, on_token)
+        record_generation(model, backend.count_tokens(result), time.monotonic() - start)
+        return result
+
+def run_batch(model: str, prompts: List[str], max_tokens: List[int], on_token: List) -> List[str]:
+    """
+    Micro-batcher callback: one batched generation on the model's backend,
+    in a worker process when WORKER_PROCESSES is set.
+    """
+    pool = get_worker_pool()
+    if pool:
+        with tracing.span("infer", model=model, batch_size=len(prompts)):
+            results, tokens, elapsed = pool.generate_batch(model, prompts, max_tokens, on_token)
+        record_generation(model, tokens, elapsed)
+        return results
+    with get_backends().lease(model) as backend:
+        start = time.monotonic()
+        results = backend.generate_batch(prompts, max_tokens, on_token)
+        record_generation(model, sum(backend.count_tokens(r) for r in results), time.monotonic() - start)
+        return results
+
+def prefetch_job(job_data: Dict[str, Any]):
+    """
+    Prepares a job that is waiting for a slot: loads its model and tokenizes
+    its prompt, so it goes straight into inference when a slot frees up.
+    """
+    if INFERENCE_ENGINE != "onnx":
+        return
+    model = job_data.get('model', '')
+    try:
+        pool = get_worker_pool()
+        if pool:
+            pool.prepare(model)
+        else:
+            # Embedding texts are tokenized together when the job runs; only load the model
+            get_backends().prepare(model, [] if is_embedding_job(job_data) else [job_data['prompt']])
+    except Exception as e:
+        # The job itself will hit (and report) the same problem when it runs
+        print(f"   [PREFETCH] Could not prepare job {job_data['jobId']}: {e}")
+
+class ValidatorIdentity:
+    """
+    One validator identity hosted by this process: its own router polling,
+    slot accounting and admission limit, local scheduling queue, completion
+    outbox and token stream. Its running jobs also hold slots of the shared
+    MAX_CAPACITY budget (get_slot_budget()). Inference (sessions, worker processes, batcher,
+    result cache, runtime estimator) is shared by every identity in the
+    process, so a fleet of identities holds one copy of each model.
+    """
+
+    def __init__(self, validator_id: str, outbox_path: str):
+        self.validator_id = validator_id
+        self.outbox_path = outbox_path
+        self.load = 0 # Number of this identity's jobs currently in flight
+        # Guards load; workers notify it when they release a slot so the
+        # poll loop can claim new work without waiting out a full poll interval.
+        self.lock = threading.Lock()
+        self.slot_released = threading.Condition(self.lock)
+        # Claimed jobs that have not been reported or handed back yet, those
+        # whose completion is being written to the outbox, and when each
+        # running job started (all guarded by lock)
+        self.in_flight: Dict[str, Dict[str, Any]] = {}
+        self.reporting = set()
+        self.started_at: Dict[str, float] = {}
+        self.admission: ConcurrencyLimit = make_limit(ADMISSION_ALGORITHM, MAX_CAPACITY)
+        self.scheduler = JobScheduler(SCHEDULING_POLICY, get_runtime_estimator())
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.prefetcher: Optional[ThreadPoolExecutor] = None
+        self.outbox: Optional[CompletionOutbox] = None
+        self.token_stream: Optional[TokenStream] = None
+
+    def get_token_stream(self) -> Optional[TokenStream]:
+        """
+        Returns the persistent token stream to the router, or None when
+        streaming is off or the mock router is in use.
+        """
+        if self.token_stream is None and STREAM_TOKENS and not USE_MOCK_ROUTER:
+            self.token_stream = TokenStream(f"{ROUTER_API_URL}/validator/stream/{self.validator_id}", self.validator_id)
+            self.token_stream.start()
+        return self.token_stream
+
+    def get_outbox(self) -> CompletionOutbox:
+        """
+        Returns the completion outbox, replaying any unsent entries from a
+        previous run and starting its flusher on first use.
+        """
+        if self.outbox is None:
+            self.outbox = CompletionOutbox(self.outbox_path, self.deliver_completions)
+            self.outbox.start()
+        return self.outbox
+
+    def poll_for_jobs(self, wait_seconds: float = 0, max_jobs: int = 1) -> List[Dict[str, Any]]:
+        """
+        Claims up to max_jobs jobs assigned to this validator in one round trip.
+        Callers size max_jobs to their free slots so a burst of assignments fills
+        capacity in a single cycle. Returns an empty list when nothing is assigned.
+
+        With wait_seconds > 0 this is a long-poll: the router holds the request
+        open until a job is assigned to us or the wait expires (HTTP 204), so jobs
+        arrive as soon as they are assigned instead of on the next poll tick.
+        """
+        print(f"\n[{time.strftime('%H:%M:%S')}] Polling Router for up to {max_jobs} job(s) assigned to {self.validator_id}...")
+
+        start = time.monotonic()
+        delivery = "longpoll" if wait_seconds > 0 else "interval"
         try:
-            # 1. Poll for a new job
-            job_data = poll_for_jobs()
-            
-            if job_data:
-                if current_gpu_load < MAX_CAPACITY:
-                    current_gpu_load += 1
-                    print(f"   [ASSIGNED] Job {job_data['jobId']} received. Current Load: {current_gpu_load}/{MAX_CAPACITY}")
-                    
-                    # 2. Process the job concurrently (simulated)
-                    result = simulate_inference(job_data['prompt'])
-                    
-                    # 3. Report completion and trigger fee split
-                    report_completion(job_data, result)
-                    
-                    # 4. Release capacity
-                    current_gpu_load -= 1
-                    print(f"   [CLEARED] Capacity released. Current Load: {current_gpu_load}/{MAX_CAPACITY}")
+            # We also send our current capacity/health status to the router
+            health_data = {
+                "capacity": max(0, min(self.admission.limit - self.load, get_slot_budget().free) - len(self.scheduler)),
+                "is_throttled": self.admission.limit < MAX_CAPACITY,
+                "concurrency_limit": self.admission.limit,
+                "max_jobs": max_jobs,
+                "backlog_seconds": round(self.predicted_backlog_seconds(), 2),
+            }
+            if _telemetry:
+                # Averages of the sampler's latest readings; no file reads on the poll path
+                health_data.update(_telemetry.smoothed())
+            if _result_cache:
+                health_data["cache_hit_rate"] = round(_result_cache.hit_rate(), 4)
+
+            if USE_MOCK_ROUTER:
+                # --- Mock Response Logic (since we don't have the real router running) ---
+                mock_jobs = []
+                for _ in range(max_jobs):
+                    if random.random() < 0.2: # 20% chance of receiving a job per free slot
+                        mock_jobs.append({
+                            "jobId": f"job-{random.randint(1000, 9999)}",
+                            "prompt": "Write a 5-sentence summary of the NeuroSwarm economic model.",
+                            "feeAmount": 0.5, # NSD
+                            "assignedValidator": self.validator_id,
+                            "userWallet": "AABBCCDD...",
+                            "model": "NS-LLM-70B"
+                        })
+                if not mock_jobs:
+                    time.sleep(wait_seconds) # Behave like a long-poll that timed out
+                POLLS.inc(result="job" if mock_jobs else "empty")
+                return mock_jobs
+                # --- End Mock Response Logic ---
+
+            if wait_seconds > 0:
+                health_data["wait_ms"] = int(wait_seconds * 1000)
+
+            # The read timeout must outlast the router's hold time
+            response = get_transport().post("poll", f"/validator/poll/{self.validator_id}", health_data, extra_wait=wait_seconds)
+            POLL_LATENCY.observe(time.monotonic() - start, delivery=delivery)
+            if response.status_code == 204: # No job assigned
+                POLLS.inc(result="empty")
+                return []
+            response.raise_for_status()
+            body = get_transport().decode(response)
+            # Routers without batch support answer with a single job object
+            jobs = body["jobs"] if "jobs" in body else [body]
+            POLLS.inc(result="job" if jobs else "empty")
+            return jobs
+
+        except TRANSPORT_ERRORS as e:
+            POLLS.inc(result="error")
+            print(f"ERROR: Could not connect to Router API. Check router status. Details: {e}")
+            if wait_seconds > 0:
+                time.sleep(POLL_INTERVAL_SECONDS) # Don't hammer a router that is down
+            return []
+
+    def report_completion(self, job_data: Dict[str, Any], result: Any):
+        """
+        Records the completed job in the durable outbox. The outbox flusher
+        reports it to the Router, which triggers the Solana 'complete_request'
+        instruction and the 70/20/10 fee split. Returns once the completion is
+        on disk, so the job loop never waits on router availability. When tokens
+        were streamed, this is the final commit for the stream.
+        """
+        job_id = job_data['jobId']
+
+        with tracing.span("serialize"):
+            completion_payload = {
+                "jobId": job_id,
+                "validatorId": self.validator_id,
+                "inferenceResult": result,
+                "success": True,
+                # The Router will handle building the Solana transaction using these inputs:
+                "feeAmount": job_data['feeAmount'],
+                "userWallet": job_data['userWallet']
+            }
+
+        # Covers the fsync'd outbox write; delivery to the router happens asynchronously
+        with tracing.span("report"):
+            self.get_outbox().enqueue(completion_payload)
+        print(f"   [REPORT] Job {job_id} completion queued for delivery to Router.")
+
+    def deliver_completions(self, batch: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Outbox sender: reports a batch of completions to the Router. Returns
+        {jobId: "delivered" | "rejected"} for every entry the router settled;
+        anything missing is retried by the outbox with backoff.
+        """
+        global _batch_endpoint_supported
+        results = {}
+
+        if USE_MOCK_ROUTER:
+            results = {payload["jobId"]: "delivered" for payload in batch}
+        else:
+            if _batch_endpoint_supported and len(batch) > 1:
+                start = time.monotonic()
+                response = get_transport().post("complete", "/request/complete/batch", {"completions": batch})
+                REPORT_LATENCY.observe(time.monotonic() - start, endpoint="batch")
+                if response.status_code == 404:
+                    print("   [REPORT] Router has no batch completion endpoint; reporting individually.")
+                    _batch_endpoint_supported = False
+                elif response.status_code in REJECTED_COMPLETION_STATUSES:
+                    # Some entry is unacceptable; report one by one so only that one is dropped
+                    print(f"   [REPORT] Router refused the completion batch (HTTP {response.status_code}); reporting individually.")
                 else:
-                    print(f"   [BUSY] Max capacity reached ({MAX_CAPACITY}). Skipping job poll cycle.")
-            
-            # Wait for the next poll cycle
-            time.sleep(POLL_INTERVAL_SECONDS)
+                    response.raise_for_status()
+                    results = {payload["jobId"]: "delivered" for payload in batch}
 
-        except KeyboardInterrupt:
-            print("\nShutting down Validator Client...")
-            break
+            if not results:
+                for payload in batch:
+                    try:
+                        start = time.monotonic()
+                        response = get_transport().post("complete", "/request/complete", payload)
+                        REPORT_LATENCY.observe(time.monotonic() - start, endpoint="single")
+                    except TRANSPORT_ERRORS as e:
+                        print(f"ERROR: Failed to report job completion for {payload['jobId']}. Router error: {e}")
+                        break
+                    if response.status_code in REJECTED_COMPLETION_STATUSES:
+                        # The router will never accept this one (unknown job, bad payload); don't retry it forever
+                        print(f"ERROR: Router rejected completion for {payload['jobId']} ({response.status_code}). Dropping.")
+                        results[payload["jobId"]] = "rejected"
+                    elif 200 <= response.status_code < 300:
+                        results[payload["jobId"]] = "delivered"
+                    else:
+                        # 5xx, and 4xx that may pass later (408, 429, 401/403 auth blips): keep it pending
+                        print(f"ERROR: Failed to report job completion for {payload['jobId']}. Router error: HTTP {response.status_code}")
+                        break
+
+        for payload in batch:
+            if results.get(payload["jobId"]) == "delivered":
+                print(f"   [SUCCESS] Router accepted completion for {payload['jobId']}. NSD Fee Split (70/20/10) triggered on Solana.")
+                print(f"   [REWARD] {payload['feeAmount'] * 0.7:.4f} NSD reward secured for {self.validator_id}.")
+        return results
+
+    def _take_slot(self, job_data: Dict[str, Any]):
+        # Caller holds self.lock and one slot of the shared budget. Reserves a
+        # processing slot for a job the router has already handed us and tracks
+        # it until it is reported or handed back. Claims are sized to free slots
+        # under the admission limit, so a claimed job is always run even if the
+        # limit shrank after the poll.
+        self.load += 1
+        self.in_flight[job_data['jobId']] = job_data
+
+    def release_slot(self):
+        """
+        Frees a processing slot and wakes the poll loop if it is waiting for one.
+        """
+        with self.lock:
+            self.load -= 1
+            self.slot_released.notify_all()
+        get_slot_budget().release()
+        # The freed hardware slot may be the one another identity is waiting for
+        for validator in _validators:
+            if validator is not self:
+                with validator.lock:
+                    validator.slot_released.notify_all()
+
+    def begin_report(self, job_id: str) -> bool:
+        """
+        Moves a finished job from in-flight to reporting. Returns False if the
+        job was already handed back to the router (its result must not be reported).
+        """
+        with self.lock:
+            if self.in_flight.pop(job_id, None) is None:
+                return False
+            self.reporting.add(job_id)
+            return True
+
+    def end_report(self, job_id: str):
+        with self.lock:
+            self.reporting.discard(job_id)
+            self.slot_released.notify_all()
+
+    def hand_back_job(self, job_data: Dict[str, Any], reason: str):
+        """
+        Returns an unfinished job to the Router so it can be reassigned right
+        away instead of waiting for router-timeout-monitor to expire it.
+        """
+        job_id = job_data['jobId']
+        if USE_MOCK_ROUTER:
+            print(f"   [DRAIN] [MOCK] Job {job_id} handed back to the Router ({reason}).")
+            return
+        try:
+            response = get_transport().post("release", "/request/release",
+                                            {"jobId": job_id, "validatorId": self.validator_id, "reason": reason})
+        except TRANSPORT_ERRORS as e:
+            print(f"   [DRAIN] Could not hand back job {job_id}: {e}. The router will requeue it on timeout.")
+            return
+        if response.status_code == 404:
+            print(f"   [DRAIN] Router has no release endpoint; job {job_id} will be requeued on timeout.")
+        elif response.status_code >= 400:
+            print(f"   [DRAIN] Router refused the hand-back of job {job_id} (HTTP {response.status_code}).")
+        else:
+            print(f"   [DRAIN] Job {job_id} handed back to the Router ({reason}).")
+
+    def run_job(self, job_data: Dict[str, Any], polled_at: float, claimed_at: float, deadline: float):
+        """
+        Executes a single claimed job end-to-end: inference, then completion report.
+        The caller must already hold a slot; it is always released here.
+        polled_at / claimed_at are the time.time() at which the poll that
+        delivered the job was sent and returned; deadline is the one the
+        scheduler assigned when the job was queued.
+        """
+        started = time.time()
+        QUEUE_WAIT.observe(started - claimed_at)
+        with self.lock:
+            self.started_at[job_data['jobId']] = started
+        trace = get_tracer().start(job_data['jobId'], model=job_data.get('model', ''), validatorId=self.validator_id)
+        trace.add("receive", polled_at, claimed_at)
+        trace.add("queue", claimed_at, started)
+        profiler = get_profiler()
+        if profiler:
+            profiler.job_started(job_data['jobId'])
+        job_id = job_data['jobId']
+        try:
+            with tracing.activate([trace]):
+                # 2. Process the job
+                result = run_inference(job_data, self)
+
+                # 3. Report completion and trigger fee split
+                if self.begin_report(job_id):
+                    try:
+                        self.report_completion(job_data, result)
+                    finally:
+                        self.end_report(job_id)
+                    if time.time() > deadline:
+                        JOBS_PAST_DEADLINE.inc()
+                else:
+                    print(f"   [DRAIN] Job {job_id} finished after it was handed back; discarding its result.")
         except Exception as e:
-            print(f"An unexpected error occurred in the main loop: {e}")
-            time.sleep(POLL_INTERVAL_SECONDS * 2) # Wait longer on error
+            trace.attributes["error"] = str(e)
+            print(f"   [ERROR] Job {job_id} failed: {e}")
+            with self.lock:
+                job_was_ours = self.in_flight.pop(job_id, None) is not None
+            if job_was_ours and _draining.is_set():
+                self.hand_back_job(job_data, "failed during shutdown")
+        except BaseException:
+            # Ctrl+C / SIGTERM aborted an inline job on the poll thread. Nothing will
+            # finish it, so hand it back now rather than have the drain wait for it.
+            trace.attributes["error"] = "interrupted"
+            with self.lock:
+                job_was_ours = self.in_flight.pop(job_id, None) is not None
+            if job_was_ours:
+                self.hand_back_job(job_data, "validator shutting down")
+            raise
+        finally:
+            if profiler:
+                profiler.job_finished(time.time() - polled_at)
+            get_tracer().finish(trace)
+            # 4. Release capacity
+            with self.lock:
+                self.started_at.pop(job_id, None)
+            self.release_slot()
+            print(f"   [CLEARED] Capacity released. Current Load: {self.load}/{self.admission.limit}")
+
+    def predicted_backlog_seconds(self) -> float:
+        """
+        Predicted seconds until the jobs claimed so far are done: the remaining
+        estimated runtime of running jobs plus that of locally queued jobs,
+        spread over the concurrency limit.
+        """
+        estimator = get_runtime_estimator()
+        now = time.time()
+        with self.lock:
+            running = [(job, self.started_at.get(job_id, now)) for job_id, job in self.in_flight.items()]
+        seconds = sum(max(0.0, estimator.estimate(job) - (now - started)) for job, started in running)
+        seconds += self.scheduler.queued_seconds()
+        return seconds / max(1, self.admission.limit)
+
+    def _free_room(self, queue_depth: int) -> int:
+        # Caller holds self.lock. Free slots (under both our limit and the shared
+        # budget) plus free places in the local queue.
+        queued = len(self.scheduler)
+        return min(self.admission.limit - self.load, get_slot_budget().free) + queue_depth - queued
+
+    def wait_for_free_slot(self, timeout: float, queue_depth: int = 0) -> bool:
+        """
+        Blocks until a slot (or, with queue_depth, a place in the local queue)
+        is free or the timeout expires. Returns True if one is free.
+        """
+        with self.lock:
+            return self.slot_released.wait_for(lambda: self._free_room(queue_depth) > 0, timeout=timeout)
+
+    def dispatch_jobs(self, executor: ThreadPoolExecutor):
+        """
+        Starts queued jobs on the executor, in scheduling-policy order, whenever
+        a slot is free under the admission limit. Runs until shutdown starts.
+        """
+        scheduler = self.scheduler
+        while not _draining.is_set():
+            if not scheduler.wait(timeout=1.0):
+                continue
+            with self.lock:
+                # Popping and taking the slot under the lock keeps every job either queued or in flight for the drain
+                if not self.slot_released.wait_for(lambda: self.load < self.admission.limit or _draining.is_set(), timeout=1.0):
+                    continue
+                entry = None
+                if not _draining.is_set() and get_slot_budget().try_acquire():
+                    entry = scheduler.pop()
+                    if entry is None:
+                        get_slot_budget().release()
+                    else:
+                        self._take_slot(entry.job)
+            if entry is None:
+                get_slot_budget().wait_free(timeout=1.0) # Other identities hold every hardware slot
+                continue
+            print(f"   [ASSIGNED] Job {entry.job['jobId']} started. Current Load: {self.load}/{self.admission.limit}")
+            executor.submit(self.run_job, entry.job, *entry.context, entry.deadline)
+
+    def hand_back_queued(self) -> int:
+        """Shutdown: hands back the jobs still waiting in the local queue. Returns how many."""
+        with self.lock: # The dispatcher only starts jobs (and the poll loop only queues them) while holding it
+            queued = [entry.job for entry in self.scheduler.drain()]
+        for job_data in queued:
+            self.hand_back_job(job_data, "validator shutting down (not started)")
+        return len(queued)
+
+    def unfinished(self) -> int:
+        with self.lock:
+            return len(self.in_flight) + len(self.reporting)
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Blocks until every in-flight job has committed its completion or the timeout expires."""
+        with self.lock:
+            return self.slot_released.wait_for(lambda: not self.in_flight and not self.reporting, timeout=timeout)
+
+    def hand_back_unfinished(self) -> int:
+        """
+        Shutdown: hands back the jobs that are still running (their results
+        will be discarded) and waits briefly for completions already being
+        written to reach the outbox. Returns how many were handed back.
+        """
+        with self.lock:
+            unfinished = list(self.in_flight.values())
+            self.in_flight.clear()
+        for job_data in unfinished:
+            self.hand_back_job(job_data, "validator shutting down")
+        with self.lock:
+            self.slot_released.wait_for(lambda: not self.reporting, timeout=5)
+        return len(unfinished)
+
+    def start(self, mode: str, prefetcher: Optional[ThreadPoolExecutor]):
+        """Starts the job executor and dispatcher (pool mode) and the completion outbox."""
+        self.prefetcher = prefetcher
+        if mode == "pool":
+            self.executor = ThreadPoolExecutor(max_workers=MAX_CAPACITY, thread_name_prefix=f"job-{self.validator_id}")
+            threading.Thread(target=self.dispatch_jobs, args=(self.executor,),
+                             name=f"job-dispatch-{self.validator_id}", daemon=True).start()
+        self.get_outbox() # Start delivering completions left over from a previous run
+
+    def poll_loop(self, long_poll: bool):
+        """
+        Claims jobs for this identity until shutdown starts (or, in the main
+        thread, until Ctrl+C / SIGTERM).
+        """
+        queue_depth = LOCAL_QUEUE_DEPTH if self.executor else 0
+        while not _draining.is_set():
+            try:
+                # Don't poll when every slot (and queue place) is taken; resume as soon as one frees up.
+                if not self.wait_for_free_slot(timeout=POLL_INTERVAL_SECONDS, queue_depth=queue_depth):
+                    print(f"   [BUSY] {self.validator_id}: concurrency limit reached ({self.admission.limit}/{MAX_CAPACITY}). Skipping job poll cycle.")
+                    continue
+
+                # 1. Claim as many jobs as we have room for
+                # (at least one: wait_for_free_slot saw room, and room can only have grown since).
+                # Inline mode runs jobs one after another on this thread, so it claims one at a
+                # time: a job claimed behind others could pass its router timeout before it starts.
+                with self.lock:
+                    room = max(1, self._free_room(queue_depth)) if self.executor else 1
+                polled_at = time.time()
+                jobs = self.poll_for_jobs(LONG_POLL_SECONDS if long_poll else 0, max_jobs=room)
+
+                claimed_at = time.time()
+                for job_data in jobs:
+                    self._accept(job_data, polled_at, claimed_at)
+                if not self.executor:
+                    self.run_queued()
+
+                if jobs:
+                    # Poll again straight away while there is spare capacity
+                    continue
+
+                # Wait for the next poll cycle (a long-poll already waited on the router)
+                if not long_poll:
+                    time.sleep(POLL_INTERVAL_SECONDS)
+
+            except KeyboardInterrupt:
+                print("\nShutting down Validator Client (no new jobs will be claimed)...")
+                break
+            except Exception as e:
+                print(f"An unexpected error occurred in the main loop: {e}")
+                time.sleep(POLL_INTERVAL_SECONDS * 2) # Wait longer on error
+
+    def _accept(self, job_data: Dict[str, Any], polled_at: float, claimed_at: float):
+        if _job_recorder:
+            _job_recorder.record(job_data)
+        # Every claimed job goes through the local queue (inline mode too), so a
+        # drain always finds the claimed jobs that have not started yet.
+        # The runtime estimate may load a tokenizer; compute it before taking the lock.
+        entry = self.scheduler.prepare(job_data, polled_at, claimed_at)
+        with self.lock:
+            # Checked under the lock so a job claimed while shutdown starts is never left queued
+            draining = _draining.is_set()
+            if not draining:
+                self.scheduler.add(entry)
+            busy = self.load >= self.admission.limit
+        if draining:
+            self.hand_back_job(job_data, "validator shutting down (not started)")
+            return
+        print(f"   [ASSIGNED] Job {job_data['jobId']} received. Queued: {len(self.scheduler)}")
+        if self.executor and busy and self.prefetcher:
+            # Every slot is busy: prepare the job while it waits
+            self.prefetcher.submit(prefetch_job, job_data)
+
+    def run_queued(self):
+        """
+        Inline mode: runs the queued jobs one after another on the calling
+        (poll) thread. Jobs not started when shutdown begins stay queued for
+        drain_in_flight to hand back.
+        """
+        while not _draining.is_set():
+            if not get_slot_budget().acquire(timeout=1.0): # Other identities hold every hardware slot
+                continue
+            with self.lock:
+                # Popping and taking the slot under the lock keeps every job either queued or in flight for the drain
+                entry = self.scheduler.pop()
+                if entry is None:
+                    get_slot_budget().release()
+                    return
+                self._take_slot(entry.job)
+            print(f"   [ASSIGNED] Job {entry.job['jobId']} started. Current Load: {self.load}/{self.admission.limit}")
+            self.run_job(entry.job, *entry.context, entry.deadline)
+
+    def close(self, outbox_timeout: float) -> int:
+        """Stops the executor, token stream and outbox. Returns the completions left undelivered."""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.token_stream:
+            self.token_stream.close()
+        return self.get_outbox().close(timeout=outbox_timeout)
+
+def drain_in_flight(validators: List[ValidatorIdentity], timeout: float) -> int:
+    """
+    Graceful shutdown, after polling has stopped: lets in-flight jobs finish
+    and commit their completions for up to `timeout` seconds, then hands the
+    unfinished ones back to the Router. A second Ctrl+C skips the wait.
+    Returns the number of jobs handed back.
+    """
+    handed_back = sum(validator.hand_back_queued() for validator in validators)
+    count = sum(validator.unfinished() for validator in validators)
+    if count:
+        print(f"   [DRAIN] Waiting up to {timeout:g}s for {count} in-flight job(s) to finish...")
+        deadline = time.monotonic() + timeout
+        try:
+            for validator in validators:
+                validator.wait_idle(max(0.0, deadline - time.monotonic()))
+        except KeyboardInterrupt:
+            print("   [DRAIN] Interrupted again; handing back the remaining jobs now.")
+    return handed_back + sum(validator.hand_back_unfinished() for validator in validators)
+
+def outbox_path_for(validator_id: str) -> str:
+    """OUTBOX_PATH, made unique per identity when several share the process."""
+    if len(VALIDATOR_IDS) <= 1:
+        return OUTBOX_PATH
+    base, ext = os.path.splitext(OUTBOX_PATH)
+    return f"{base}.{validator_id}{ext}"
+
+def main_loop(mode: str = "pool", delivery: str = "interval"):
+    """
+    The main execution loop for the Validator Client.
+
+    Every identity in VALIDATOR_IDS polls and reports on its own (the first
+    in this thread, the others in background threads) while they all share
+    the inference sessions, worker processes, batcher and caches, so adding
+    identities does not add model copies.
+
+    In "pool" mode (default) claimed jobs run on a worker pool sized to
+    MAX_CAPACITY, so polling continues while inference is in progress.
+    While every slot is busy the poll keeps claiming up to LOCAL_QUEUE_DEPTH
+    jobs ahead; they are prefetched (model loaded, prompt tokenized) and
+    wait in the local scheduling queue, so a freed slot starts the next job
+    immediately, in SCHEDULING_POLICY order.
+    "inline" mode keeps the original one-job-at-a-time behaviour.
+
+    delivery="interval" polls every POLL_INTERVAL_SECONDS; delivery="longpoll"
+    keeps a long-poll open against the router so jobs are pushed immediately.
+
+    Ctrl+C or SIGTERM stops claiming jobs and drains: in-flight jobs get
+    DRAIN_TIMEOUT_SECONDS to finish, the rest are handed back to the Router,
+    then the outbox is flushed.
+    """
+    long_poll = delivery == "longpoll"
+    validators = [ValidatorIdentity(validator_id, outbox_path_for(validator_id)) for validator_id in VALIDATOR_IDS]
+    _validators.extend(validators)
+    print(f"--- NeuroSwarm Validator Client V0.2.0 Initialized ---")
+    print(f"Validator ID: {', '.join(VALIDATOR_IDS)} | Max Capacity: {MAX_CAPACITY} jobs | Admission: {ADMISSION_ALGORITHM} | Mode: {mode} | Delivery: {delivery}")
+    if len(validators) > 1:
+        print(f"Fleet: {len(validators)} identities sharing one set of models and {MAX_CAPACITY} job slots; admission limits are per identity")
+    if mode == "pool":
+        print(f"Scheduling: {SCHEDULING_POLICY} | Local queue: {LOCAL_QUEUE_DEPTH} job(s) beyond free slots")
+    print(f"Press Ctrl+C to stop the client.")
+
+    prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") if mode == "pool" else None
+    for validator in validators:
+        validator.start(mode, prefetcher)
+    signal.signal(signal.SIGTERM, signal.default_int_handler) # Orchestrators stop with SIGTERM; drain the same way
+    get_telemetry()
+    get_job_recorder()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT, METRICS_HOST)
+        print(f"Metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    if INFERENCE_ENGINE == "onnx" and WORKER_PROCESSES > 0:
+        get_worker_pool() # Start the workers before the first job arrives
+    if INFERENCE_ENGINE == "onnx" and PRELOAD_MODELS:
+        (get_worker_pool() or get_backends()).preload(PRELOAD_MODELS)
+
+    for validator in validators[1:]:
+        threading.Thread(target=validator.poll_loop, args=(long_poll,),
+                         name=f"poll-{validator.validator_id}", daemon=True).start()
+    validators[0].poll_loop(long_poll) # Returns on Ctrl+C / SIGTERM
+
+    _draining.set()
+    handed_back = drain_in_flight(validators, DRAIN_TIMEOUT_SECONDS)
+    if prefetcher:
+        prefetcher.shutdown(wait=False, cancel_futures=True)
+    deadline = time.monotonic() + OUTBOX_DRAIN_SECONDS
+    for validator in validators:
+        remaining = validator.close(max(0.0, deadline - time.monotonic()))
+        if remaining:
+            print(f"   [OUTBOX] {validator.validator_id}: {remaining} completion(s) still pending; they will be replayed on next start.")
+    get_tracer().close()
+    if _telemetry:
+        _telemetry.close()
+    if _job_recorder:
+        _job_recorder.close()
+        print(f"   [TRACE] Recorded {_job_recorder.recorded} job(s) to {JOB_TRACE_PATH}.")
+    if _profiler:
+        _profiler.close()
+    if _worker_pool:
+        _worker_pool.close()
+    if handed_back:
+        # Job threads may still be computing results nobody will report; exit without waiting for them
+        sys.stdout.flush()
+        os._exit(0)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NeuroSwarm Validator Client")
+    parser.add_argument('--mode', choices=['pool', 'inline'], default='pool',
+                        help='pool: run up to MAX_CAPACITY jobs concurrently; inline: one job at a time')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, help='Port for the Prometheus /metrics endpoint (0 disables)')
+    parser.add_argument('--metrics-host', default=METRICS_HOST, help='Interface the metrics endpoint binds to')
+    parser.add_argument('--trace-file', help='Append a per-job stage timing trace (JSONL) to this file')
+    parser.add_argument('--otlp-endpoint', help='Also export job traces to this OpenTelemetry collector (OTLP/HTTP JSON)')
+    parser.add_argument('--profile-slowest', type=int, default=PROFILE_SLOWEST,
+                        help='Keep sampled stack profiles (flame-graph collapsed stacks) of the N slowest jobs')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR, help='Directory for slow-job profiles')
+    parser.add_argument('--record-jobs', help='Record claimed jobs (arrival time, prompt, model, params) to this trace file for load_driver.py --replay')
+    parser.add_argument('--telemetry-interval', type=float, default=TELEMETRY_INTERVAL_SECONDS,
+                        help='Seconds between host health samples (CPU, load, memory, RSS, temperature) sent with polls; 0 disables')
+    parser.add_argument('--admission', choices=sorted(ALGORITHMS), default=ADMISSION_ALGORITHM,
+                        help='How the number of accepted jobs adapts: fixed (MAX_CAPACITY), aimd or gradient (latency-driven)')
+    parser.add_argument('--schedule', choices=sorted(POLICIES), default=SCHEDULING_POLICY,
+                        help='Order in which claimed jobs start: fifo, edf (earliest deadline) or wsjf (fee per estimated second, deadline-aware)')
+    parser.add_argument('--queue-depth', type=int,
+                        help=f'Jobs claimed ahead of free slots (prefetched, then started in --schedule order); '
+                             f'default {LOCAL_QUEUE_DEPTH} for fifo, MAX_CAPACITY otherwise; 0 disables prefetch')
+    parser.add_argument('--delivery', choices=['interval', 'longpoll'], default='interval',
+                        help='interval: poll every POLL_INTERVAL_SECONDS; longpoll: router holds the poll until a job is assigned')
+    parser.add_argument('--validator-id', default=VALIDATOR_ID,
+                        help='Validator ID used when polling and reporting; comma-separate several to run them as a fleet sharing one set of models')
+    parser.add_argument('--router-url', help=f'Router API base URL (e.g. {ROUTER_API_URL}); omit to use the built-in mock router')
+    parser.add_argument('--http2', action='store_true', help='Talk to the router over HTTP/2 (requires httpx[http2])')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream tokens to the router as they are generated (final completion still triggers the fee split)')
+    parser.add_argument('--wire-formats', help='Comma-separated body formats to negotiate with the router (msgpack,cbor,json); default: all installed')
+    parser.add_argument('--wire-encodings', help='Comma-separated content codings to negotiate (zstd,gzip); empty string disables compression')
+    parser.add_argument('--outbox', default=OUTBOX_PATH, help='Path of the durable completion outbox (WAL)')
+    parser.add_argument('--drain-timeout', type=float, default=DRAIN_TIMEOUT_SECONDS,
+                        help='Seconds in-flight jobs get to finish on shutdown before they are handed back to the router')
+    parser.add_argument('--engine', choices=['simulated', 'onnx'], default=INFERENCE_ENGINE,
+                        help='simulated: sleep-based placeholder; onnx: ONNX Runtime CPU inference on exported models')
+    parser.add_argument('--models-dir', default=MODELS_DIR, help='Directory containing exported models (one sub-directory per model)')
+    parser.add_argument('--default-model', help='Exported model to use for jobs whose model is not available locally')
+    parser.add_argument('--intra-op-threads', type=int, default=SESSION_OPTIONS['intra_op_num_threads'],
+                        help='ONNX Runtime intra-op threads (0 = runtime default)')
+    parser.add_argument('--inter-op-threads', type=int, default=SESSION_OPTIONS['inter_op_num_threads'],
+                        help='ONNX Runtime inter-op threads (0 = runtime default)')
+    parser.add_argument('--graph-opt-level', choices=['disable', 'basic', 'extended', 'all'],
+                        default=SESSION_OPTIONS['graph_optimization_level'], help='ONNX Runtime graph optimization level')
+    parser.add_argument('--model-memory-mb', type=float, help='RAM budget for resident models; LRU idle models are evicted beyond it')
+    parser.add_argument('--prefix-cache-mb', type=float, default=PREFIX_CACHE_MB,
+                        help='KV cache of shared prompt prefixes per with-past ONNX model (0 disables it)')
+    parser.add_argument('--workers', type=int, default=WORKER_PROCESSES,
+                        help='Run ONNX inference in N worker processes sharing memory-mapped weights (see share_weights.py); 0 runs it in this process')
+    parser.add_argument('--preload', default='', help='Comma-separated models to load in the background at startup')
+    parser.add_argument('--batch-size', type=int, default=BATCH_MAX_SIZE,
+                        help='Max prompts per batched inference call for the same model (1 disables batching)')
+    parser.add_argument('--batch-wait-ms', type=float, default=BATCH_MAX_WAIT_MS,
+                        help='Max time a prompt waits for others to join its batch')
+    parser.add_argument('--embed-batch-size', type=int, default=EMBED_BATCH_SIZE,
+                        help='Texts per ONNX run within an embedding job')
+    parser.add_argument('--cache-entries', type=int, default=CACHE_MAX_ENTRIES, help='Max cached inference results (0 disables the cache)')
+    parser.add_argument('--cache-mb', type=float, default=CACHE_MAX_BYTES / (1024 * 1024), help='Max memory used by cached results, in MB')
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL_SECONDS, help='Seconds a cached result stays valid')
+    parser.add_argument('--cache-path', help='SQLite file used to persist the result cache across restarts')
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main_loop()
+    args = parse_args()
+    VALIDATOR_IDS = [v.strip() for v in args.validator_id.split(',') if v.strip()]
+    VALIDATOR_ID = VALIDATOR_IDS[0]
+    if args.router_url:
+        ROUTER_API_URL = args.router_url.rstrip('/')
+        USE_MOCK_ROUTER = False
+    USE_HTTP2 = args.http2
+    if args.wire_formats is not None:
+        WIRE_FORMATS = [f.strip() for f in args.wire_formats.split(',') if f.strip()]
+    if args.wire_encodings is not None:
+        WIRE_ENCODINGS = [e.strip() for e in args.wire_encodings.split(',') if e.strip()]
+    ADMISSION_ALGORITHM = args.admission
+    SCHEDULING_POLICY = args.schedule
+    if args.queue_depth is not None:
+        LOCAL_QUEUE_DEPTH = args.queue_depth
+    elif SCHEDULING_POLICY != "fifo":
+        LOCAL_QUEUE_DEPTH = MAX_CAPACITY # Reordering needs jobs waiting to choose between
+    METRICS_PORT = args.metrics_port
+    METRICS_HOST = args.metrics_host
+    TRACE_PATH = args.trace_file
+    OTLP_ENDPOINT = args.otlp_endpoint
+    PROFILE_SLOWEST = args.profile_slowest
+    PROFILE_DIR = args.profile_dir
+    TELEMETRY_INTERVAL_SECONDS = args.telemetry_interval
+    JOB_TRACE_PATH = args.record_jobs
+    OUTBOX_PATH = args.outbox
+    DRAIN_TIMEOUT_SECONDS = args.drain_timeout
+    STREAM_TOKENS = args.stream
+    INFERENCE_ENGINE = args.engine
+    MODELS_DIR = args.models_dir
+    DEFAULT_MODEL = args.default_model
+    SESSION_OPTIONS.update(intra_op_num_threads=args.intra_op_threads,
+                           inter_op_num_threads=args.inter_op_threads,
+                           graph_optimization_level=args.graph_opt_level)
+    MODEL_MEMORY_BUDGET_MB = args.model_memory_mb
+    PREFIX_CACHE_MB = args.prefix_cache_mb
+    WORKER_PROCESSES = args.workers if INFERENCE_ENGINE == "onnx" else 0
+    PRELOAD_MODELS = [m.strip() for m in args.preload.split(',') if m.strip()]
+    BATCH_MAX_SIZE = args.batch_size
+    BATCH_MAX_WAIT_MS = args.batch_wait_ms
+    EMBED_BATCH_SIZE = args.embed_batch_size
+    CACHE_MAX_ENTRIES = args.cache_entries
+    CACHE_MAX_BYTES = int(args.cache_mb * 1024 * 1024)
+    CACHE_TTL_SECONDS = args.cache_ttl
+    CACHE_PATH = args.cache_path
+    main_loop(mode=args.mode, delivery=args.delivery)
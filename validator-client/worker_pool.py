@@ -0,0 +1,320 @@
+# NeuroSwarm Validator Client - Process Worker Pool
+# Runs ONNX inference in separate worker processes so a many-core validator
+# is not limited to one interpreter's GIL. The parent keeps polling,
+# batching and reporting; it sends each batch to a worker over that
+# worker's pipe and a collector thread hands results (and streamed tokens)
+# back to the waiting job threads.
+#
+# Every worker loads models through its own BackendRegistry. Models
+# exported with inference.export_shared_weights() (python share_weights.py)
+# keep their weights in a page-aligned external-data file that ONNX Runtime
+# memory-maps, so N workers share one copy of the weights in the page cache
+# instead of holding N private copies. Prepacking is disabled in workers
+# because it copies the weights into private buffers.
+#
+# Messages (tuples, pickled by multiprocessing.Connection):
+#   parent -> worker: ("batch", id, model, prompts, max_tokens, stream_rows)
+#                     ("embed", id, model, texts, batch_size)
+#                     ("preload", models)  |  ("stop",)
+#   worker -> parent: ("token", id, row, piece)
+#                     ("result", id, results, generated_tokens, elapsed_seconds)
+#                     (embed results are one float32 array [len(texts), dims], 0 tokens)
+#                     ("error", id, exception)
+
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from inference import BackendRegistry, DEFAULT_PREFIX_CACHE_BYTES, find_model_file, uses_shared_weights
+
+RESTART_BACKOFF_SECONDS = 2.0
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker process running a batch exited before returning its result."""
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """ONNX Runtime intra-op threads per worker so the workers together use every core once."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def models_without_shared_weights(models_dir: str) -> List[str]:
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(name for name in os.listdir(models_dir)
+                  if find_model_file(os.path.join(models_dir, name)) and not uses_shared_weights(os.path.join(models_dir, name)))
+
+
+def _worker_main(conn, models_dir: str, session_options: Dict[str, Any], default_model: Optional[str],
+                 memory_budget_bytes: Optional[int], prefix_cache_bytes: int):
+    # Ctrl+C reaches the whole process group; the parent drains and then stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    registry = BackendRegistry(models_dir, session_options, default_model=default_model,
+                               memory_budget_bytes=memory_budget_bytes, prefix_cache_bytes=prefix_cache_bytes)
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return # Parent went away
+            if message[0] == "stop":
+                return
+            if message[0] == "preload":
+                try:
+                    registry.preload(message[1])
+                except Exception as e:
+                    print(f"   [WORKER {os.getpid()}] Preload failed: {e}")
+                continue
+
+            request_id, model = message[1], message[2]
+            try:
+                if message[0] == "embed":
+                    with registry.lease(model) as backend:
+                        start = time.monotonic()
+                        results = backend.embed(message[3], message[4])
+                        elapsed = time.monotonic() - start
+                    tokens = 0
+                else:
+                    _, _, _, prompts, max_tokens, stream_rows = message
+                    on_token = [(lambda piece, row=row: conn.send(("token", request_id, row, piece))) if stream else None
+                                for row, stream in enumerate(stream_rows)]
+                    with registry.lease(model) as backend:
+                        start = time.monotonic()
+                        results = backend.generate_batch(prompts, max_tokens, on_token)
+                        elapsed = time.monotonic() - start
+                        tokens = sum(backend.count_tokens(r) for r in results)
+                reply = ("result", request_id, results, tokens, elapsed)
+            except Exception as e:
+                reply = ("error", request_id, e)
+            try:
+                conn.send(reply)
+            except Exception:
+                # The exception itself may not pickle; send its text instead
+                conn.send(("error", request_id, RuntimeError(f"{type(reply[2]).__name__}: {reply[2]}")))
+    finally:
+        registry.close()
+
+
+class _Pending:
+    __slots__ = ("future", "on_token")
+
+    def __init__(self, on_token: List[Optional[Callable[[str], None]]]):
+        self.future: Future = Future()
+        self.on_token = on_token
+
+
+class _Worker:
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, _Pending] = {}
+        self.models = set() # Models this worker has been sent, preferred for the same model again
+        self.started_at = time.monotonic()
+
+
+class ProcessWorkerPool:
+    """
+    Args:
+        workers: Number of worker processes
+        models_dir, session_options, default_model, memory_budget_bytes, prefix_cache_bytes:
+            Passed to each worker's BackendRegistry (budgets are per worker)
+    """
+
+    def __init__(self, workers: int, models_dir: str, session_options: Optional[Dict[str, Any]] = None,
+                 default_model: Optional[str] = None, memory_budget_bytes: Optional[int] = None,
+                 prefix_cache_bytes: int = DEFAULT_PREFIX_CACHE_BYTES):
+        options = dict(session_options or {})
+        options["disable_prepacking"] = True # Keep memory-mapped weights shared
+        if not options.get("intra_op_num_threads"):
+            options["intra_op_num_threads"] = default_threads_per_worker(workers)
+        self._worker_args = (models_dir, options, default_model, memory_budget_bytes, prefix_cache_bytes)
+        self._context = multiprocessing.get_context("spawn") # Never fork a process that already runs threads
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closing = False
+        self._preloaded: List[str] = []
+        self.restarts = 0
+
+        unshared = models_without_shared_weights(models_dir)
+        if unshared:
+            print(f"   [WORKERS] {', '.join(unshared)} not exported with shared weights; each worker will hold its own copy "
+                  f"(run: python share_weights.py --models-dir {models_dir}).")
+        self._workers = [self._spawn(index) for index in range(workers)]
+        print(f"   [WORKERS] Started {workers} inference worker processes ({options['intra_op_num_threads']} threads each).")
+        self._collector = threading.Thread(target=self._collect, name="worker-collector", daemon=True)
+        self._collector.start()
+
+    # --- Public API ---
+
+    def generate_batch(self, model: str, prompts: List[str], max_tokens: List[int],
+                       on_token: Optional[List[Optional[Callable[[str], None]]]] = None) -> Tuple[List[str], int, float]:
+        """
+        Runs one batched generation on a worker and blocks until it finishes.
+        Returns (results, generated_tokens, elapsed_seconds).
+        """
+        on_token = list(on_token or [None] * len(prompts))
+        return self._submit(model, on_token, lambda request_id: (
+            "batch", request_id, model, prompts, max_tokens, [cb is not None for cb in on_token]))
+
+    def embed(self, model: str, texts: List[str], batch_size: int) -> Tuple[Any, float]:
+        """
+        Embeds texts on a worker and blocks until it finishes. Returns
+        (float32 array [len(texts), dims], elapsed_seconds).
+        """
+        vectors, _, elapsed = self._submit(model, [], lambda request_id: ("embed", request_id, model, texts, batch_size))
+        return vectors, elapsed
+
+    def preload(self, models: List[str]):
+        """Starts loading models in every worker (and in workers started later)."""
+        with self._lock:
+            self._preloaded.extend(models)
+            workers = list(self._workers)
+        for worker in workers:
+            self._send_quietly(worker, ("preload", models))
+
+    def prepare(self, model: str):
+        """
+        Starts loading a model in every worker unless one has already been
+        sent work for it. Prompts are tokenized by the worker that runs them.
+        """
+        with self._lock:
+            if model in self._preloaded or any(model in w.models for w in self._workers):
+                return
+        self.preload([model])
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(w.pending) for w in self._workers)
+
+    def close(self, timeout: float = 10.0):
+        with self._lock:
+            self._closing = True
+            workers = list(self._workers)
+        for worker in workers:
+            self._send_quietly(worker, ("stop",))
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(1)
+        self._collector.join(timeout=1)
+        for worker in workers:
+            self._fail_pending(worker, RuntimeError("Worker pool closed"))
+            worker.conn.close()
+
+    # --- Internals ---
+
+    def _submit(self, model: str, on_token: List[Optional[Callable[[str], None]]],
+                make_message: Callable[[int], Tuple]) -> Tuple[Any, int, float]:
+        request_id = next(self._ids)
+        pending = _Pending(on_token)
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Worker pool is closed")
+            # Least loaded worker; among equals, one that already has this model
+            worker = min(self._workers, key=lambda w: (len(w.pending), model not in w.models))
+            worker.pending[request_id] = pending
+            worker.models.add(model)
+        try:
+            with worker.send_lock:
+                worker.conn.send(make_message(request_id))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                worker.pending.pop(request_id, None)
+            raise WorkerCrashedError(f"Worker {worker.index} is not reachable: {e}")
+        return pending.future.result()
+
+    def _spawn(self, index: int) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,) + self._worker_args,
+                                        name=f"inference-worker-{index}", daemon=True)
+        process.start()
+        child_conn.close() # Only the child holds its end, so a dead child shows up as EOF here
+        worker = _Worker(index, process, parent_conn)
+        if self._preloaded:
+            self._send_quietly(worker, ("preload", list(self._preloaded)))
+        return worker
+
+    def _send_quietly(self, worker: _Worker, message):
+        try:
+            with worker.send_lock:
+                worker.conn.send(message)
+        except (OSError, ValueError):
+            pass # A dead worker is detected and replaced by the collector
+
+    def _fail_pending(self, worker: _Worker, error: Exception):
+        with self._lock:
+            pending, worker.pending = worker.pending, {}
+        for request in pending.values():
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _collect(self):
+        while True:
+            with self._lock:
+                if self._closing and not any(w.process.is_alive() for w in self._workers):
+                    return
+                by_handle = {}
+                for worker in self._workers:
+                    by_handle[worker.conn] = worker
+                    by_handle[worker.process.sentinel] = worker
+            for ready in wait(list(by_handle), timeout=1.0):
+                worker = by_handle[ready]
+                if ready is worker.conn:
+                    try:
+                        while worker.conn.poll():
+                            self._dispatch(worker, worker.conn.recv())
+                        continue
+                    except (EOFError, OSError):
+                        pass # The worker died
+                self._replace(worker)
+
+    def _dispatch(self, worker: _Worker, message):
+        kind, request_id = message[0], message[1]
+        with self._lock:
+            request = worker.pending.get(request_id) if kind == "token" else worker.pending.pop(request_id, None)
+        if request is None:
+            return
+        if kind == "token":
+            callback = request.on_token[message[2]]
+            if callback:
+                callback(message[3])
+        elif kind == "result":
+            request.future.set_result((message[2], message[3], message[4]))
+        else:
+            request.future.set_exception(message[2])
+
+    def _replace(self, worker: _Worker):
+        try:
+            while worker.conn.poll(): # Results sent just before the worker exited
+                self._dispatch(worker, worker.conn.recv())
+        except (EOFError, OSError):
+            pass
+        worker.process.join(1)
+        exitcode = worker.process.exitcode
+        with self._lock:
+            if worker not in self._workers:
+                return
+            closing = self._closing
+        self._fail_pending(worker, WorkerCrashedError(f"Inference worker {worker.index} exited (code {exitcode})"))
+        worker.conn.close()
+        if closing:
+            with self._lock:
+                self._workers.remove(worker)
+            return
+        print(f"   [WORKERS] Inference worker {worker.index} exited (code {exitcode}); starting a replacement.")
+        if time.monotonic() - worker.started_at < RESTART_BACKOFF_SECONDS:
+            time.sleep(RESTART_BACKOFF_SECONDS) # Don't spin on a worker that fails at startup
+        replacement = self._spawn(worker.index)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self.restarts += 1